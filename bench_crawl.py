@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import zlib
+
+from aiohttp import web
+from unittest import mock
+
+
+####################################################################################################
+# GLOBALS
+####################################################################################################
+
+HOST, PORT = "127.0.0.1", 8765
+os.environ["CORE_API_BASE"] = f"http://{HOST}:{PORT}/v3"   # must be set before get_docs is imported
+os.environ["CORE_CACHE_DIR"] = ""                           # measure the network path, not the response cache
+
+LATENCY = 0.15              # simulated server latency per request (seconds)
+RATE_LIMIT = 10_000         # requests per window reported in X-RateLimit-Limit
+WORDS = ("carbon emissions warming adaptation ocean heat flood drought policy model "
+         "forest methane sea level ice sheet temperature rainfall agriculture").split()
+
+
+def _fake_text(work_id):
+    """Deterministic readable text for a work ID."""
+    return " ".join(WORDS[(work_id * 7 + i) % len(WORDS)] for i in range(400))
+
+
+def make_mock_core():
+    """
+    Builds a tiny aiohttp app that mimics the four CORE endpoints used by get_docs.py.
+    Roughly a third of the works carry fullText in the search results, the rest need one of
+    the download fallbacks (and some have no text at all).
+    """
+    calls = {"n": 0}
+
+    def headers():
+        calls["n"] += 1
+        return {"X-RateLimit-Limit": str(RATE_LIMIT),
+                "X-RateLimit-Remaining": str(max(RATE_LIMIT - calls["n"], 0))}
+
+    async def search(request):
+        await asyncio.sleep(LATENCY)
+        q = request.query.get("q", "")
+        offset = int(request.query.get("offset", 0))
+        limit = int(request.query.get("limit", 25))
+        base = zlib.crc32(q.encode()) % 1_000_000 * 1000
+        results = []
+        for work_id in range(base + offset, base + offset + limit):
+            work = {"id": work_id, "doi": None, "title": f"{q} paper {work_id}",
+                    "abstract": f"abstract of {work_id}", "publisher": "Mock"}
+            if work_id % 3 == 0:
+                work["fullText"] = _fake_text(work_id)
+            results.append(work)
+        return web.json_response({"results": results}, headers=headers())
+
+    async def download(request):
+        await asyncio.sleep(LATENCY * 2)
+        work_id = int(request.match_info["work_id"])
+        if work_id % 3 == 1:
+            return web.Response(text=_fake_text(work_id), headers=headers())
+        return web.Response(status=404, headers=headers())
+
+    async def metadata(request):
+        await asyncio.sleep(LATENCY)
+        work_id = int(request.match_info["work_id"])
+        text = _fake_text(work_id) if work_id % 6 == 2 else None
+        return web.json_response({"id": work_id, "fullText": text}, headers=headers())
+
+    app = web.Application()
+    app.router.add_get("/v3/search/works", search)
+    app.router.add_get("/v3/works/{work_id}/download", download)
+    app.router.add_get("/v3/works/{work_id}", metadata)
+    app.router.add_get("/v3/download/{work_id}", download)
+    return app
+
+
+def start_server():
+    """Runs the mock CORE server on a background thread so both crawlers can hit it."""
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(make_mock_core(), access_log=None)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.TCPSite(runner, HOST, PORT).start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+
+def bench_sync(categories, target):
+    """Sequential crawler from get_docs.py with its fixed sleeps turned off (its best case)."""
+    import get_docs
+    from dedup_index import DedupIndex
+    get_docs.OUTPUT_DIR = tempfile.mkdtemp()
+    dedup = DedupIndex()
+    start = time.perf_counter()
+    with mock.patch.object(get_docs.time, "sleep", lambda s: None):
+        total = sum(len(get_docs.collect_papers_with_text(c, target, dedup)) for c in categories)
+    return total, time.perf_counter() - start
+
+
+def bench_async(categories, target):
+    """Concurrent crawler from get_docs_async.py."""
+    import get_docs_async
+    from dedup_index import DedupIndex
+    start = time.perf_counter()
+    total = asyncio.run(get_docs_async.crawl(categories, target, tempfile.mkdtemp(), dedup=DedupIndex()))
+    return total, time.perf_counter() - start
+
+
+def main():
+    """Crawls the mock server with both crawlers and reports papers per minute."""
+    parser = argparse.ArgumentParser(description="Benchmark get_docs.py vs get_docs_async.py on a mock CORE")
+    parser.add_argument("--categories", type=int, default=13)
+    parser.add_argument("--target", type=int, default=10)
+    parser.add_argument("--skip-sync", action="store_true", help="only run the async crawler")
+    args = parser.parse_args()
+
+    from get_docs import CATEGORIES
+    categories = CATEGORIES[:args.categories]
+    start_server()
+
+    rows = []
+    if not args.skip_sync:
+        rows.append(("get_docs (sleeps off)", *bench_sync(categories, args.target)))
+    rows.append(("get_docs_async", *bench_async(categories, args.target)))
+
+    print(f"\n{'crawler':<24}{'papers':>8}{'seconds':>10}{'papers/min':>12}")
+    for name, papers, seconds in rows:
+        print(f"{name:<24}{papers:>8}{seconds:>10.1f}{papers / seconds * 60:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import glob
+import json
+import re
+import time
+
+from text_validator import ACCEPT, validate_stream, validate_text
+
+
+####################################################################################################
+# GLOBALS
+####################################################################################################
+
+OUTPUT_DIR = "climate_outputs"
+CHUNK = 64 * 1024           # bytes per simulated network chunk
+
+
+def legacy_is_valid_text(text):
+    """get_docs.is_valid_text before the streaming validator (prints removed)."""
+    if not text:
+        return False
+    if text.startswith("%PDF-"):
+        return False
+    if "\0" in text or text.count('�') > 5:
+        return False
+    if sum(c.isalnum() for c in text) < 200:
+        return False
+    if len(re.findall(r'\b\w+\b', text)) < 100:
+        return False
+    return True
+
+
+def load_texts():
+    """Every fullText in climate_outputs, plus a few synthetic multi-megabyte documents."""
+    texts = []
+    for path in sorted(glob.glob(f"{OUTPUT_DIR}/*.json")):
+        with open(path, 'r', encoding='utf-8') as f:
+            texts.extend(p["fullText"] for p in json.load(f) if p.get("fullText"))
+    largest = max(texts, key=len)
+    texts.append(largest * 8)                           # ~8 MB valid document
+    texts.append("%PDF-1.7\n" + largest * 4)            # PDF markup
+    texts.append(largest[:4000] + "\0" + largest * 4)   # binary payload after a readable preamble
+    return texts
+
+
+def timed(fn, texts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [fn(t) for t in texts]
+        best = min(best, time.perf_counter() - start)
+    return best, results
+
+
+def main():
+    """Times the legacy validator against the single-pass one on real and synthetic documents."""
+    parser = argparse.ArgumentParser(description="Micro-benchmark for is_valid_text")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = load_texts()
+    encoded = [t.encode("utf-8") for t in texts]
+    total_mb = sum(len(b) for b in encoded) / 1e6
+    print(f"{len(texts)} documents, {total_mb:.1f} MB, largest {max(map(len, encoded)) / 1e6:.1f} MB")
+
+    legacy_s, legacy = timed(legacy_is_valid_text, texts, args.repeat)
+    single_s, single = timed(lambda t: validate_text(t).state == ACCEPT, texts, args.repeat)
+    stream_s, streamed = timed(
+        lambda b: validate_stream(b[i:i + CHUNK] for i in range(0, len(b), CHUNK))[0] is not None,
+        encoded, args.repeat)
+
+    print(f"\n{'validator':<28}{'total ms':>10}{'MB/s':>10}")
+    for name, seconds in (("legacy is_valid_text", legacy_s), ("single-pass (string)", single_s),
+                          ("streamed 64 KB chunks", stream_s)):
+        print(f"{name:<28}{seconds * 1000:>10.1f}{total_mb / seconds:>10.0f}")
+
+    agree = sum(a == b == c for a, b, c in zip(legacy, single, streamed))
+    print(f"\nVerdicts agree on {agree}/{len(texts)} documents")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,98 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
 from flask_cors import CORS
 import openai
 import os
 from dotenv import load_dotenv
+load_dotenv()       # before the imports below: they read RETRIEVAL_CATEGORIES, INFERENCE_URL, WARMUP, … at import time
+import logging
+import time
 
-from kg_client import top_three
-from rewrite_pipeline import doPipeline
+from paper_store import PaperStore
+from batch_pipeline import read_records, retriever, run_batch
+from chat_pipeline import IO_WORKERS, MODEL_WORKERS, ChatPipeline
+from passage_index import PassageIndex
+from query_cache import QueryCache, cache_pipeline, cache_retrieval, graph_version, pipeline_version
+from inference_client import INFERENCE_URL
+from rewrite_pipeline import doPipeline, predict_category, rank_categories, rewrite_query   # in‑process, or inference_server.py with INFERENCE_URL
+from warmup import STATE as WARMUP_STATE, WARMUP, memory, warm_up
+from zero_shot_classifier import TOP_CATEGORIES
 import json, os
 from pathlib import Path
 
 CLIMATE_DIR = Path(__file__).resolve().parent.parent / "climate_outputs"
 
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")   # per‑stage chat spans
+
+# retrieval backend: "neo4j" (paperFT full‑text index), "bm25" (in‑process, no database),
+# "vector" (dense embeddings, needs `python vector_index.py` first) or "hybrid" (both, RRF‑fused)
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "neo4j").lower()
+if RETRIEVAL_BACKEND == "bm25":
+    from bm25_index import top_three
+elif RETRIEVAL_BACKEND == "vector":
+    from vector_index import top_three
+elif RETRIEVAL_BACKEND == "hybrid":
+    from kg_client import hybrid_top_three as top_three
+else:
+    from kg_client import top_three
+
+# classify/rewrite and retrieval results, keyed on the normalised query (see query_cache.py)
+PIPELINE_CACHE  = QueryCache("pipeline", version=pipeline_version)
+CHAT_CACHE      = QueryCache("chat", version=pipeline_version)        # ChatPipeline's entries also hold the category ranking
+RETRIEVAL_CACHE = QueryCache("retrieval", version=graph_version)
+doPipeline = cache_pipeline(doPipeline, PIPELINE_CACHE)
+top_three  = cache_retrieval(top_three, RETRIEVAL_CACHE)
+
+# RETRIEVAL_CATEGORIES=k>1: classify ranks the top k categories and one retrieval scores papers across
+# all of them, weighted by category confidence, so a misclassification no longer means wrong papers
+if RETRIEVAL_BACKEND == "bm25":
+    from bm25_index import top_k_multi
+elif RETRIEVAL_BACKEND == "vector":
+    from kg_client import multi_category
+    from vector_index import _index as _vectors
+    top_k_multi = multi_category(lambda c, q, k: _vectors().top_k_papers(q, k=k, categories=[c]) if q.strip() else [])
+elif RETRIEVAL_BACKEND == "hybrid":
+    from kg_client import hybrid_search, multi_category
+    top_k_multi = multi_category(lambda c, q, k: hybrid_search(c, q, k=k)["results"])
+else:
+    from kg_client import top_k_multi
+
+def top_three_multi(categories, query: str = "") -> list[dict]:
+    return top_k_multi(categories, query, k=3)
+
+if TOP_CATEGORIES > 1:
+    classify = lambda q: rank_categories(q, TOP_CATEGORIES)
+    retrieve = cache_retrieval(top_three_multi, RETRIEVAL_CACHE)
+else:
+    classify, retrieve = predict_category, top_three
+
+# built once at startup (rebuilt if the JSON files changed) and shared by every request
+PAPERS = PaperStore.open(CLIMATE_DIR)
+PASSAGES = PassageIndex.open(CLIMATE_DIR, PAPERS)
+
+# prompt: "passages" sends the best chunks of each paper, "full" the complete fullText
+PROMPT_MODE = os.getenv("PROMPT_MODE", "passages").lower()
+PASSAGES_PER_PAPER = int(os.getenv("PASSAGES_PER_PAPER", "4"))
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+
 def get_paper_text_and_title(category: str, paper_id: int | str):
     """
     Return (fullText, title) for the paper with `paper_id`
     inside <climate_outputs>/<category>.json.
     Raises FileNotFoundError or ValueError if not found.
     """
-    fp = CLIMATE_DIR / f"{category}.json"
-    if not fp.exists():
-        raise FileNotFoundError(f"No file {fp}")
-
-    with fp.open("r", encoding="utf‑8") as f:
-        papers = json.load(f)
+    return PAPERS.get(category, paper_id)
 
-    for item in papers:
-        if str(item.get("id")) == str(paper_id):
-            return item.get("fullText", ""), item.get("title", "Unknown title")
+# with a model server, classify/rewrite are just I/O: let enough requests reach it to fill its batches
+PIPELINE = ChatPipeline(classify, rewrite_query, retrieve, get_paper_text_and_title, cache=CHAT_CACHE,
+                        model_workers=IO_WORKERS if INFERENCE_URL else MODEL_WORKERS)
 
-    raise ValueError(f"id {paper_id} not found in {fp}")
-
-load_dotenv()
+# WARMUP=load|full loads the models here instead of on the first request (see warmup.py);
+# under gunicorn.conf.py the master loads them once and every worker runs "full" after the fork
+NEO4J_USED = RETRIEVAL_BACKEND == "neo4j" or (RETRIEVAL_BACKEND == "hybrid" and os.getenv("HYBRID_LEXICAL", "neo4j") == "neo4j")
+if INFERENCE_URL:
+    WARMUP_STATE.update(stage="remote", ready=True)     # models live in inference_server.py
+elif WARMUP in ("load", "full"):
+    warm_up(WARMUP, neo4j=NEO4J_USED)
 
 
 app = Flask(__name__, static_folder="static", template_folder="templates")
@@ -38,6 +100,20 @@ CORS(app)
 
 openai.api_key = os.getenv("OPENAI_API_KEY") 
 
+CHAT_MODEL = "o1" #Change this depending on what we're feeling
+
+def build_prompt(user_msg: str, result: dict) -> str:
+    """The LLM prompt for a ChatPipeline result: the question plus the three papers (or their best passages)."""
+    retrieved = result["retrieved"]
+    (full_text1, paper_title1), (full_text2, paper_title2), (full_text3, paper_title3) = result["papers"]
+
+    if PROMPT_MODE != "full":
+        excerpts = PASSAGES.select([r["id"] for r in retrieved[:3]], f"{user_msg} {result['rewritten']}",
+                                   PASSAGES_PER_PAPER, PROMPT_TOKEN_BUDGET)
+        full_text1, full_text2, full_text3 = (" [...] ".join(excerpts[str(r["id"])]) for r in retrieved[:3])
+
+    return f"Briefly answer this question in one paragraph - {user_msg} - based on these three documents: [title]: {paper_title1} [full text]: {full_text1} \n \n [title]: {paper_title2} [full text]: {full_text2} \n \n [title]: {paper_title3} [full text]: {full_text3}. Begin your response with 'Based on the three most relevant documents in our database...' Include inline citations using the three titles that I provided to you. Try to add the year and the authors if you can"
+
 # Note - this is the only endpoint (besides the '/') that is used. The rest is debugging
 # This accepts the query from the ui, then rewrites it to better fit our system
 # Then we categorize the query using pytorch transformers
@@ -66,37 +142,23 @@ def chat():
     return jsonify({ "reply": reply })
     '''
     
-    cat_print, rewritten, query = doPipeline(user_msg)
-
-    reply = f"{cat_print} {rewritten} {query}"
-    print(reply)
-    
-    retrieved = top_three(cat_print, rewritten)
-    finalResponse = f"Sources: \n \n 1. {retrieved[0]["title"]} \n"
-    print(retrieved)
-
-
-    try:
-        full_text1, paper_title1 = get_paper_text_and_title(cat_print, retrieved[0]['id'])
-    except (FileNotFoundError, ValueError) as e:
-        return jsonify({"error": str(e)}), 400
-    
-    try:
-        full_text2, paper_title2 = get_paper_text_and_title(cat_print, retrieved[1]['id'])
-    except (FileNotFoundError, ValueError) as e:
-        return jsonify({"error": str(e)}), 400
-
+    # classify → rewrite → retrieve → fetch, concurrently where possible (see chat_pipeline.py)
     try:
-        full_text3, paper_title3 = get_paper_text_and_title(cat_print, retrieved[2]['id'])
+        result = PIPELINE.run(user_msg)
     except (FileNotFoundError, ValueError) as e:
         return jsonify({"error": str(e)}), 400
-
+    cat_print, rewritten, retrieved = result["category"], result["rewritten"], result["retrieved"]
+    print(f"{cat_print} {rewritten} {user_msg}")
+    print(retrieved)
+    if len(result["papers"]) < 3:
+        return jsonify({"error": f"only {len(result['papers'])} matching papers in {cat_print}"}), 404
+    prompt = build_prompt(user_msg, result)
 
     try:
         response = openai.ChatCompletion.create(
-            model="o1", #Change this depending on what we're feeling
+            model=CHAT_MODEL,
             messages=[
-                { "role": "user", "content": f"Briefly answer this question in one paragraph - {user_msg} - based on these three documents: [title]: {paper_title1} [full text]: {full_text1} \n \n [title]: {paper_title2} [full text]: {full_text2} \n \n [title]: {paper_title3} [full text]: {full_text3}. Begin your response with 'Based on the three most relevant documents in our database...' Include inline citations using the three titles that I provided to you. Try to add the year and the authors if you can"}
+                { "role": "user", "content": prompt }
             ],
             max_completion_tokens = 20000 # Unsure if needed
         )
@@ -104,7 +166,67 @@ def chat():
     except Exception as e:
         reply = f"Server error: {e}"
     finalReply = f"We've sorted your query into the '{cat_print}' category. The fully modified query is: '{rewritten.partition("> ")[2].strip()}'. \n Find our answer here: {reply} Also, here is the full return (with scores) for transparency: {str(retrieved)}"
-    return jsonify({ "reply": finalReply })
+    return jsonify({ "reply": finalReply, "trace": result["trace"] })
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Streaming variant of /api/chat (server‑sent events, read incrementally by app.jsx):
+#   category → {category, rewritten}, sources → [{id, doi, title, score}],
+#   token → {text} for every piece of the answer, done → {trace, total_ms}; error → {error}
+@app.route("/api/chat/stream", methods=["POST"])
+def chat_stream():
+    data = request.get_json(force=True)
+    user_msg = data.get("message", "").strip()
+    if not user_msg:        # same channel as every other failure, so app.jsx shows it as an error
+        return Response(sse("error", {"error": "Empty message."}), mimetype="text/event-stream",
+                        headers=SSE_HEADERS)
+
+    def events():
+        start = time.perf_counter()
+        yield ": stream open\n\n"             # flush headers right away
+        try:
+            for event, payload in PIPELINE.steps(user_msg):
+                if event == "category":
+                    yield sse("category", {"category": payload["category"], "categories": payload["categories"],
+                                           "rewritten": payload["rewritten"].partition("> ")[2].strip()})
+                elif event == "sources":
+                    yield sse("sources", payload["retrieved"])
+                else:
+                    result = payload
+        except (FileNotFoundError, ValueError) as e:
+            yield sse("error", {"error": str(e)})
+            return
+        except Exception as e:              # headers are already sent: report in‑band
+            yield sse("error", {"error": f"Server error: {e}"})
+            return
+        if len(result["papers"]) < 3:
+            yield sse("error", {"error": f"only {len(result['papers'])} matching papers in {result['category']}"})
+            return
+
+        try:
+            for chunk in openai.ChatCompletion.create(
+                model=CHAT_MODEL,
+                messages=[{ "role": "user", "content": build_prompt(user_msg, result) }],
+                max_completion_tokens = 20000,
+                stream=True,
+            ):
+                token = chunk.choices[0].delta.get("content")
+                if token:
+                    yield sse("token", {"text": token})
+        except Exception as e:
+            yield sse("error", {"error": f"Server error: {e}"})
+        yield sse("done", {"trace": result["trace"], "total_ms": round((time.perf_counter() - start) * 1000, 1)})
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream", headers=SSE_HEADERS)
+
+# 503 until the warm‑up of this process has finished; also reports its memory
+@app.get("/healthz/ready")
+def healthz_ready():
+    body = dict(WARMUP_STATE, memory=memory(), retrieval=RETRIEVAL_BACKEND)
+    return jsonify(body), 200 if WARMUP_STATE["ready"] else 503
 
 @app.get("/papers")
 def papers():
@@ -114,6 +236,64 @@ def papers():
         return {"error": "category param missing"}, 400
     return jsonify(top_three(cat, text))
 
+MAX_K = int(os.getenv("MAX_K", "50"))       # upper bound on ?k= for the endpoints below
+
+def k_arg(default: int = 3) -> int | None:
+    """?k= clamped to 1..MAX_K, or None when it is not an integer."""
+    try:
+        return min(max(int(request.args.get("k", default)), 1), MAX_K)
+    except ValueError:
+        return None
+
+@app.get("/papers/hybrid")
+def papers_hybrid():
+    from kg_client import hybrid_search
+    cat  = request.args.get("category")
+    text = request.args.get("query", "")
+    if not cat:
+        return {"error": "category param missing"}, 400
+    k = k_arg()
+    if k is None:
+        return {"error": "k must be an integer"}, 400
+    return jsonify(hybrid_search(cat, text, k=k))
+
+# Many queries per call (see batch_pipeline.py): NDJSON body, one {"query": ...} or string per
+# line (or JSON {"queries": [...]}); streams one NDJSON result per query back, in order
+@app.route("/api/batch", methods=["POST"])
+def batch():
+    k = k_arg()
+    if k is None:
+        return jsonify({"error": "k must be an integer"}), 400
+    try:
+        if request.mimetype == "application/json":
+            records = list(read_records(json.dumps(q) for q in request.get_json(force=True)["queries"]))
+        else:
+            records = list(read_records(request.get_data(as_text=True).splitlines()))
+    except (ValueError, KeyError, TypeError) as e:
+        return jsonify({"error": f"bad batch: {e}"}), 400
+
+    def lines():
+        try:
+            for rec in run_batch(records, retriever(RETRIEVAL_BACKEND), k):
+                yield json.dumps(rec, ensure_ascii=False) + "\n"
+        except Exception as e:              # headers are already sent: report in‑band
+            yield json.dumps({"error": f"{type(e).__name__}: {e}"}) + "\n"
+
+    return Response(stream_with_context(lines()), mimetype="application/x-ndjson")
+
+# e.g. /papers/multi?query=methane from cattle&k=5 – ranked categories and the merged top k
+@app.get("/papers/multi")
+def papers_multi():
+    text = request.args.get("query", "")
+    if not text:
+        return {"error": "query param missing"}, 400
+    k = k_arg()
+    if k is None:
+        return {"error": "k must be an integer"}, 400
+    ranked = rank_categories(text, max(TOP_CATEGORIES, 3))
+    categories = [(c.replace(" ", "_"), w) for c, w in ranked]
+    return jsonify({"categories": categories, "results": top_k_multi(categories, text, k=k)})
+
 @app.get("/queryPros")
 def queryPros():
     query  = request.args.get("query")
@@ -121,9 +301,14 @@ def queryPros():
         return {"error": "category param missing"}, 400
     return jsonify(doPipeline(query))
 
+@app.get("/api/cache/stats")
+def cache_stats():
+    return jsonify({"pipeline": PIPELINE_CACHE.stats(), "chat": CHAT_CACHE.stats(),
+                    "retrieval": RETRIEVAL_CACHE.stats()})
+
 @app.route("/")
 def index():
     return render_template("index.html")
 
 if __name__ == "__main__":
-    app.run(host='0.0.0.0', port=5050, debug=True)
+    app.run(host='0.0.0.0', port=5050, debug=True, use_reloader=WARMUP not in ("load", "full"))  # the reloader would load the models twice
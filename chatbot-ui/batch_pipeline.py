@@ -0,0 +1,128 @@
+"""
+batch_pipeline.py
+=================
+Classify → rewrite → retrieve for many queries at once: per chunk of
+--batch-size queries, one padded NLI batch, one batched rewrite and one
+retrieval round trip (a single UNWIND Cypher for Neo4j, or in‑process BM25),
+streamed out as JSONL in input order.
+
+Input: JSONL, one {"query": ..., <any other fields>} or bare JSON string per
+line; the other fields are passed through. --questions reads questions.json
+(make_sample_queries.py) instead and adds "expected" to every record.
+Output records gain "category", "rewritten" and "retrieved".
+
+Usage:
+    python batch_pipeline.py queries.jsonl -o results.jsonl [--backend bm25] [--batch-size 64]
+    python batch_pipeline.py --questions ../questions.json > rescored.jsonl
+    POST /api/batch in app.py does the same over HTTP (NDJSON in and out).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+from categories import canonical
+from rewrite_pipeline import doPipelines
+
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", "64"))
+PARAPHRASE_BUDGET_MS = float(os.getenv("PARAPHRASE_BUDGET_MS", "2000"))   # per query: a chunk of n gets n times it
+
+Retriever = Callable[[list[tuple[str, str]], int], list[list[dict]]]
+
+# --- input ------------------------------------------------------------
+def read_records(lines: Iterable[str]) -> Iterator[dict]:
+    """JSONL lines → records with a "query"; ValueError names the bad line."""
+    for n, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            rec = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"line {n}: {e}") from None
+        rec = {"query": rec} if isinstance(rec, str) else rec
+        if not isinstance(rec, dict) or not str(rec.get("query", "")).strip():
+            raise ValueError(f"line {n}: expected a string or an object with a non-empty \"query\"")
+        yield rec
+
+def question_records(path: Path) -> Iterator[dict]:
+    """questions.json ({category: [questions]}) as records with the expected category."""
+    for cat, qs in json.loads(path.read_text(encoding="utf-8")).items():
+        for q in qs:
+            yield {"query": q, "expected": canonical(cat).replace(" ", "_")}
+
+# --- retrieval --------------------------------------------------------
+def retriever(backend: str) -> Retriever:
+    """Many‑query retrieval for a RETRIEVAL_BACKEND; vector and hybrid loop over single queries."""
+    if backend == "bm25":
+        from bm25_index import top_k_many
+        return top_k_many
+    if backend == "vector":
+        from vector_index import _index
+        return lambda pairs, k: [_index().top_k_papers(q, k=k, categories=[c]) if q.strip() else []
+                                 for c, q in pairs]
+    if backend == "hybrid":
+        from kg_client import hybrid_search
+        return lambda pairs, k: [hybrid_search(c, q, k=k)["results"] for c, q in pairs]
+    from kg_client import top_k_many
+    return top_k_many
+
+# --- pipeline ---------------------------------------------------------
+def _chunks(records: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    chunk = []
+    for rec in records:
+        chunk.append(rec)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def run_batch(records: Iterable[dict], retrieve: Retriever, k: int = 3, batch_size: int = BATCH_SIZE,
+              timings: Optional[dict] = None) -> Iterator[dict]:
+    """Records in, records with category / rewritten / retrieved out, one chunk at a time."""
+    timings = {} if timings is None else timings
+    for chunk in _chunks(records, batch_size):
+        start = time.perf_counter()
+        processed = doPipelines([rec["query"] for rec in chunk], budget_ms=PARAPHRASE_BUDGET_MS * len(chunk))
+        mid = time.perf_counter()
+        hits = retrieve([(cat, rewritten) for cat, rewritten, _ in processed], k)
+        end = time.perf_counter()
+        timings["classify+rewrite_ms"] = timings.get("classify+rewrite_ms", 0.0) + (mid - start) * 1000
+        timings["retrieve_ms"] = timings.get("retrieve_ms", 0.0) + (end - mid) * 1000
+        for rec, (cat, rewritten, _), retrieved in zip(chunk, processed, hits):
+            yield dict(rec, category=cat, rewritten=rewritten, retrieved=retrieved)
+
+def main():
+    ap = argparse.ArgumentParser(description="Batch classify + rewrite + retrieve (JSONL in, JSONL out)")
+    ap.add_argument("input", nargs="?", type=Path, help="JSONL file (default: stdin)")
+    ap.add_argument("--questions", type=Path, help="read questions.json instead of JSONL")
+    ap.add_argument("-o", "--output", type=Path, help="default: stdout")
+    ap.add_argument("--backend", default=os.getenv("RETRIEVAL_BACKEND", "neo4j").lower(),
+                    choices=["neo4j", "bm25", "vector", "hybrid"])
+    ap.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    ap.add_argument("-k", type=int, default=3)
+    args = ap.parse_args()
+
+    if args.questions:
+        records = question_records(args.questions)
+    else:
+        records = read_records(args.input.open(encoding="utf-8") if args.input else sys.stdin)
+    out = args.output.open("w", encoding="utf-8") if args.output else sys.stdout
+    timings: dict = {}
+    start, n, correct = time.perf_counter(), 0, 0
+    for rec in run_batch(records, retriever(args.backend), args.k, args.batch_size, timings):
+        out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        n += 1
+        correct += rec.get("expected") == rec["category"]
+    out.flush()
+
+    secs = time.perf_counter() - start
+    accuracy = f", {correct / n:.1%} in the expected category" if args.questions and n else ""
+    print(f"✔ {n} queries in {secs:.1f} s ({n / max(secs, 1e-9):.1f}/s{accuracy}); "
+          + ", ".join(f"{k} {v:.0f}" for k, v in timings.items()), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
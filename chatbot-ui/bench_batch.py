@@ -0,0 +1,49 @@
+"""
+bench_batch.py
+==============
+Throughput of batch_pipeline.run_batch against batch size, where batch size
+1 is today's one‑query‑per‑call path (doPipeline + one retrieval each).
+
+Queries are questions.json (make_sample_queries.py) or, without it,
+bench_classifier.FALLBACK_SET repeated up to --limit. BM25 retrieval by
+default so no database is needed; --backend neo4j times the UNWIND query.
+
+    python bench_batch.py [--sizes 1 16 64] [--limit 650] [--backend bm25]
+"""
+import argparse
+import time
+
+from batch_pipeline import question_records, retriever, run_batch
+from bench_classifier import FALLBACK_SET
+from embedding_classifier import QUESTIONS_FILE
+
+def load_records(limit: int) -> list[dict]:
+    if QUESTIONS_FILE.exists():
+        records = list(question_records(QUESTIONS_FILE))
+    else:
+        records = [{"query": q} for _, q in FALLBACK_SET]
+        records = (records * (limit // len(records) + 1))
+    return records[:limit]
+
+def main():
+    ap = argparse.ArgumentParser(description="Batch pipeline throughput")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1, 16, 64])
+    ap.add_argument("--limit", type=int, default=650)
+    ap.add_argument("--backend", default="bm25", choices=["neo4j", "bm25", "vector", "hybrid"])
+    args = ap.parse_args()
+
+    records = load_records(args.limit)
+    retrieve = retriever(args.backend)
+    list(run_batch(records[:2], retrieve, batch_size=2))       # model loads outside the timings
+    print(f"{len(records)} queries, {args.backend} retrieval\n")
+    print(f"{'batch size':>10}{'queries/s':>11}{'total s':>9}{'classify+rewrite s':>20}{'retrieve s':>12}")
+    for size in args.sizes:
+        timings: dict = {}
+        start = time.perf_counter()
+        n = sum(1 for _ in run_batch(records, retrieve, batch_size=size, timings=timings))
+        secs = time.perf_counter() - start
+        print(f"{size:>10}{n / secs:>11.1f}{secs:>9.1f}{timings['classify+rewrite_ms'] / 1000:>20.1f}"
+              f"{timings['retrieve_ms'] / 1000:>12.2f}")
+
+if __name__ == "__main__":
+    main()
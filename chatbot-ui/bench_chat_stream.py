@@ -0,0 +1,71 @@
+"""
+bench_chat_stream.py
+====================
+What the user waits for with /api/chat (one JSON reply at the end) vs.
+/api/chat/stream (server‑sent events), against a running app.py.
+
+For the streaming endpoint it records when the first byte, the category, the
+sources and the first answer token arrive; for the blocking one, time to
+first byte is the whole request. Queries are the UI suggestions.
+
+    python app.py &
+    python bench_chat_stream.py [--url http://127.0.0.1:5000] [--repeat 3]
+"""
+import argparse
+import json
+import time
+import urllib.request
+
+from bench_prompt_tokens import SUGGESTIONS, pct
+
+def _post(url: str, query: str):
+    req = urllib.request.Request(url, data=json.dumps({"message": query}).encode("utf-8"),
+                                 headers={"Content-Type": "application/json"}, method="POST")
+    return urllib.request.urlopen(req, timeout=600)
+
+def blocking(base: str, query: str) -> dict:
+    start = time.perf_counter()
+    with _post(f"{base}/api/chat", query) as res:
+        res.read()
+    total = (time.perf_counter() - start) * 1000
+    return {"first byte": total, "total": total}
+
+def streaming(base: str, query: str) -> dict:
+    start = time.perf_counter()
+    marks: dict[str, float] = {}
+    with _post(f"{base}/api/chat/stream", query) as res:
+        for raw in res:
+            now = (time.perf_counter() - start) * 1000
+            marks.setdefault("first byte", now)
+            line = raw.decode("utf-8").strip()
+            if line.startswith("event: "):
+                event = line[7:]
+                marks.setdefault({"category": "category", "sources": "sources",
+                                  "token": "first token"}.get(event, event), now)
+    marks["total"] = (time.perf_counter() - start) * 1000
+    return marks
+
+def main():
+    ap = argparse.ArgumentParser(description="Blocking vs. streaming /api/chat latency")
+    ap.add_argument("--url", default="http://127.0.0.1:5000")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    columns = ["first byte", "category", "sources", "first token", "total"]
+    print(f"{len(SUGGESTIONS)} queries × {args.repeat}, p50 in ms\n")
+    print(f"{'endpoint':<18}" + "".join(f"{c:>13}" for c in columns))
+    runs: dict = {blocking: [], streaming: []}
+    for i in range(args.repeat):
+        for q in SUGGESTIONS:
+            # alternate which endpoint goes first, so warm query caches favour neither
+            for fn in ((blocking, streaming) if i % 2 == 0 else (streaming, blocking)):
+                runs[fn].append(fn(args.url, q))
+    for label, fn in (("/api/chat", blocking), ("/api/chat/stream", streaming)):
+        cells = []
+        for c in columns:
+            values = [r[c] for r in runs[fn] if c in r]
+            cells.append(f"{pct(values, 50):>13.0f}" if values else f"{'–':>13}")
+        print(f"{label:<18}" + "".join(cells))
+
+if __name__ == "__main__":
+    main()
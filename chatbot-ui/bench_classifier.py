@@ -0,0 +1,98 @@
+"""
+bench_classifier.py
+===================
+Accuracy and p50/p99 latency of the category classifiers, keyword vote left out:
+  nli        – zero_shot_classifier._nli_guess (13 BART‑large NLI passes)
+  embedding  – embedding_classifier.classify alone
+  emb+nli    – embedding, NLI only below the EMBED_MARGIN confidence margin
+
+With questions.json, every other question per category builds the prototypes
+and the rest are scored; without it a small hand‑labelled set is used.
+
+    python bench_classifier.py [--questions ../questions.json] [--limit 200]
+"""
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from categories import CATEGORIES
+from embedding_classifier import MARGIN, QUESTIONS_FILE, build_prototypes, classify, load_samples
+from zero_shot_classifier import _nli_guess
+
+FALLBACK_SET = [
+    ("climate assets", "How exposed are coastal power plants to flooding?"),
+    ("climate assets", "insurance losses on real estate from storms"),
+    ("climate datasets", "Where can I download historical precipitation records?"),
+    ("climate datasets", "reanalysis data for global surface temperature"),
+    ("greenhouse gases", "How much methane do cattle emit?"),
+    ("greenhouse gases", "sources of nitrous oxide in agriculture"),
+    ("climate hazards", "Are wildfires getting more frequent in California?"),
+    ("climate hazards", "drought risk for smallholder farmers"),
+    ("climate impacts", "How does warming affect wheat yields?"),
+    ("climate impacts", "effects of heat waves on public health"),
+    ("climate mitigation", "Which policies cut emissions fastest?"),
+    ("climate mitigation", "carbon capture and storage at cement plants"),
+    ("climate models", "How reliable are CMIP6 projections for rainfall?"),
+    ("climate models", "downscaling general circulation model output"),
+    ("climate nature", "How do forests store carbon?"),
+    ("climate nature", "wetland ecosystems under a changing climate"),
+    ("climate observations", "satellite measurements of sea level rise"),
+    ("climate observations", "observed trend in Arctic sea ice extent"),
+    ("climate organisms", "How are coral reefs responding to ocean warming?"),
+    ("climate organisms", "bird migration shifts due to climate change"),
+    ("climate organizations", "What does the IPCC do?"),
+    ("climate organizations", "role of the UNFCCC in climate negotiations"),
+    ("origins of climate problems", "Why did industrialisation increase CO2 levels?"),
+    ("origins of climate problems", "deforestation as a driver of global warming"),
+    ("climate properties", "What is climate sensitivity?"),
+    ("climate properties", "radiative forcing of aerosols"),
+]
+
+def split(path: Path):
+    samples = load_samples(path)
+    if not samples:
+        print(f"{path} not found – hand‑labelled set, label‑only prototypes")
+        return {}, FALLBACK_SET
+    train = {c: qs[::2] for c, qs in samples.items()}
+    test = [(c, q) for c, qs in samples.items() for q in qs[1::2]]
+    return train, test
+
+def run(name, fn, test):
+    fn(test[0][1])                      # warm‑up: model load
+    correct, times, extra = 0, [], 0
+    for label, query in test:
+        start = time.perf_counter()
+        guess, used_nli = fn(query)
+        times.append((time.perf_counter() - start) * 1000)
+        correct += guess == label
+        extra += used_nli
+    p50, p99 = np.percentile(times, [50, 99])
+    print(f"{name:<12}{correct / len(test):>9.1%}{p50:>10.1f}{p99:>10.1f}{extra / len(test):>12.0%}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Classifier accuracy/latency benchmark")
+    ap.add_argument("--questions", type=Path, default=QUESTIONS_FILE)
+    ap.add_argument("--limit", type=int, help="score at most this many queries")
+    args = ap.parse_args()
+
+    train, test = split(args.questions)
+    test = test[:args.limit] if args.limit else test
+    protos = build_prototypes(train)
+
+    def nli(q):
+        return _nli_guess(q), True
+    def emb(q):
+        return classify(q, protos)[0], False
+    def emb_nli(q):
+        cat, margin = classify(q, protos)
+        return (cat, False) if margin >= MARGIN else (_nli_guess(q), True)
+
+    print(f"{len(test)} queries, {len(CATEGORIES)} categories, margin {MARGIN}\n")
+    print(f"{'mode':<12}{'accuracy':>9}{'p50 ms':>10}{'p99 ms':>10}{'NLI calls':>12}")
+    for name, fn in (("nli", nli), ("embedding", emb), ("emb+nli", emb_nli)):
+        run(name, fn, test)
+
+if __name__ == "__main__":
+    main()
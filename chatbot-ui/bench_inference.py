@@ -0,0 +1,80 @@
+"""
+bench_inference.py
+==================
+Latency, memory and output agreement of the inference backends (torch, int8,
+onnx) for the NLI and paraphrase pipelines. Each backend runs in its own
+subprocess so peak RSS is measured in isolation; agreement is against torch
+(NLI top label, and the greedy paraphrase text).
+
+    python bench_inference.py [--backends torch int8 onnx] [--limit 26]
+"""
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+from categories import CATEGORIES
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+def worker(backend: str, limit: int):
+    """Runs inside the subprocess; prints one JSON line."""
+    from bench_classifier import FALLBACK_SET
+    from inference_backend import load_pipeline
+    from transformer_rewriter import PARA_MODEL
+    from zero_shot_classifier import NLI_MODEL
+
+    queries = [q for _, q in FALLBACK_SET][:limit]
+    start = time.perf_counter()
+    nli = load_pipeline("zero-shot-classification", NLI_MODEL, backend)
+    para = load_pipeline("text2text-generation", PARA_MODEL, backend, max_length=48)
+    load_s = time.perf_counter() - start
+
+    labels, nli_ms, texts, para_ms = [], [], [], []
+    for q in queries:
+        t = time.perf_counter()
+        labels.append(nli(q, candidate_labels=CATEGORIES, hypothesis_template="This query is about {}.")["labels"][0])
+        nli_ms.append((time.perf_counter() - t) * 1000)
+        t = time.perf_counter()
+        texts.append(para(q, do_sample=False, num_beams=1)[0]["generated_text"].strip())
+        para_ms.append((time.perf_counter() - t) * 1000)
+
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024     # KB on Linux
+    print(json.dumps({"backend": backend, "load_s": load_s, "rss_mb": rss_mb, "labels": labels,
+                      "texts": texts, "nli_ms": nli_ms, "para_ms": para_ms}))
+
+def main():
+    ap = argparse.ArgumentParser(description="Inference backend benchmark")
+    ap.add_argument("--backends", nargs="*", default=["torch", "int8", "onnx"])
+    ap.add_argument("--limit", type=int, default=26)
+    ap.add_argument("--worker", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.worker:
+        return worker(args.worker, args.limit)
+
+    results = {}
+    for backend in args.backends:
+        out = subprocess.run([sys.executable, __file__, "--worker", backend, "--limit", str(args.limit)],
+                             capture_output=True, text=True)
+        if out.returncode:
+            print(f"✗ {backend}: {out.stderr.strip().splitlines()[-1] if out.stderr.strip() else out.returncode}")
+            continue
+        results[backend] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    ref = results.get("torch")
+    print(f"\n{'backend':<8}{'load s':>8}{'peak MB':>9}{'NLI p50':>9}{'NLI p95':>9}"
+          f"{'para p50':>10}{'para p95':>10}{'NLI agree':>11}{'para agree':>12}")
+    for name, r in results.items():
+        agree_nli = statistics.mean(a == b for a, b in zip(r["labels"], ref["labels"])) if ref else float("nan")
+        agree_para = statistics.mean(a == b for a, b in zip(r["texts"], ref["texts"])) if ref else float("nan")
+        print(f"{name:<8}{r['load_s']:>8.1f}{r['rss_mb']:>9.0f}{pct(r['nli_ms'], 50):>9.0f}{pct(r['nli_ms'], 95):>9.0f}"
+              f"{pct(r['para_ms'], 50):>10.0f}{pct(r['para_ms'], 95):>10.0f}{agree_nli:>11.0%}{agree_para:>12.0%}")
+    print("\nLatencies in ms; agreement is against the torch backend (NLI top label / greedy paraphrase).")
+
+if __name__ == "__main__":
+    main()
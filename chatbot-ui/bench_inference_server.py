@@ -0,0 +1,82 @@
+"""
+bench_inference_server.py
+=========================
+Load test of inference_server.py: throughput and latency of classify →
+rewrite requests as the number of concurrent clients grows, with
+micro‑batching (--max-batch) against batch size one.
+
+By default both servers run inside this process on free localhost ports (the
+models load once and are shared); --url tests an already running server
+instead. Queries cycle through bench_classifier.FALLBACK_SET.
+
+    python bench_inference_server.py [--concurrency 1 2 4 8 16 32] [--requests 64]
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import inference_client
+import inference_server
+from bench_classifier import FALLBACK_SET
+from bench_prompt_tokens import pct
+
+def one_request(query: str) -> float:
+    start = time.perf_counter()
+    category = inference_client.predict_category(query)
+    inference_client.rewrite_query(query, category)
+    return (time.perf_counter() - start) * 1000
+
+def load(url: str, concurrency: int, n_requests: int) -> tuple[float, float, float]:
+    """(requests/s, p50 ms, p95 ms)"""
+    inference_client.INFERENCE_URL = url
+    queries = [FALLBACK_SET[i % len(FALLBACK_SET)][1] for i in range(n_requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        times = list(pool.map(one_request, queries))
+    return n_requests / (time.perf_counter() - start), pct(times, 50), pct(times, 95)
+
+def serve(max_batch: int, max_wait_ms: float) -> tuple[str, inference_server.ThreadingHTTPServer]:
+    server = inference_server.make_server(0, max_batch, max_wait_ms)       # port 0: any free port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}", server
+
+def _totals(server) -> tuple[int, int]:
+    """(items, batches) over both batchers of an in‑process server."""
+    if server is None:
+        return 0, 0
+    stats = [b.stats() for b in server.batchers.values()]
+    return sum(st["items"] for st in stats), sum(st["batches"] for st in stats)
+
+def main():
+    ap = argparse.ArgumentParser(description="Micro-batching inference server load test")
+    ap.add_argument("--url", help="test this running server instead of starting two")
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    ap.add_argument("--requests", type=int, default=64, help="requests per concurrency level")
+    ap.add_argument("--max-batch", type=int, default=inference_server.MAX_BATCH)
+    ap.add_argument("--max-wait-ms", type=float, default=inference_server.MAX_WAIT_MS)
+    args = ap.parse_args()
+
+    if args.url:
+        targets = [(args.url, args.url, None)]
+    else:
+        from warmup import warm_up
+        warm_up("full")
+        targets = [("batch 1", *serve(1, 0)),
+                   (f"batch ≤ {args.max_batch}, {args.max_wait_ms:g} ms", *serve(args.max_batch, args.max_wait_ms))]
+
+    print(f"{'server':<24}{'clients':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'mean batch':>12}")
+    for label, url, server in targets:
+        for c in args.concurrency:
+            before = _totals(server)
+            rps, p50, p95 = load(url, c, args.requests)
+            mean = ""
+            if server is not None:      # in‑process: batches of this level only, both models
+                items, batches = (a - b for a, b in zip(_totals(server), before))
+                mean = f"{items / max(batches, 1):.1f}"
+            print(f"{label:<24}{c:>8}{rps:>9.1f}{p50:>9.0f}{p95:>9.0f}{mean:>12}")
+        if server is not None:
+            server.shutdown()
+
+if __name__ == "__main__":
+    main()
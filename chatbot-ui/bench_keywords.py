@@ -0,0 +1,80 @@
+"""
+bench_keywords.py
+=================
+Legacy substring loop vs. the Aho–Corasick automaton for the keyword vote, as
+the keyword list grows from keyword_map.KEYWORDS to tens of thousands of terms
+(climate_kw.txt from the Climate‑Change‑NER extraction, then synthetic two‑word
+phrases built from it).
+
+    python bench_keywords.py [--sizes 10000 50000] [--queries 500]
+"""
+import argparse
+import json
+import random
+import time
+import zlib
+from pathlib import Path
+
+from categories import CATEGORIES
+from keyword_automaton import KeywordAutomaton
+from keyword_map import KEYWORDS
+
+NER_TERMS = Path(__file__).resolve().parent.parent / "climate_kw.txt"
+
+def legacy_vote(keywords, q):
+    """zero_shot_classifier._keyword_vote before the automaton."""
+    q_lower = q.lower()
+    for cat, kws in keywords.items():
+        if any(k in q_lower for k in kws):
+            return cat
+    return None
+
+def grow(base, terms, size, rng):
+    """Copy of `base` with extra terms (then synthetic phrases) until it holds `size` keywords."""
+    keywords = {c: list(v) for c, v in base.items()}
+    have = {t for v in keywords.values() for t in v}
+    extra = [t for t in terms if t not in have]
+    while len(have) < size:
+        term = extra.pop() if extra else f"{rng.choice(terms)} {rng.choice(terms)}"
+        if term not in have:
+            have.add(term)
+            keywords[CATEGORIES[zlib.crc32(term.encode()) % len(CATEGORIES)]].append(term)
+    return keywords
+
+def make_queries(terms, n, rng):
+    shapes = ["How does {} affect {} in {} regions?", "What is the role of {} in {}?",
+              "impact of {} on {} and {}", "Why are {} and {} linked to {}?"]
+    return [rng.choice(shapes).format(*(rng.choice(terms) for _ in range(3))) for _ in range(n)]
+
+def per_query_us(fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+def main():
+    ap = argparse.ArgumentParser(description="Keyword vote benchmark")
+    ap.add_argument("--sizes", type=int, nargs="*", default=[10_000, 50_000])
+    ap.add_argument("--queries", type=int, default=500)
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    terms = json.loads(NER_TERMS.read_text(encoding="utf-8"))
+    queries = make_queries(terms, args.queries, rng)
+    base = sum(map(len, KEYWORDS.values()))
+
+    print(f"{args.queries} synthetic queries, {len(terms)} NER terms\n")
+    print(f"{'keywords':>9}{'build ms':>10}{'legacy µs/q':>13}{'automaton µs/q':>16}{'speed‑up':>10}{'agree*':>8}")
+    for size in [base, base + len(terms)] + args.sizes:
+        keywords = grow(KEYWORDS, terms, size, rng)
+        start = time.perf_counter()
+        ac = KeywordAutomaton(keywords)
+        build_ms = (time.perf_counter() - start) * 1000
+        legacy = per_query_us(lambda q: legacy_vote(keywords, q), queries)
+        auto = per_query_us(ac.best, queries)
+        # *share of queries where the automaton's winner is the legacy first hit (or both abstain)
+        agree = sum(ac.best(q) == legacy_vote(keywords, q) for q in queries) / len(queries)
+        print(f"{len(ac):>9}{build_ms:>10.1f}{legacy:>13.1f}{auto:>16.1f}{legacy / auto:>9.1f}x{agree:>8.0%}")
+
+if __name__ == "__main__":
+    main()
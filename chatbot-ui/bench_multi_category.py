@@ -0,0 +1,59 @@
+"""
+bench_multi_category.py
+=======================
+Single‑category retrieval (top_three in predict_category's category) vs.
+multi‑category retrieval (top_k_multi over rank_categories' top k, weighted
+by confidence) on labelled queries, with BM25 so no database is needed.
+
+Recall here = share of queries with at least one of the 3 papers in the
+expected category (PaperStore membership); latency is retrieval only, p50.
+Queries are questions.json or bench_classifier.FALLBACK_SET.
+
+    python bench_multi_category.py [--k 3] [--limit 300]
+"""
+import argparse
+import json
+import time
+
+from bench_classifier import FALLBACK_SET
+from bench_prompt_tokens import pct
+from bm25_index import CLIMATE_DIR, top_k_multi, top_three
+from categories import canonical
+from embedding_classifier import QUESTIONS_FILE
+from paper_store import PaperStore
+from zero_shot_classifier import rank_categories
+
+def load_queries(limit: int) -> list[tuple[str, str]]:
+    if QUESTIONS_FILE.exists():
+        data = json.loads(QUESTIONS_FILE.read_text(encoding="utf-8"))
+        return [(canonical(c), q) for c, qs in data.items() for q in qs][:limit]
+    return list(FALLBACK_SET)[:limit]
+
+def main():
+    ap = argparse.ArgumentParser(description="Single vs. multi-category retrieval")
+    ap.add_argument("--k", type=int, default=3, help="categories searched in multi mode")
+    ap.add_argument("--limit", type=int, default=300)
+    args = ap.parse_args()
+
+    papers = PaperStore.open(CLIMATE_DIR)
+    queries = load_queries(args.limit)
+    rows = {"single": [], f"multi (top {args.k})": []}
+    for expected, q in queries:
+        ranked = [(c.replace(" ", "_"), w) for c, w in rank_categories(q, args.k)]
+        members = papers.categories.get(expected.replace(" ", "_"), set())
+        for label, retrieve in (("single", lambda: top_three(ranked[0][0], q)),
+                                (f"multi (top {args.k})", lambda: top_k_multi(ranked, q, k=3))):
+            start = time.perf_counter()
+            hits = retrieve()
+            ms = (time.perf_counter() - start) * 1000
+            rows[label].append((any(str(h["id"]) in members for h in hits), ms))
+
+    print(f"{len(queries)} labelled queries, BM25 retrieval\n")
+    print(f"{'mode':<18}{'recall':>8}{'p50 ms':>9}{'p95 ms':>9}")
+    for label, results in rows.items():
+        times = [ms for _, ms in results]
+        recall = sum(ok for ok, _ in results) / len(results)
+        print(f"{label:<18}{recall:>8.1%}{pct(times, 50):>9.2f}{pct(times, 95):>9.2f}")
+
+if __name__ == "__main__":
+    main()
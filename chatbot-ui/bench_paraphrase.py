@@ -0,0 +1,65 @@
+"""
+bench_paraphrase.py
+===================
+How often each paraphrase tier is enough, and the rewrite_query latency it
+gives, against the original single sampled 5‑beam call.
+
+Only climate‑rich queries reach the paraphraser, so the query set is the
+sample questions (questions.json or bench_classifier.FALLBACK_SET) plus each
+of them with a climate phrase appended.
+
+    python bench_paraphrase.py [--budget-ms 2000] [--limit 100]
+"""
+import argparse
+import json
+import time
+
+import transformer_rewriter as tr
+from bench_classifier import FALLBACK_SET
+from categories import canonical
+from embedding_classifier import QUESTIONS_FILE
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+def load_queries(limit):
+    if QUESTIONS_FILE.exists():
+        data = json.loads(QUESTIONS_FILE.read_text(encoding="utf-8"))
+        pairs = [(canonical(c), q) for c, qs in data.items() for q in qs]
+    else:
+        pairs = list(FALLBACK_SET)
+    pairs += [(c, f"{q.rstrip('?')} and carbon emissions from climate warming?") for c, q in pairs]
+    climate_rich = [(c, q) for c, q in pairs
+                    if sum(w in tr.CLIMATE_WORDS for w in tr._tokens(q)) / max(len(tr._tokens(q)), 1) >= 0.25]
+    return climate_rich[:limit]
+
+def run(mode, budget_ms, queries):
+    tr.PARAPHRASE_MODE, tr.PARAPHRASE_BUDGET_MS = mode, budget_ms
+    tr.TIER_STATS.clear()
+    times = []
+    for cat, q in queries:
+        start = time.perf_counter()
+        tr.rewrite_query(q, cat)
+        times.append((time.perf_counter() - start) * 1000)
+    shares = {k: v / len(queries) for k, v in tr.TIER_STATS.items()}
+    return pct(times, 50), pct(times, 95), shares
+
+def main():
+    ap = argparse.ArgumentParser(description="Paraphrase tier benchmark")
+    ap.add_argument("--budget-ms", type=float, default=tr.PARAPHRASE_BUDGET_MS)
+    ap.add_argument("--limit", type=int, default=100)
+    args = ap.parse_args()
+
+    queries = load_queries(args.limit)
+    tr._paraphraser()("warm‑up carbon emissions")     # model load outside the timings
+    print(f"{len(queries)} climate‑rich queries\n")
+    print(f"{'mode':<22}{'p50 ms':>9}{'p95 ms':>9}  tiers")
+    for label, mode, budget in (("sampled (original)", "sampled", 0), ("tiered, no budget", "tiered", 0),
+                                (f"tiered, {args.budget_ms:.0f} ms budget", "tiered", args.budget_ms)):
+        p50, p95, shares = run(mode, budget, queries)
+        tiers = ", ".join(f"{k} {v:.0%}" for k, v in sorted(shares.items(), key=lambda kv: -kv[1]))
+        print(f"{label:<22}{p50:>9.0f}{p95:>9.0f}  {tiers}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+bench_prompt_tokens.py
+======================
+Prompt size of /api/chat with whole fullTexts vs. passage selection, over the
+sample queries (questions.json from make_sample_queries.py, or the UI
+suggestions when it is missing). Retrieval uses the BM25 backend so no
+database or model is needed; tokens are estimated at ≈4 characters each.
+
+    python bench_prompt_tokens.py [--questions ../questions.json] [--budget 6000]
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+from bm25_index import _index
+from categories import canonical
+from passage_index import PER_PAPER_N, TOKEN_BUDGET, PassageIndex, estimate_tokens
+
+SUGGESTIONS = [             # static/js/app.jsx
+    "What causes climate change?",
+    "How can I reduce my carbon footprint?",
+    "Tell me a fun fact about the planet",
+]
+
+def load_queries(path: Path) -> list[tuple[str | None, str]]:
+    if not path.exists():
+        print(f"{path} not found – using the UI suggestions")
+        return [(None, q) for q in SUGGESTIONS]
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return [(canonical(cat).replace(" ", "_"), q) for cat, qs in data.items() for q in qs]
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[3])
+    ap.add_argument("--questions", type=Path, default=Path(__file__).resolve().parent.parent / "questions.json")
+    ap.add_argument("--per-paper", type=int, default=PER_PAPER_N)
+    ap.add_argument("--budget", type=int, default=TOKEN_BUDGET)
+    args = ap.parse_args()
+
+    passages, index = PassageIndex.open(), _index()
+    full, sliced, select_ms = [], [], []
+    for cat, query in load_queries(args.questions):
+        hits = index.search(query, k=3, categories=[cat] if cat else None)
+        if not hits:
+            continue
+        ids = [h["id"] for h in hits]
+        full.append(sum(estimate_tokens(passages.papers.record(i).get("fullText", "")) for i in ids))
+        start = time.perf_counter()
+        chosen = passages.select(ids, query, args.per_paper, args.budget)
+        select_ms.append((time.perf_counter() - start) * 1000)
+        sliced.append(sum(estimate_tokens(p) for ps in chosen.values() for p in ps))
+
+    print(f"{len(full)} queries, {args.per_paper} passages/paper, budget {args.budget} tokens\n")
+    print(f"{'':<16}{'mean':>10}{'p50':>10}{'p95':>10}{'max':>10}")
+    for name, vals in (("full text", full), ("passages", sliced)):
+        print(f"{name:<16}{statistics.mean(vals):>10.0f}{pct(vals, 50):>10}{pct(vals, 95):>10}{max(vals):>10}")
+    print(f"\nPrompt tokens cut by {100 * (1 - sum(sliced) / sum(full)):.1f}% "
+          f"(selection p50 {pct(select_ms, 50):.2f} ms, p95 {pct(select_ms, 95):.2f} ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+bm25_index.py
+=============
+Embedded BM25 retrieval engine – an in‑process drop‑in for kg_client.top_three.
+
+* Inverted index over title + abstract (the same fields as the Neo4j `paperFT`
+  index) with array‑backed postings (doc ids / term frequencies in flat arrays).
+* BM25 scoring, category filter via per‑doc bitmasks, top‑k with a heap.
+* Serialised to one binary file next to climate_outputs, so loading it at
+  startup is a few `array.frombytes` calls; rebuilt when the JSON files change.
+
+Usage:
+    from bm25_index import top_three
+    top_three("greenhouse_gases", "methane emissions from cattle")
+
+Select it in app.py with RETRIEVAL_BACKEND=bm25.
+"""
+import heapq
+import json
+import math
+import re
+import struct
+from array import array
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
+
+CLIMATE_DIR = Path(__file__).resolve().parent.parent / "climate_outputs"
+INDEX_FILE  = CLIMATE_DIR / ".bm25_index.bin"
+MAGIC       = b"BM25IDX1"
+K1, B       = 1.2, 0.75
+STOPWORDS   = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "if", "in", "into",
+    "is", "it", "no", "not", "of", "on", "or", "such", "that", "the", "their", "then",
+    "there", "these", "they", "this", "to", "was", "will", "with", "what", "how", "why",
+}
+
+# --- tokenising -------------------------------------------------------
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN.findall((text or "").lower()) if len(t) > 1 and t not in STOPWORDS]
+
+# --- index ------------------------------------------------------------
+class BM25Index:
+    """Inverted index with flat postings: term → slice of (post_docs, post_tf)."""
+
+    def __init__(self, vocab, doc_meta, categories, doc_len, doc_cats, term_start, post_docs, post_tf,
+                 sources=None):
+        self.vocab      = vocab                  # term → term id
+        self.doc_meta   = doc_meta               # per doc: dict returned to callers
+        self.categories = categories             # category name → bit
+        self.doc_len    = doc_len                # array('I')
+        self.doc_cats   = doc_cats               # array('Q') category bitmask per doc
+        self.term_start = term_start             # array('Q'), len(vocab) + 1 offsets into postings
+        self.post_docs  = post_docs              # array('I')
+        self.post_tf    = post_tf                # array('I')
+        self.sources    = sources or {}
+        self.avg_len    = (sum(doc_len) / len(doc_len)) if doc_len else 0.0
+
+    # -- build ---------------------------------------------------------
+    @classmethod
+    def build(cls, docs: Iterable[tuple[dict, str, Iterable[str]]], sources=None) -> "BM25Index":
+        """docs: (meta, text, categories) triples; meta is returned verbatim with the score."""
+        doc_meta, doc_len, doc_cats, categories = [], array("I"), array("Q"), {}
+        postings: dict[str, list[tuple[int, int]]] = {}
+        for doc_id, (meta, text, cats) in enumerate(docs):
+            toks = tokenize(text)
+            doc_meta.append(meta)
+            doc_len.append(len(toks))
+            mask = 0
+            for c in cats:
+                if c not in categories:
+                    if len(categories) == 64:
+                        raise ValueError("BM25Index supports at most 64 categories")
+                    categories[c] = len(categories)
+                mask |= 1 << categories[c]
+            doc_cats.append(mask)
+            for term, tf in Counter(toks).items():
+                postings.setdefault(term, []).append((doc_id, tf))
+
+        vocab, term_start = {}, array("Q", [0])
+        post_docs, post_tf = array("I"), array("I")
+        for term in sorted(postings):
+            vocab[term] = len(vocab)
+            for doc_id, tf in postings[term]:
+                post_docs.append(doc_id)
+                post_tf.append(tf)
+            term_start.append(len(post_docs))
+        return cls(vocab, doc_meta, categories, doc_len, doc_cats, term_start, post_docs, post_tf, sources)
+
+    # -- search --------------------------------------------------------
+    def search(self, query: str, k: int = 3, categories: Optional[Iterable[str]] = None,
+               docs: Optional[Iterable[int]] = None, weights: Optional[dict[str, float]] = None) -> list[dict]:
+        """
+        Top‑k docs for `query` (optionally restricted to any of `categories` and/or to doc ids `docs`).
+        With `weights` ({category: weight}) the search covers those categories and every score is
+        multiplied by the weight of the doc's best one, which is returned as "category".
+        """
+        allowed = set(docs) if docs is not None else None
+        if weights is not None:
+            categories = weights
+        mask = None
+        if categories is not None:
+            mask = 0
+            for c in categories:
+                if c in self.categories:
+                    mask |= 1 << self.categories[c]
+            if not mask:
+                return []
+
+        n = len(self.doc_len)
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            tid = self.vocab.get(term)
+            if tid is None:
+                continue
+            lo, hi = self.term_start[tid], self.term_start[tid + 1]
+            idf = math.log(1 + (n - (hi - lo) + 0.5) / ((hi - lo) + 0.5))
+            for i in range(lo, hi):
+                d = self.post_docs[i]
+                if mask is not None and not self.doc_cats[d] & mask:
+                    continue
+                if allowed is not None and d not in allowed:
+                    continue
+                tf = self.post_tf[i]
+                norm = K1 * (1 - B + B * self.doc_len[d] / self.avg_len)
+                scores[d] = scores.get(d, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+
+        if weights is not None:
+            bits = sorted(((1 << self.categories[c], w, c) for c, w in weights.items() if c in self.categories),
+                          key=lambda b: b[1], reverse=True)
+            best_cat = {}
+            for d in scores:
+                _, w, c = next(b for b in bits if self.doc_cats[d] & b[0])
+                scores[d] *= w
+                best_cat[d] = (c, scores[d] / w if w else 0.0)
+            best = heapq.nlargest(k, scores.items(), key=lambda kv: kv[1])
+            return [dict(self.doc_meta[d], score=score, category=best_cat[d][0], text_score=best_cat[d][1])
+                    for d, score in best]
+        best = heapq.nlargest(k, scores.items(), key=lambda kv: kv[1])
+        return [dict(self.doc_meta[d], score=score) for d, score in best]
+
+    # -- (de)serialise -------------------------------------------------
+    def save(self, path: Path):
+        header = json.dumps({
+            "vocab": sorted(self.vocab, key=self.vocab.get),
+            "doc_meta": self.doc_meta,
+            "categories": self.categories,
+            "sources": self.sources,
+            "lengths": [len(self.doc_len), len(self.term_start), len(self.post_docs)],
+        }).encode("utf-8")
+        tmp = Path(str(path) + ".tmp")
+        with tmp.open("wb") as f:
+            f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+            for arr in (self.doc_len, self.doc_cats, self.term_start, self.post_docs, self.post_tf):
+                arr.tofile(f)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        with Path(path).open("rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a BM25 index")
+            (hlen,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(hlen))
+            n_docs, n_terms1, n_post = header["lengths"]
+            arrays = []
+            for code, count in (("I", n_docs), ("Q", n_docs), ("Q", n_terms1), ("I", n_post), ("I", n_post)):
+                arr = array(code)
+                arr.fromfile(f, count)
+                arrays.append(arr)
+        vocab = {t: i for i, t in enumerate(header["vocab"])}
+        return cls(vocab, header["doc_meta"], header["categories"], *arrays, sources=header["sources"])
+
+# --- corpus -----------------------------------------------------------
+def _sources(climate_dir: Path) -> dict:
+    return {fp.name: [fp.stat().st_size, fp.stat().st_mtime_ns] for fp in sorted(climate_dir.glob("*.json"))}
+
+def paper_docs(climate_dir: Path = CLIMATE_DIR):
+    """One doc per paper id (title + abstract), with every category it appears in."""
+    papers: dict[str, tuple[dict, str, list[str]]] = {}
+    for fp in sorted(climate_dir.glob("*.json")):
+        with fp.open("r", encoding="utf-8") as f:
+            for item in json.load(f):
+                key = str(item.get("id"))
+                if key not in papers:
+                    meta = {"id": item.get("id"), "doi": item.get("doi"), "title": item.get("title")}
+                    papers[key] = (meta, f"{item.get('title') or ''} {item.get('abstract') or ''}", [])
+                papers[key][2].append(fp.stem)
+    return papers.values()
+
+def open_index(climate_dir: Path = CLIMATE_DIR, path: Path = INDEX_FILE, rebuild: bool = False) -> BM25Index:
+    """Load the serialised index, (re)building it when missing or stale."""
+    if not rebuild:
+        try:
+            idx = BM25Index.load(path)
+            if idx.sources == _sources(climate_dir):
+                return idx
+        except (OSError, ValueError, KeyError):
+            pass
+    idx = BM25Index.build(paper_docs(climate_dir), sources=_sources(climate_dir))
+    idx.save(path)
+    return idx
+
+@lru_cache(maxsize=1)       # one shared index per process
+def _index() -> BM25Index:
+    return open_index()
+
+# --- kg_client compatible API ------------------------------------------
+def top_three(category: str, query: str = "") -> list[dict]:
+    """Same shape as kg_client.top_three: [{id, doi, title, score}] best first."""
+    return _index().search(query, k=3, categories=[category])
+
+def top_k_multi(categories: list[tuple[str, float]], query: str = "", k: int = 3) -> list[dict]:
+    """Same shape as kg_client.top_k_multi: merged top k over weighted categories."""
+    return _index().search(query, k=k, weights=dict(categories))
+
+def top_k_many(pairs: list[tuple[str, str]], k: int = 3) -> list[list[dict]]:
+    """Same shape as kg_client.top_k_many: one hit list per (category, query) pair."""
+    idx = _index()
+    return [idx.search(query, k=k, categories=[category]) for category, query in pairs]
+
+
+if __name__ == "__main__":
+    import sys, time
+    t0 = time.perf_counter()
+    idx = open_index(rebuild=True)
+    t1 = time.perf_counter()
+    BM25Index.load(INDEX_FILE)
+    t2 = time.perf_counter()
+    print(f"✔ {len(idx.doc_len)} docs, {len(idx.vocab)} terms → {INDEX_FILE} "
+          f"(build {1000 * (t1 - t0):.1f} ms, load {1000 * (t2 - t1):.1f} ms)")
+    if len(sys.argv) > 2:
+        print(idx.search(" ".join(sys.argv[2:]), k=3, categories=[sys.argv[1]]))
@@ -18,3 +18,15 @@ CATEGORIES = [
 ]
 
 SPECIAL_TOKENS = [f"<{c.replace(' ', '_')}>" for c in CATEGORIES]
+
+# spellings used by make_sample_queries.py (and so by questions.json)
+ALIASES = {
+    "climate greenhouse gases": "greenhouse gases",
+    "climate mitigations":      "climate mitigation",
+    "climate problem origins":  "origins of climate problems",
+}
+
+def canonical(name: str) -> str:
+    """Map a category name variant (spaces or underscores) to its CATEGORIES spelling."""
+    name = name.replace("_", " ").strip().lower()
+    return ALIASES.get(name, name)
@@ -0,0 +1,143 @@
+"""
+chat_pipeline.py
+================
+Concurrent stage execution for /api/chat.
+
+    classify ──► rewrite ─────────────► retrieve ──► fetch papers (parallel)
+             └─► retrieve (raw query) ─► prefetch papers
+
+* classify / rewrite (CPU‑bound torch) run on a bounded model executor
+  (CHAT_MODEL_WORKERS), so concurrent requests cannot oversubscribe the CPU.
+* While the rewrite runs, retrieval starts speculatively on the raw query
+  and prefetches those papers; the real retrieval on the rewritten query
+  reuses every paper that was already fetched.
+* The three paper fetches run in parallel on the I/O executor.
+* If classify returns ranked [(category, weight)] (rank_categories), retrieve
+  gets them all (kg_client.top_k_multi) and each paper is fetched from the
+  category it was found in.
+* Every stage is recorded as a span and logged per request, so the critical
+  path is visible in the server log.
+
+Usage:
+    pipe = ChatPipeline(predict_category, rewrite_query, top_three, get_paper_text_and_title)
+    result = pipe.run("How much methane do cattle emit?")
+    for event, payload in pipe.steps(query): ...    # as each stage finishes (streaming)
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterator, Optional
+
+MODEL_WORKERS = int(os.getenv("CHAT_MODEL_WORKERS", "2"))
+IO_WORKERS    = int(os.getenv("CHAT_IO_WORKERS", "16"))
+SPECULATE     = os.getenv("CHAT_SPECULATIVE_RETRIEVAL", "1") != "0"
+
+log = logging.getLogger("chat")
+
+# --- spans ------------------------------------------------------------
+class Trace:
+    """Start/end of every stage of one request, relative to its start."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans: list[tuple[str, float, float, str]] = []
+        self._lock = threading.Lock()
+
+    def call(self, name: str, fn: Callable, *args):
+        begin = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.spans.append((name, (begin - self.start) * 1000, (end - self.start) * 1000,
+                                   threading.current_thread().name))
+
+    def as_dicts(self) -> list[dict]:
+        return [{"stage": n, "start_ms": round(s, 1), "end_ms": round(e, 1), "thread": t}
+                for n, s, e, t in sorted(self.spans, key=lambda span: span[1])]
+
+    def log(self, label: str):
+        total = (time.perf_counter() - self.start) * 1000
+        lines = [f"  {n:<22}{s:>9.1f} → {e:>9.1f} ms  ({e - s:>8.1f} ms, {t})"
+                 for n, s, e, t in sorted(self.spans, key=lambda span: span[1])]
+        log.info("chat %r: %.1f ms\n%s", label[:60], total, "\n".join(lines))
+
+# --- pipeline ---------------------------------------------------------
+class ChatPipeline:
+    """Runs the pre‑LLM stages of a chat request on shared, bounded executors."""
+
+    def __init__(self, classify: Callable[[str], str], rewrite: Callable[[str, str], str],
+                 retrieve: Callable[[str, str], list], fetch: Callable[[str, object], tuple],
+                 cache=None, speculate: bool = SPECULATE, model_workers: int = MODEL_WORKERS):
+        from query_cache import normalize
+        self.classify, self.rewrite, self.retrieve, self.fetch = classify, rewrite, retrieve, fetch
+        self.cache, self.normalize, self.speculate = cache, normalize, speculate
+        self.models = ThreadPoolExecutor(max_workers=model_workers, thread_name_prefix="model")
+        self.io = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io")
+
+    def _submit(self, pool: ThreadPoolExecutor, trace: Trace, name: str, fn: Callable, *args) -> Future:
+        return pool.submit(trace.call, name, fn, *args)
+
+    def _prefetch(self, trace: Trace, category: str, hits: list, fetched: dict, lock: threading.Lock):
+        with lock:                  # also called from the speculative retrieval's callback thread
+            for hit in hits[:3]:
+                key = str(hit["id"])
+                if key not in fetched:      # multi‑category hits name the category they came from
+                    fetched[key] = self._submit(self.io, trace, f"fetch {key}", self.fetch,
+                                                hit.get("category", category), hit["id"])
+
+    def steps(self, user_msg: str, trace: Optional[Trace] = None) -> Iterator[tuple[str, dict]]:
+        """
+        Classify, rewrite, retrieve and fetch the top three papers, yielding as each part is ready:
+        ("category", {"category", "rewritten", "categories"}), ("sources", {"retrieved"}), then
+        ("papers", {"category", "rewritten", "categories", "retrieved", "papers": [(fullText, title)] * 3,
+        "trace"}). "categories" is [[category, weight]] when classify ranks several, else None.
+        Raises FileNotFoundError / ValueError from `fetch`, like get_paper_text_and_title.
+        """
+        trace = trace or Trace()
+        fetched: dict[str, Future] = {}
+        lock = threading.Lock()
+        key = self.normalize(user_msg)
+        hit = self.cache.get(key) if self.cache is not None else None
+
+        if hit is not None:
+            cat_print, rewritten, *ranked = hit
+            target = ranked[0] if ranked else cat_print
+        else:
+            # classify returns a category, or [(category, weight)] best first (rank_categories)
+            category = self._submit(self.models, trace, "classify", self.classify, user_msg).result()
+            ranked = category if isinstance(category, list) else None
+            category = ranked[0][0] if ranked else category
+            cat_print = category.replace(" ", "_")
+            target = [[c.replace(" ", "_"), w] for c, w in ranked] if ranked else cat_print
+            rewrite = self._submit(self.models, trace, "rewrite", self.rewrite, user_msg, category)
+            if self.speculate:
+                spec = self._submit(self.io, trace, "retrieve (raw query)", self.retrieve, target, user_msg)
+                spec.add_done_callback(lambda f: f.exception() is None and
+                                       self._prefetch(trace, cat_print, f.result(), fetched, lock))
+            rewritten = rewrite.result()
+            if self.cache is not None:
+                self.cache.put(key, [cat_print, rewritten] + ([target] if ranked else []))
+        categories = target if isinstance(target, list) else None
+        yield "category", {"category": cat_print, "rewritten": rewritten, "categories": categories}
+
+        retrieved = self._submit(self.io, trace, "retrieve", self.retrieve, target, rewritten).result()
+        yield "sources", {"retrieved": retrieved}
+
+        self._prefetch(trace, cat_print, retrieved, fetched, lock)
+        with lock:
+            pending = [fetched[str(r["id"])] for r in retrieved[:3]]
+        papers = [f.result() for f in pending]
+
+        trace.log(user_msg)
+        yield "papers", {"category": cat_print, "rewritten": rewritten, "categories": categories,
+                         "retrieved": retrieved, "papers": papers, "trace": trace.as_dicts()}
+
+    def run(self, user_msg: str, trace: Optional[Trace] = None) -> dict:
+        """All of steps() at once: the final "papers" payload."""
+        for _, payload in self.steps(user_msg, trace):
+            pass
+        return payload
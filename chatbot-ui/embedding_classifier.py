@@ -0,0 +1,90 @@
+"""
+embedding_classifier.py
+=======================
+Category classifier by embedding similarity – one small encoder pass and a
+13‑way dot product instead of 13 BART‑large NLI passes.
+
+* One prototype per category: the embedding of "This query is about <label>.",
+  blended with the centroid of that category's sample queries when
+  questions.json (make_sample_queries.py) is available.
+* Prototypes are computed once and cached in chatbot-ui/.models/, keyed by a
+  hash of model, labels and samples.
+* classify() returns the best category and its margin over the runner‑up;
+  zero_shot_classifier only falls back to NLI when the margin is low.
+
+Usage (or CLASSIFIER_MODE=embedding for predict_category):
+    from embedding_classifier import classify
+    classify("heat waves and crop yields")   # ("climate impacts", 0.071)
+"""
+import hashlib
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from categories import CATEGORIES, canonical
+
+EMBED_MODEL    = os.getenv("CLASSIFIER_EMBED_MODEL", "climatebert/distilroberta-base-climate-f")
+MODELS_DIR     = Path(__file__).resolve().parent / ".models"
+QUESTIONS_FILE = Path(__file__).resolve().parent.parent / "questions.json"
+LABEL_TEMPLATE = "This query is about {}."      # same hypothesis as _nli_guess
+LABEL_WEIGHT   = 0.5        # share of the label text in a prototype when samples exist
+MARGIN         = float(os.getenv("EMBED_MARGIN", "0.03"))    # below this, ask NLI
+
+# --- encoder ----------------------------------------------------------
+@lru_cache(maxsize=1)
+def _encoder():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBED_MODEL)
+
+def embed(texts: list[str]) -> np.ndarray:
+    return _encoder().encode(texts, normalize_embeddings=True, batch_size=64).astype(np.float32)
+
+# --- prototypes -------------------------------------------------------
+def load_samples(path: Path = QUESTIONS_FILE) -> dict[str, list[str]]:
+    """questions.json keyed by CATEGORIES spelling ({} if the file is missing)."""
+    if not path.exists():
+        return {}
+    samples: dict[str, list[str]] = {}
+    for cat, qs in json.loads(path.read_text(encoding="utf-8")).items():
+        samples.setdefault(canonical(cat), []).extend(qs)
+    return {c: qs for c, qs in samples.items() if c in CATEGORIES}
+
+def build_prototypes(samples: Optional[dict[str, list[str]]] = None) -> np.ndarray:
+    """(13 × dim) unit vectors, row order = CATEGORIES."""
+    labels = embed([LABEL_TEMPLATE.format(c) for c in CATEGORIES])
+    protos = labels.copy()
+    for i, cat in enumerate(CATEGORIES):
+        if samples and samples.get(cat):
+            centroid = embed(samples[cat]).mean(axis=0)
+            protos[i] = LABEL_WEIGHT * labels[i] + (1 - LABEL_WEIGHT) * centroid / (np.linalg.norm(centroid) or 1.0)
+    return protos / np.linalg.norm(protos, axis=1, keepdims=True)
+
+def _cache_key(samples: dict) -> str:
+    blob = json.dumps([EMBED_MODEL, LABEL_TEMPLATE, LABEL_WEIGHT, CATEGORIES, samples], sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+@lru_cache(maxsize=1)       # loaded (or built) once per process
+def _prototypes() -> np.ndarray:
+    samples = load_samples()
+    path = MODELS_DIR / f"prototypes-{_cache_key(samples)}.npy"
+    if path.exists():
+        return np.load(path)
+    protos = build_prototypes(samples)
+    MODELS_DIR.mkdir(exist_ok=True)
+    np.save(path, protos)
+    return protos
+
+# --- classify ---------------------------------------------------------
+def similarities(query: str, prototypes: Optional[np.ndarray] = None) -> np.ndarray:
+    protos = _prototypes() if prototypes is None else prototypes
+    return protos @ embed([query])[0]
+
+def classify(query: str, prototypes: Optional[np.ndarray] = None) -> tuple[str, float]:
+    """(best category, cosine margin over the second best)."""
+    sims = similarities(query, prototypes)
+    first, second = np.argsort(-sims)[:2]
+    return CATEGORIES[first], float(sims[first] - sims[second])
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""Compare the n‑gram classifier with zero‑shot NLI (_nli_guess) on its held‑out questions.
+
+Usage:
+    python eval_classifier.py [--model .models/ngram_classifier.json] [--skip-nli]
+The split (questions file, holdout, seed) is read from the model file.
+"""
+import argparse
+import hashlib
+import time
+from pathlib import Path
+
+from ngram_classifier import MODEL_FILE, NgramClassifier, load_samples, split
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+def evaluate(name, fn, test):
+    fn(test[0][1])                      # warm‑up
+    guesses, times = [], []
+    for _, q in test:
+        start = time.perf_counter()
+        guesses.append(fn(q))
+        times.append((time.perf_counter() - start) * 1000)
+    acc = sum(g == cat for g, (cat, _) in zip(guesses, test)) / len(test)
+    print(f"{name:<10}{acc:>10.1%}{pct(times, 50):>10.3f}{pct(times, 99):>10.3f}")
+    return guesses
+
+def main():
+    ap = argparse.ArgumentParser(description="n‑gram classifier vs. NLI")
+    ap.add_argument("--model", type=Path, default=MODEL_FILE)
+    ap.add_argument("--skip-nli", action="store_true", help="only score the n‑gram model")
+    args = ap.parse_args()
+
+    model = NgramClassifier.load(args.model)
+    meta = model.meta
+    questions = Path(meta["questions"])
+    if hashlib.sha256(questions.read_bytes()).hexdigest() != meta["questions_sha256"]:
+        print(f"⚠ {questions} changed since model {model.version} was trained – held‑out set may overlap training")
+    _, test = split(load_samples(questions), meta["holdout"], meta["seed"])
+    if not test:
+        raise SystemExit("model was trained without a held‑out split (--holdout 0)")
+
+    print(f"Model {model.version}: {len(test)} held‑out questions\n")
+    print(f"{'model':<10}{'accuracy':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    ngram = evaluate("ngram", lambda q: model.predict(q)[0], test)
+    if not args.skip_nli:
+        from zero_shot_classifier import _nli_guess
+        nli = evaluate("nli", _nli_guess, test)
+        print(f"\nAgreement {sum(a == b for a, b in zip(ngram, nli)) / len(test):.1%}")
+
+if __name__ == "__main__":
+    main()
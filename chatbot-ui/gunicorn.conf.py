@@ -0,0 +1,53 @@
+"""
+gunicorn.conf.py
+================
+Pre‑fork serving of app.py: the master imports the app and loads every model
+once (WARMUP=load), then forks the workers, which share those pages
+copy‑on‑write instead of each loading its own NLI and paraphrase models.
+
+* gc.freeze() before the fork moves everything the master loaded out of the
+  collector's reach, so collections in a worker do not write to (and copy)
+  the shared pages.
+* Each worker then runs the "full" warm‑up (one inference per pipeline, its
+  own Neo4j driver) before it accepts a request, and logs its memory.
+* Torch intra‑op threads are split between workers (TORCH_THREADS, default
+  cores / workers) so they do not oversubscribe the CPU.
+* Preloading needs a CPU backend: a CUDA context does not survive fork, so
+  set GUNICORN_PRELOAD=0 on a GPU box (each worker then loads its own copy).
+
+Usage:
+    gunicorn -c gunicorn.conf.py app:app
+    python memory_report.py                 # RSS / PSS of the master and each worker
+"""
+import gc
+import os
+
+bind         = os.getenv("BIND", "0.0.0.0:5050")
+workers      = int(os.getenv("WEB_WORKERS", "4"))
+worker_class = "gthread"                     # threads keep /api/chat/stream from pinning a worker
+threads      = int(os.getenv("WEB_THREADS", "8"))
+timeout      = 600                           # o1 answers can take minutes
+preload_app  = os.getenv("GUNICORN_PRELOAD", "1") != "0"
+pidfile      = os.getenv("GUNICORN_PIDFILE", "/tmp/eco-chatbot-gunicorn.pid")
+
+# app.py runs this stage at import: in the master when preloading, otherwise in each worker
+os.environ.setdefault("WARMUP", "load" if preload_app else "full")
+
+def when_ready(server):
+    gc.collect()
+    gc.freeze()
+    server.log.info("models loaded in the master, gc frozen; forking %d workers", workers)
+
+def post_fork(server, worker):
+    try:
+        import torch
+        torch.set_num_threads(int(os.getenv("TORCH_THREADS", max(1, (os.cpu_count() or 1) // workers))))
+    except ImportError:
+        pass
+
+def post_worker_init(worker):
+    import app as chat
+    from warmup import memory, warm_up
+    if preload_app and not chat.INFERENCE_URL:      # with a model server there is nothing to warm here
+        warm_up("full", neo4j=chat.NEO4J_USED)
+    worker.log.info("worker %d ready: %s", os.getpid(), memory())
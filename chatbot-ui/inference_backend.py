@@ -0,0 +1,76 @@
+"""
+inference_backend.py
+====================
+Selectable runtime for the BART pipelines (NLI and paraphrase).
+
+INFERENCE_BACKEND:
+* torch – full‑precision PyTorch, device_map="auto" (the original behaviour)
+* int8  – PyTorch dynamic int8 quantisation of every nn.Linear, CPU
+* onnx  – ONNX export run by onnxruntime through optimum, CPU
+
+Converted models are cached in chatbot-ui/.models/<backend>/<model>/ and
+reused on the next start, so the export/quantisation cost is paid once.
+
+Usage:
+    from inference_backend import load_pipeline
+    nli = load_pipeline("zero-shot-classification", "facebook/bart-large-mnli")
+"""
+import os
+from pathlib import Path
+
+BACKEND    = os.getenv("INFERENCE_BACKEND", "torch").lower()
+MODELS_DIR = Path(__file__).resolve().parent / ".models"
+BACKENDS   = ("torch", "int8", "onnx")
+
+# task → (transformers auto class, optimum ORT class)
+_CLASSES = {
+    "zero-shot-classification": ("AutoModelForSequenceClassification", "ORTModelForSequenceClassification"),
+    "text2text-generation":     ("AutoModelForSeq2SeqLM", "ORTModelForSeq2SeqLM"),
+}
+
+def _cache_dir(backend: str, model_name: str) -> Path:
+    return MODELS_DIR / backend / model_name.replace("/", "__")
+
+# --- backends ---------------------------------------------------------
+def _int8_model(task: str, model_name: str):
+    import torch
+    import transformers
+    auto = getattr(transformers, _CLASSES[task][0])
+    cache = _cache_dir("int8", model_name)
+    weights = cache / "quantized.pt"
+    if weights.exists():
+        # rebuild the quantised module structure from the config, then load the int8 weights
+        config = transformers.AutoConfig.from_pretrained(cache)
+        model = torch.quantization.quantize_dynamic(auto.from_config(config), {torch.nn.Linear}, dtype=torch.qint8)
+        model.load_state_dict(torch.load(weights, map_location="cpu"))
+    else:
+        model = torch.quantization.quantize_dynamic(auto.from_pretrained(model_name), {torch.nn.Linear},
+                                                    dtype=torch.qint8)
+        cache.mkdir(parents=True, exist_ok=True)
+        model.config.save_pretrained(cache)
+        torch.save(model.state_dict(), weights)
+    return model.eval()
+
+def _onnx_model(task: str, model_name: str):
+    import optimum.onnxruntime
+    ort = getattr(optimum.onnxruntime, _CLASSES[task][1])
+    cache = _cache_dir("onnx", model_name)
+    if (cache / "config.json").exists():
+        return ort.from_pretrained(cache)
+    model = ort.from_pretrained(model_name, export=True)
+    model.save_pretrained(cache)
+    return model
+
+def load_pipeline(task: str, model_name: str, backend: str = BACKEND, **kwargs):
+    """A transformers pipeline for `task` running `model_name` on `backend`."""
+    if backend not in BACKENDS:
+        raise ValueError(f"INFERENCE_BACKEND must be one of {BACKENDS}, got {backend!r}")
+    from transformers import AutoTokenizer, pipeline
+
+    if backend == "torch":
+        return pipeline(task, model=model_name, tokenizer=model_name, device_map="auto", **kwargs)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if backend == "int8":
+        return pipeline(task, model=_int8_model(task, model_name), tokenizer=tokenizer, device=-1, **kwargs)
+    from optimum.pipelines import pipeline as ort_pipeline
+    return ort_pipeline(task, model=_onnx_model(task, model_name), tokenizer=tokenizer, accelerator="ort", **kwargs)
@@ -0,0 +1,71 @@
+"""
+inference_client.py
+===================
+Thin client of inference_server.py with the same functions as the
+in‑process models, so callers switch by import:
+
+    predict_category(query)            predict_categories(queries)
+    rewrite_query(query, category)     rewrite_queries(queries, categories)
+    rank_categories(query, k)
+
+One keep‑alive connection per thread. A 400 from the server (unknown
+category) is raised as ValueError, like rewrite_query does locally.
+
+Usage:
+    INFERENCE_URL=http://127.0.0.1:5060 python rewrite_pipeline.py "methane from cattle"
+"""
+import http.client
+import json
+import os
+import threading
+from urllib.parse import urlsplit
+
+INFERENCE_URL = os.getenv("INFERENCE_URL", "")      # e.g. http://127.0.0.1:5060; "" = models in‑process
+TIMEOUT       = float(os.getenv("INFERENCE_TIMEOUT", "120"))
+
+_local = threading.local()
+
+def _connection() -> http.client.HTTPConnection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        url = urlsplit(INFERENCE_URL)
+        conn = _local.conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=TIMEOUT)
+    return conn
+
+def _post(path: str, body: dict) -> dict:
+    blob = json.dumps(body)
+    for attempt in (0, 1):              # the server may have closed an idle keep‑alive connection
+        conn = _connection()
+        try:
+            conn.request("POST", path, blob, {"Content-Type": "application/json"})
+            res = conn.getresponse()
+            data = json.loads(res.read())
+            break
+        except (http.client.HTTPException, ConnectionError):
+            conn.close()
+            _local.conn = None
+            if attempt:
+                raise
+    if res.status == 400:
+        raise ValueError(data["error"])
+    if res.status != 200:
+        raise RuntimeError(f"inference server {path}: {res.status} {data.get('error')}")
+    return data
+
+def predict_categories(queries: list[str]) -> list[str]:
+    return _post("/classify", {"queries": queries})["categories"]
+
+def rewrite_queries(queries: list[str], categories: list[str], budget_ms: float | None = None) -> list[str]:
+    body = {"queries": queries, "categories": categories}
+    if budget_ms is not None:
+        body["budget_ms"] = budget_ms
+    return _post("/rewrite", body)["rewritten"]
+
+def predict_category(query: str) -> str:
+    return predict_categories([query])[0]
+
+def rank_categories(query: str, k: int = 3) -> list[tuple[str, float]]:
+    return [tuple(pair) for pair in _post("/rank", {"queries": [query], "k": k})["ranked"][0]]
+
+def rewrite_query(query: str, category: str) -> str:
+    return rewrite_queries([query], [category])[0]
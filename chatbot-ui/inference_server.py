@@ -0,0 +1,198 @@
+"""
+inference_server.py
+===================
+Local model server: owns the NLI and paraphrase models and runs them on
+micro‑batches of concurrent requests instead of one forward pass each.
+
+* POST /classify {"queries": [...]}                  → {"categories": [...]}
+* POST /rewrite  {"queries": [...], "categories": [...], "budget_ms"?} → {"rewritten": [...]}
+* POST /rank     {"queries": [...], "k": 3}             → {"ranked": [[[category, weight], ...], ...]}
+* GET  /healthz                                       → warm‑up state + batch stats
+* Every query is queued on its model's MicroBatcher; a batch closes at
+  INFERENCE_MAX_BATCH items or INFERENCE_MAX_WAIT_MS after its first item,
+  whichever comes first, and runs as one predict_categories() /
+  rewrite_queries() call. Every rewrite keeps its own paraphrase budget
+  (budget_ms, default PARAPHRASE_BUDGET_MS), counted from its request's
+  arrival, so a batch never makes one user wait longer than one budget.
+* Binds to 127.0.0.1 only. app.py and rewrite_pipeline.py use it when
+  INFERENCE_URL is set (inference_client.py).
+
+Usage:
+    python inference_server.py [--port 5060]
+    INFERENCE_URL=http://127.0.0.1:5060 python app.py
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+from categories import CATEGORIES
+
+MAX_BATCH   = int(os.getenv("INFERENCE_MAX_BATCH", "16"))
+MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "10"))
+PORT        = int(os.getenv("INFERENCE_PORT", "5060"))
+RESULT_TIMEOUT = float(os.getenv("INFERENCE_RESULT_TIMEOUT", "60"))   # seconds a request waits for its batch
+
+log = logging.getLogger("inference")
+
+# --- batching ---------------------------------------------------------
+class MicroBatcher:
+    """Queues single items and runs `fn(list of items) -> list of results` on batches of them."""
+
+    def __init__(self, name: str, fn: Callable[[list], list], max_batch: int = MAX_BATCH,
+                 max_wait_ms: float = MAX_WAIT_MS):
+        self.name, self.fn, self.max_batch, self.max_wait = name, fn, max_batch, max_wait_ms / 1000
+        self._queue: queue.Queue = queue.Queue()
+        self.sizes = Counter()          # batch size → number of batches
+        self.busy_ms = 0.0
+        threading.Thread(target=self._loop, name=f"batch-{name}", daemon=True).start()
+
+    def submit(self, item) -> Future:
+        fut: Future = Future()
+        self._queue.put((item, fut))
+        return fut
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]                 # block for the first item
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            left = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=left) if left > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            start = time.perf_counter()
+            try:
+                results = list(self.fn([item for item, _ in batch]))
+                if len(results) != len(batch):
+                    raise RuntimeError(f"{self.name}: {len(results)} results for a batch of {len(batch)}")
+            except Exception as e:      # fail every request of this batch, keep serving
+                log.exception("%s batch of %d failed", self.name, len(batch))
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            finally:
+                self.busy_ms += (time.perf_counter() - start) * 1000
+                self.sizes[len(batch)] += 1
+            for (_, fut), result in zip(batch, results):
+                fut.set_result(result)
+
+    def stats(self) -> dict:
+        batches = sum(self.sizes.values())
+        items = sum(size * n for size, n in self.sizes.items())
+        return {"batches": batches, "items": items, "mean_batch": items / batches if batches else 0.0,
+                "busy_ms": round(self.busy_ms, 1), "sizes": dict(sorted(self.sizes.items())),
+                "max_batch": self.max_batch, "max_wait_ms": self.max_wait * 1000}
+
+# --- HTTP -------------------------------------------------------------
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"       # keep‑alive: inference_client reuses its connection
+    disable_nagle_algorithm = True      # headers and body are separate writes; no 40 ms delayed‑ACK stall
+    batchers: dict[str, MicroBatcher] = {}
+
+    def _reply(self, status: int, body: dict):
+        blob = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(blob)))
+        self.end_headers()
+        self.wfile.write(blob)
+
+    def do_GET(self):
+        if self.path != "/healthz":
+            return self._reply(404, {"error": f"no route {self.path}"})
+        from warmup import STATE, memory
+        self._reply(200 if STATE["ready"] else 503, dict(STATE, memory=memory(),
+                    batches={name: b.stats() for name, b in self.batchers.items()}))
+
+    def do_POST(self):
+        received = time.perf_counter()          # the paraphrase budget counts from here
+        try:
+            data = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            queries = data["queries"]
+            if self.path == "/classify":
+                futures = [self.batchers["classify"].submit(q) for q in queries]
+                key = "categories"
+            elif self.path == "/rank":
+                k = int(data.get("k", 3))
+                futures = [self.batchers["rank"].submit((q, k)) for q in queries]
+                key = "ranked"
+            elif self.path == "/rewrite":
+                cats = data["categories"]
+                bad = [c for c in cats if c not in CATEGORIES]
+                if bad or len(cats) != len(queries):
+                    raise ValueError(f"unknown categories {bad}" if bad else "queries/categories length mismatch")
+                budget = data.get("budget_ms")
+                budget = None if budget is None else float(budget)
+                futures = [self.batchers["rewrite"].submit((q, c, received, budget)) for q, c in zip(queries, cats)]
+                key = "rewritten"
+            else:
+                return self._reply(404, {"error": f"no route {self.path}"})
+        except (ValueError, KeyError, TypeError) as e:
+            return self._reply(400, {"error": str(e)})
+        deadline = time.perf_counter() + RESULT_TIMEOUT
+        try:
+            results = [f.result(timeout=max(deadline - time.perf_counter(), 0)) for f in futures]
+        except FutureTimeout:
+            return self._reply(503, {"error": f"no result within {RESULT_TIMEOUT:g} s"})
+        except Exception as e:
+            return self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+        self._reply(200, {key: results})
+
+    def log_message(self, fmt, *args):         # one line per request is too much under load
+        log.debug(fmt, *args)
+
+def make_server(port: int = PORT, max_batch: int = MAX_BATCH, max_wait_ms: float = MAX_WAIT_MS) -> ThreadingHTTPServer:
+    from transformer_rewriter import PARAPHRASE_BUDGET_MS, rewrite_queries
+    from zero_shot_classifier import predict_categories, rank_categories_many
+
+    def rank(items: list[tuple[str, int]]) -> list:
+        ranked = rank_categories_many([q for q, _ in items], max(k for _, k in items))
+        return [r[:k] for r, (_, k) in zip(ranked, items)]
+
+    def rewrite(items: list[tuple[str, str, float, float | None]]) -> list:
+        # each query keeps its own budget from when its request arrived, however long it queued
+        deadlines = [received + ((PARAPHRASE_BUDGET_MS if budget is None else budget) / 1000 or float("inf"))
+                     for _, _, received, budget in items]
+        return rewrite_queries([q for q, *_ in items], [c for _, c, *_ in items], deadlines=deadlines)
+
+    batchers = {
+        "classify": MicroBatcher("classify", predict_categories, max_batch, max_wait_ms),
+        "rank":     MicroBatcher("rank", rank, max_batch, max_wait_ms),
+        "rewrite":  MicroBatcher("rewrite", rewrite, max_batch, max_wait_ms),
+    }
+    server = ThreadingHTTPServer(("127.0.0.1", port), type("BoundHandler", (Handler,), {"batchers": batchers}))
+    server.daemon_threads = True
+    server.batchers = batchers
+    return server
+
+def main():
+    ap = argparse.ArgumentParser(description="Micro-batching NLI / paraphrase server")
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    ap.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    ap.add_argument("--no-warmup", action="store_true")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    if not args.no_warmup:
+        from warmup import warm_up
+        warm_up("full")
+    server = make_server(args.port, args.max_batch, args.max_wait_ms)
+    print(f"✔ inference server on 127.0.0.1:{args.port} (batch ≤ {args.max_batch}, wait ≤ {args.max_wait_ms} ms)")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
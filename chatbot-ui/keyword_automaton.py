@@ -0,0 +1,97 @@
+"""
+keyword_automaton.py
+====================
+Aho–Corasick multi‑pattern matcher for the keyword vote in zero_shot_classifier.
+
+Built once from keyword_map.KEYWORDS ({category: [terms]}), it finds every
+keyword in a single left‑to‑right pass over the query, keeps only matches that
+start and end on word boundaries, and turns them into weighted per‑category
+votes:
+
+* a match counts as many words as the term has (phrases beat single words)
+* a term listed under several categories splits its weight between them
+
+The top category wins; no match or a tie at the top returns None so the caller
+can fall back to the NLI model.
+
+Usage:
+    from keyword_automaton import KeywordAutomaton
+    ac = KeywordAutomaton(KEYWORDS)
+    ac.votes("methane from rice paddies")   # {"greenhouse gases": 1.0, ...}
+    ac.best("methane from rice paddies")    # "greenhouse gases"
+"""
+from collections import deque
+from typing import Iterable, Optional
+
+class KeywordAutomaton:
+    """Compiled trie + failure links; outputs are pattern ids."""
+
+    def __init__(self, keywords: dict[str, Iterable[str]]):
+        cats_of: dict[str, list[str]] = {}
+        for cat, terms in keywords.items():
+            for term in terms:
+                term = " ".join(term.lower().split())
+                if term and cat not in cats_of.setdefault(term, []):
+                    cats_of[term].append(cat)
+
+        self.goto: list[dict[str, int]] = [{}]
+        self.out: list[list[int]] = [[]]
+        self.patterns: list[tuple[int, tuple[tuple[str, float], ...]]] = []   # (length, ((cat, weight), ...))
+        for term, cats in cats_of.items():
+            node = 0
+            for ch in term:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.out.append([])
+                node = nxt
+            weight = len(term.split()) / len(cats)
+            self.out[node].append(len(self.patterns))
+            self.patterns.append((len(term), tuple((c, weight) for c in cats)))
+
+        # BFS: failure link = longest proper suffix that is also a trie path
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(ch, 0)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+                queue.append(child)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def matches(self, text: str) -> Iterable[tuple[int, int, int]]:
+        """(start, end, pattern id) of every whole‑word keyword occurrence in `text`."""
+        text = text.lower()
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pid in out[node]:
+                start, end = i + 1 - self.patterns[pid][0], i + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                    yield start, end, pid
+
+    def votes(self, text: str) -> dict[str, float]:
+        """Weighted vote per category."""
+        tally: dict[str, float] = {}
+        for _, _, pid in self.matches(text):
+            for cat, weight in self.patterns[pid][1]:
+                tally[cat] = tally.get(cat, 0.0) + weight
+        return tally
+
+    def best(self, text: str) -> Optional[str]:
+        """Highest‑voted category, or None if nothing matched or the top is tied."""
+        ranked = sorted(self.votes(text).items(), key=lambda kv: kv[1], reverse=True)
+        if not ranked or (len(ranked) > 1 and ranked[0][1] == ranked[1][1]):
+            return None
+        return ranked[0][0]
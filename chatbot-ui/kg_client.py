@@ -1,11 +1,20 @@
+from concurrent.futures import ThreadPoolExecutor, wait
 from functools import lru_cache
-from neo4j import GraphDatabase
 import os
+import re
+import time
 
 BOLT = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 USER   = os.getenv("NEO4J_USER", "neo4j")
 PWD    = os.getenv("NEO4J_PWD",  "Str0ngPass!")
 
+# hybrid retrieval
+HYBRID_LEXICAL   = os.getenv("HYBRID_LEXICAL", "neo4j")              # "neo4j" or "bm25"
+HYBRID_BUDGET_MS = float(os.getenv("HYBRID_BUDGET_MS", "1500"))      # wait this long for both legs
+RRF_K            = 60                                                # reciprocal‑rank fusion constant
+LEG_DEPTH        = 20                                                # candidates fetched per leg
+LEG_WORKERS      = int(os.getenv("HYBRID_LEG_WORKERS", "8"))         # threads per leg
+
 TOP3 = """
 CALL db.index.fulltext.queryNodes('paperFT', $q) YIELD node, score
 MATCH (node)<-[:HAS_PAPER]-(:Category {name:$cat})
@@ -16,11 +25,174 @@ RETURN node.id    AS id,
 ORDER BY score DESC
 LIMIT 3;
 """
+TOPK = TOP3.replace("LIMIT 3;", "LIMIT $k;")
+
+# many (category, query) pairs in one round trip; rows without hits are absent
+TOPK_MANY = """
+UNWIND $rows AS row
+CALL {
+  WITH row
+  CALL db.index.fulltext.queryNodes('paperFT', row.q) YIELD node, score
+  MATCH (node)<-[:HAS_PAPER]-(:Category {name: row.cat})
+  RETURN node, score
+  ORDER BY score DESC
+  LIMIT $k
+}
+RETURN row.i AS i,
+       collect({id: node.id, doi: node.doi, title: node.title, score: score}) AS hits;
+"""
+BATCH_ROWS = 200                 # pairs per UNWIND query
+LUCENE_SPECIAL = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+
+# one full‑text lookup scored across several categories: score × weight of the paper's best category
+TOPK_MULTI = """
+CALL db.index.fulltext.queryNodes('paperFT', $q) YIELD node, score
+MATCH (node)<-[:HAS_PAPER]-(c:Category)
+WHERE c.name IN keys($weights)
+WITH node, score, c.name AS cat, $weights[c.name] AS w
+ORDER BY w DESC
+WITH node, score, collect(cat)[0] AS category, max(w) AS w
+RETURN node.id    AS id,
+       node.doi   AS doi,
+       node.title AS title,
+       category,
+       score * w  AS score,
+       score      AS text_score
+ORDER BY score DESC
+LIMIT $k;
+"""
 
 @lru_cache                  # ensure a single shared driver per process
 def _driver():
+    from neo4j import GraphDatabase     # imported here so the merge helpers work without the driver
     return GraphDatabase.driver(BOLT, auth=(USER, PWD))
 
 def top_three(category: str, query: str = "") -> list[dict]:
     with _driver().session() as s:
-        return [r.data() for r in s.run(TOP3, cat=category, q=query)]
\ No newline at end of file
+        return [r.data() for r in s.run(TOP3, cat=category, q=query)]
+
+def top_k(category: str, query: str = "", k: int = 3) -> list[dict]:
+    with _driver().session() as s:
+        return [r.data() for r in s.run(TOPK, cat=category, q=query, k=k)]
+
+def escape_lucene(query: str) -> str:
+    """Query text as plain terms: Lucene operators and AND/OR/NOT escaped."""
+    query = LUCENE_SPECIAL.sub(r"\\\1", query)
+    return re.sub(r"\b(AND|OR|NOT)\b", lambda m: m.group().lower(), query)
+
+def top_k_many(pairs: list[tuple[str, str]], k: int = 3) -> list[list[dict]]:
+    """
+    top_k for every (category, query) pair, one UNWIND query per BATCH_ROWS pairs.
+    A chunk the full‑text parser rejects is retried row by row with escaped queries,
+    so one bad query costs only its own hits.
+    """
+    from neo4j.exceptions import ClientError
+    results: list[list[dict]] = [[] for _ in pairs]
+    with _driver().session() as s:
+        for lo in range(0, len(pairs), BATCH_ROWS):
+            rows = [{"i": i, "cat": cat, "q": q}
+                    for i, (cat, q) in enumerate(pairs[lo:lo + BATCH_ROWS], start=lo) if q.strip()]
+            try:
+                hits = {r["i"]: r["hits"] for r in s.run(TOPK_MANY, rows=rows, k=k)}
+            except ClientError:
+                hits = {}
+                for row in rows:
+                    try:
+                        for r in s.run(TOPK_MANY, rows=[dict(row, q=escape_lucene(row["q"]))], k=k):
+                            hits[r["i"]] = r["hits"]
+                    except ClientError:
+                        pass            # nothing left to escape; no hits for this row
+            for i, row_hits in hits.items():
+                results[i] = row_hits
+    return results
+
+def top_k_multi(categories: list[tuple[str, float]], query: str = "", k: int = 3) -> list[dict]:
+    """
+    Top k papers over every (category, weight) pair in one round trip, each
+    hit tagged with the category it was scored in and its unweighted text_score.
+    """
+    with _driver().session() as s:
+        return [r.data() for r in s.run(TOPK_MULTI, weights=dict(categories), q=query, k=k)]
+
+def merge_weighted(hits_by_category: dict[str, list[dict]], weights: dict[str, float], k: int) -> list[dict]:
+    """Per‑category hit lists → one top k by score × category weight, each paper once."""
+    best: dict[str, dict] = {}
+    for cat, hits in hits_by_category.items():
+        for hit in hits:
+            row = dict(hit, category=cat, text_score=hit["score"], score=hit["score"] * weights[cat])
+            if str(hit["id"]) not in best or row["score"] > best[str(hit["id"])]["score"]:
+                best[str(hit["id"])] = row
+    return sorted(best.values(), key=lambda r: r["score"], reverse=True)[:k]
+
+def multi_category(top_k_fn):
+    """top_k_multi for a backend with only top_k_fn(category, query, k): one call per category."""
+    def top_k_multi(categories: list[tuple[str, float]], query: str = "", k: int = 3) -> list[dict]:
+        weights = dict(categories)
+        return merge_weighted({cat: top_k_fn(cat, query, k) for cat in weights}, weights, k)
+    return top_k_multi
+
+# --- hybrid lexical + dense ---------------------------------------------
+@lru_cache(maxsize=None)    # one pool per leg: a hung backend ties up only its own threads
+def _pool(leg: str) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=LEG_WORKERS, thread_name_prefix=f"kg-{leg}")
+
+def _lexical(category: str, query: str, k: int) -> list[dict]:
+    if HYBRID_LEXICAL == "bm25":
+        from bm25_index import _index
+        return _index().search(query, k=k, categories=[category])
+    return top_k(category, query, k)
+
+def _vector(category: str, query: str, k: int) -> list[dict]:
+    from vector_index import _index
+    return _index().top_k_papers(query, k=k, categories=[category])
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    return fn(*args), (time.perf_counter() - start) * 1000
+
+def rrf(rankings: dict[str, list[dict]], k: int, rrf_k: int = RRF_K) -> list[dict]:
+    """Reciprocal‑rank fusion: score = Σ 1 / (rrf_k + rank) over the legs that returned the paper."""
+    fused: dict[str, dict] = {}
+    for leg, hits in rankings.items():
+        for rank, hit in enumerate(hits, start=1):
+            row = fused.setdefault(str(hit["id"]), {"id": hit["id"], "doi": hit.get("doi"),
+                                                     "title": hit.get("title"), "score": 0.0})
+            row["score"] += 1.0 / (rrf_k + rank)
+            row[f"{leg}_rank"] = rank
+    return sorted(fused.values(), key=lambda r: r["score"], reverse=True)[:k]
+
+def hybrid_search(category: str, query: str = "", k: int = 3, budget_ms: float = HYBRID_BUDGET_MS) -> dict:
+    """
+    Run the full‑text and vector legs concurrently and fuse them with RRF.
+    A leg that errors or misses the latency budget is dropped, so the answer
+    degrades to the other leg instead of failing.
+
+    Returns {"results": [{id, doi, title, score, <leg>_rank}], "legs": {leg: status},
+             "timings": {"<leg>_ms", "fusion_ms", "total_ms"}}.
+    """
+    start = time.perf_counter()
+    depth = max(k, LEG_DEPTH)
+    futures = {leg: _pool(leg).submit(_timed, fn, category, query, depth)
+               for leg, fn in (("lexical", _lexical), ("vector", _vector))}
+    wait(futures.values(), timeout=budget_ms / 1000)
+
+    rankings, legs, timings = {}, {}, {}
+    for leg, fut in futures.items():
+        if not fut.done():
+            fut.cancel()
+            legs[leg] = "timeout"
+        elif fut.exception() is not None:
+            legs[leg] = f"error: {fut.exception()}"
+        else:
+            rankings[leg], timings[f"{leg}_ms"] = fut.result()
+            legs[leg] = "ok"
+
+    fuse_start = time.perf_counter()
+    results = rrf(rankings, k)
+    timings["fusion_ms"] = (time.perf_counter() - fuse_start) * 1000
+    timings["total_ms"] = (time.perf_counter() - start) * 1000
+    return {"results": results, "legs": legs, "timings": timings}
+
+def hybrid_top_three(category: str, query: str = "") -> list[dict]:
+    """hybrid_search with the top_three signature."""
+    return hybrid_search(category, query, k=3)["results"]
@@ -0,0 +1,46 @@
+"""
+memory_report.py
+================
+Resident memory of the gunicorn master and each of its workers (Linux,
+/proc/<pid>/smaps_rollup). RSS counts shared pages in every process; PSS
+splits them between the sharers, so the PSS total is what the whole server
+really uses. With preload_app the workers' shared column holds the models.
+
+    python memory_report.py [--pid <master pid> | --pidfile /tmp/eco-chatbot-gunicorn.pid]
+"""
+import argparse
+from pathlib import Path
+
+from warmup import memory
+
+def children(pid: int) -> list[int]:
+    kids = []
+    for status in Path("/proc").glob("[0-9]*/status"):
+        try:
+            ppid = next(line for line in status.read_text().splitlines() if line.startswith("PPid:"))
+        except (OSError, StopIteration):
+            continue
+        if int(ppid.split()[1]) == pid:
+            kids.append(int(status.parent.name))
+    return sorted(kids)
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-worker memory of the gunicorn server")
+    ap.add_argument("--pid", type=int)
+    ap.add_argument("--pidfile", type=Path, default=Path("/tmp/eco-chatbot-gunicorn.pid"))
+    args = ap.parse_args()
+
+    master = args.pid or int(args.pidfile.read_text().strip())
+    rows = [("master", master)] + [("worker", pid) for pid in children(master)]
+    columns = ["rss_mb", "pss_mb", "shared_mb", "private_mb"]
+    print(f"{'process':<10}{'pid':>8}" + "".join(f"{c:>12}" for c in columns))
+    totals = dict.fromkeys(columns, 0.0)
+    for role, pid in rows:
+        mem = memory(pid)
+        for c in columns:
+            totals[c] += mem.get(c, 0.0)
+        print(f"{role:<10}{pid:>8}" + "".join(f"{mem.get(c, 0.0):>12.1f}" for c in columns))
+    print(f"{'total':<18}" + "".join(f"{totals[c]:>12.1f}" for c in columns))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+ngram_classifier.py
+===================
+Lightweight category classifier: hashed word/char n‑grams + a softmax‑linear
+model, trained on the labelled questions from make_sample_queries.py
+(train_ngram_classifier.py). Pure Python, ~0.1 ms per query on CPU.
+
+Model files live in chatbot-ui/.models/:
+* ngram_classifier.json            – the model predict_category loads
+* ngram_classifier-<version>.json  – every trained version, for rollback
+  (copy one over ngram_classifier.json, or point NGRAM_MODEL at it)
+
+Each file records its format, version (train date + data hash), the
+questions.json digest and the held‑out split, so eval_classifier.py scores it
+on questions it never saw.
+
+Usage:
+    from ngram_classifier import load_model
+    model = load_model()
+    model.predict("How much methane do cattle emit?")   # ("greenhouse gases", 0.93)
+"""
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+import zlib
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from categories import CATEGORIES, canonical
+
+MODELS_DIR     = Path(__file__).resolve().parent / ".models"
+MODEL_FILE     = Path(os.getenv("NGRAM_MODEL", MODELS_DIR / "ngram_classifier.json"))
+QUESTIONS_FILE = Path(__file__).resolve().parent.parent / "questions.json"
+FORMAT         = 1
+N_BUCKETS      = 1 << 18
+CHAR_NGRAMS    = (3, 4, 5)
+MIN_PROB       = float(os.getenv("NGRAM_MIN_PROB", "0.5"))    # below this, predict_category falls through
+
+# --- features ---------------------------------------------------------
+_WORD = re.compile(r"[a-z0-9]+")
+
+def features(text: str, n_buckets: int = N_BUCKETS) -> dict[int, float]:
+    """L2‑normalised counts of hashed word unigrams, bigrams and in‑word char n‑grams."""
+    words = _WORD.findall(text.lower())
+    grams = [f"w|{w}" for w in words] + [f"b|{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"<{w}>"
+        grams += [f"c|{padded[i:i + n]}" for n in CHAR_NGRAMS for i in range(len(padded) - n + 1)]
+    counts = Counter(zlib.crc32(g.encode("utf-8")) % n_buckets for g in grams)
+    norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+    return {k: v / norm for k, v in counts.items()}
+
+def _softmax(logits: list[float]) -> list[float]:
+    top = max(logits)
+    exps = [math.exp(x - top) for x in logits]
+    total = sum(exps)
+    return [e / total for e in exps]
+
+# --- data -------------------------------------------------------------
+def load_samples(path: Path = QUESTIONS_FILE) -> dict[str, list[str]]:
+    """questions.json with category names mapped to the CATEGORIES spelling."""
+    samples: dict[str, list[str]] = {}
+    for cat, qs in json.loads(Path(path).read_text(encoding="utf-8")).items():
+        cat = canonical(cat)
+        if cat not in CATEGORIES:
+            raise ValueError(f"unknown category in {path}: {cat!r}")
+        samples.setdefault(cat, []).extend(q for q in qs if q.strip())
+    return samples
+
+def split(samples: dict[str, list[str]], holdout: float, seed: int):
+    """Deterministic per‑category train/test split: ([(cat, q)], [(cat, q)])."""
+    rng = random.Random(seed)
+    train, test = [], []
+    for cat in sorted(samples):
+        qs = sorted(set(samples[cat]))
+        rng.shuffle(qs)
+        cut = int(round(len(qs) * holdout))
+        test += [(cat, q) for q in qs[:cut]]
+        train += [(cat, q) for q in qs[cut:]]
+    return train, test
+
+# --- model ------------------------------------------------------------
+class NgramClassifier:
+    """Sparse softmax‑linear model: bucket → one weight per category."""
+
+    def __init__(self, categories: list[str], weights: dict[int, list[float]], bias: list[float],
+                 n_buckets: int = N_BUCKETS, meta: Optional[dict] = None):
+        self.categories = categories
+        self.weights    = weights
+        self.bias       = bias
+        self.n_buckets  = n_buckets
+        self.meta       = meta or {}
+
+    @property
+    def version(self) -> str:
+        return self.meta.get("version", "untrained")
+
+    def probabilities(self, text: str) -> list[float]:
+        logits = list(self.bias)
+        for bucket, value in features(text, self.n_buckets).items():
+            w = self.weights.get(bucket)
+            if w is not None:
+                for j, wj in enumerate(w):
+                    logits[j] += wj * value
+        return _softmax(logits)
+
+    def predict(self, text: str) -> tuple[str, float]:
+        """(category, probability)."""
+        probs = self.probabilities(text)
+        best = max(range(len(probs)), key=probs.__getitem__)
+        return self.categories[best], probs[best]
+
+    # -- training ------------------------------------------------------
+    @classmethod
+    def train(cls, train: list[tuple[str, str]], epochs: int = 30, lr: float = 0.5, l2: float = 1e-5,
+              n_buckets: int = N_BUCKETS, seed: int = 0) -> "NgramClassifier":
+        """Plain SGD on the cross‑entropy loss over (category, question) pairs."""
+        categories = list(CATEGORIES)
+        k = len(categories)
+        weights: dict[int, list[float]] = {}
+        bias = [0.0] * k
+        data = [(categories.index(cat), features(q, n_buckets)) for cat, q in train]
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            step = lr / (1 + epoch * 0.1)
+            for label, feats in data:
+                logits = list(bias)
+                for bucket, value in feats.items():
+                    w = weights.setdefault(bucket, [0.0] * k)
+                    for j in range(k):
+                        logits[j] += w[j] * value
+                grad = _softmax(logits)
+                grad[label] -= 1.0
+                for j in range(k):
+                    bias[j] -= step * grad[j]
+                for bucket, value in feats.items():
+                    w = weights[bucket]
+                    for j in range(k):
+                        w[j] -= step * (grad[j] * value + l2 * w[j])
+        return cls(categories, weights, bias, n_buckets)
+
+    # -- files ---------------------------------------------------------
+    def save(self, directory: Path = MODELS_DIR) -> Path:
+        """Write ngram_classifier-<version>.json and make it the current ngram_classifier.json."""
+        directory.mkdir(parents=True, exist_ok=True)
+        blob = json.dumps({
+            "format": FORMAT,
+            "meta": self.meta,
+            "categories": self.categories,
+            "n_buckets": self.n_buckets,
+            "bias": self.bias,
+            "weights": {str(b): [round(x, 6) for x in w] for b, w in self.weights.items()},
+        })
+        versioned = directory / f"ngram_classifier-{self.version}.json"
+        versioned.write_text(blob, encoding="utf-8")
+        tmp = directory / "ngram_classifier.json.tmp"
+        tmp.write_text(blob, encoding="utf-8")
+        tmp.replace(directory / "ngram_classifier.json")
+        return versioned
+
+    @classmethod
+    def load(cls, path: Path = MODEL_FILE) -> "NgramClassifier":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        if data.get("format") != FORMAT:
+            raise ValueError(f"{path}: unsupported model format {data.get('format')}")
+        weights = {int(b): w for b, w in data["weights"].items()}
+        return cls(data["categories"], weights, data["bias"], data["n_buckets"], data["meta"])
+
+def version_for(questions: Path) -> tuple[str, str]:
+    """(version string, sha256 of the training file)."""
+    digest = hashlib.sha256(Path(questions).read_bytes()).hexdigest()
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{digest[:8]}", digest
+
+@lru_cache(maxsize=1)       # one model per process; None when not trained yet
+def load_model() -> Optional[NgramClassifier]:
+    try:
+        return NgramClassifier.load(MODEL_FILE)
+    except (OSError, ValueError):
+        return None
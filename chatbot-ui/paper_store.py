@@ -0,0 +1,127 @@
+"""
+paper_store.py
+==============
+Indexed, memory‑mapped store of the papers in climate_outputs/.
+
+Built once from the category JSON files into <climate_outputs>/.paper_store/:
+* papers.dat  – length‑prefixed records (4‑byte little‑endian length + UTF‑8 JSON
+                {"title", "fullText"}), one per paper id
+* index.json  – id → (offset, length), category → ids, and the size/mtime of every
+                source file so a stale store is rebuilt automatically
+
+Fetching a paper is then a single slice of the mmap instead of parsing a whole
+category file.
+
+Usage:
+    from paper_store import PaperStore
+    store = PaperStore.open(CLIMATE_DIR)
+    full_text, title = store.get("greenhouse_gases", 123456)
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+
+STORE_DIRNAME = ".paper_store"
+DATA_FILE     = "papers.dat"
+INDEX_FILE    = "index.json"
+LEN           = struct.Struct("<I")
+
+# --- build ------------------------------------------------------------
+def _sources(climate_dir: Path) -> dict:
+    return {fp.name: [fp.stat().st_size, fp.stat().st_mtime_ns]
+            for fp in sorted(climate_dir.glob("*.json"))}
+
+def build(climate_dir: Path) -> Path:
+    """(Re)write papers.dat + index.json from the category files."""
+    store_dir = climate_dir / STORE_DIRNAME
+    store_dir.mkdir(exist_ok=True)
+    papers, categories = {}, {}
+
+    # per‑process temp files, so concurrent builds (gunicorn workers) never share one;
+    # each file is swapped in whole, the data before the index that points into it
+    with tempfile.NamedTemporaryFile(dir=store_dir, prefix=DATA_FILE, delete=False) as out:
+        try:
+            for fp in sorted(climate_dir.glob("*.json")):
+                with fp.open("r", encoding="utf-8") as f:
+                    items = json.load(f)
+                ids = categories.setdefault(fp.stem, [])
+                for item in items:
+                    pid = str(item.get("id"))
+                    ids.append(pid)
+                    if pid in papers:           # same paper in several categories: store once
+                        continue
+                    blob = json.dumps({
+                        "title":    item.get("title", "Unknown title"),
+                        "fullText": item.get("fullText", ""),
+                    }, ensure_ascii=False).encode("utf-8")
+                    papers[pid] = [out.tell(), len(blob)]
+                    out.write(LEN.pack(len(blob)))
+                    out.write(blob)
+        except BaseException:
+            os.unlink(out.name)
+            raise
+    os.replace(out.name, store_dir / DATA_FILE)
+
+    index = {"sources": _sources(climate_dir), "papers": papers, "categories": categories}
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=store_dir, prefix=INDEX_FILE,
+                                     delete=False) as out:
+        json.dump(index, out)
+    os.replace(out.name, store_dir / INDEX_FILE)
+    return store_dir
+
+# --- read -------------------------------------------------------------
+class PaperStore:
+    """Read‑only id → (title, fullText) lookups over a memory‑mapped papers.dat."""
+
+    def __init__(self, store_dir: Path):
+        index = json.loads((store_dir / INDEX_FILE).read_text(encoding="utf-8"))
+        self.papers = {pid: tuple(loc) for pid, loc in index["papers"].items()}
+        self.categories = {cat: set(ids) for cat, ids in index["categories"].items()}
+        self._file = (store_dir / DATA_FILE).open("rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.papers else b""
+
+    @classmethod
+    def open(cls, climate_dir: Path, rebuild: bool = False) -> "PaperStore":
+        """Open the store, building it first if missing or older than the JSON files."""
+        climate_dir = Path(climate_dir)
+        store_dir = climate_dir / STORE_DIRNAME
+        try:
+            index = json.loads((store_dir / INDEX_FILE).read_text(encoding="utf-8"))
+            stale = index.get("sources") != _sources(climate_dir)
+        except (OSError, ValueError):
+            stale = True
+        if stale or rebuild:
+            build(climate_dir)
+        return cls(store_dir)
+
+    def record(self, paper_id: int | str) -> dict:
+        """Raw record {"title", "fullText"} for `paper_id`; KeyError if unknown."""
+        offset, length = self.papers[str(paper_id)]
+        start = offset + LEN.size
+        return json.loads(self._mm[start:start + length])
+
+    def get(self, category: str, paper_id: int | str) -> tuple[str, str]:
+        """
+        Return (fullText, title) for `paper_id` inside `category`.
+        Raises FileNotFoundError or ValueError if not found.
+        """
+        if category not in self.categories:
+            raise FileNotFoundError(f"No category file for {category}")
+        if str(paper_id) not in self.categories[category]:
+            raise ValueError(f"id {paper_id} not found in {category}")
+        item = self.record(paper_id)
+        return item.get("fullText", ""), item.get("title", "Unknown title")
+
+    def close(self):
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._file.close()
+
+
+if __name__ == "__main__":
+    import sys
+    d = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).resolve().parent.parent / "climate_outputs"
+    print(f"✔ Paper store written to {build(d)}")
@@ -0,0 +1,136 @@
+"""
+passage_index.py
+================
+Passage‑level BM25 index over the fullText of climate_outputs/, so the chat
+prompt carries only the chunks of each retrieved paper that match the question.
+
+* Offline: every fullText is cut into overlapping word windows and indexed with
+  bm25_index.BM25Index (<climate_outputs>/.passage_index.bin); a passage is
+  stored as (paper id, start, end) character offsets, the text itself stays in
+  the paper store.
+* Query time: score only the passages of the given papers, keep the best
+  `per_paper_n` of each and fill a token budget (≈4 characters per token).
+
+Usage:
+    from passage_index import PassageIndex
+    passages = PassageIndex.open(CLIMATE_DIR)
+    passages.select([123, 456, 789], "methane from cattle", per_paper_n=4, token_budget=6000)
+"""
+import json
+import math
+import re
+from pathlib import Path
+from typing import Iterable, Optional
+
+from bm25_index import BM25Index, _sources
+from paper_store import PaperStore
+
+CLIMATE_DIR    = Path(__file__).resolve().parent.parent / "climate_outputs"
+INDEX_FILE     = CLIMATE_DIR / ".passage_index.bin"
+CHUNK_WORDS    = 200        # words per passage
+CHUNK_OVERLAP  = 40         # words shared by consecutive passages
+PER_PAPER_N    = 4          # passages kept per paper
+TOKEN_BUDGET   = 6000       # prompt tokens spent on passages, all papers together
+CHARS_PER_TOKEN = 4
+
+# --- chunking ---------------------------------------------------------
+_WORD = re.compile(r"\S+")
+
+def chunk_spans(text: str, words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> list[tuple[int, int]]:
+    """(start, end) character offsets of overlapping windows of `words` whitespace tokens."""
+    toks = [m.span() for m in _WORD.finditer(text or "")]
+    step = max(1, words - overlap)
+    return [(toks[i][0], toks[min(i + words, len(toks)) - 1][1])
+            for i in range(0, max(len(toks) - overlap, 1), step) if i < len(toks)]
+
+def chunk_text(text: str, words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> list[str]:
+    """The passages themselves (original spacing kept)."""
+    return [text[s:e] for s, e in chunk_spans(text, words, overlap)]
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+# --- build ------------------------------------------------------------
+def passage_docs(climate_dir: Path = CLIMATE_DIR):
+    """One doc per passage of every unique paper's fullText."""
+    seen = set()
+    for fp in sorted(climate_dir.glob("*.json")):
+        with fp.open("r", encoding="utf-8") as f:
+            for item in json.load(f):
+                if str(item.get("id")) in seen:
+                    continue
+                seen.add(str(item.get("id")))
+                text = item.get("fullText") or ""
+                for start, end in chunk_spans(text):
+                    yield {"paper": item.get("id"), "start": start, "end": end}, text[start:end], ()
+
+def build(climate_dir: Path = CLIMATE_DIR, path: Path = INDEX_FILE) -> BM25Index:
+    idx = BM25Index.build(passage_docs(climate_dir), sources=_sources(climate_dir))
+    idx.save(path)
+    return idx
+
+# --- select -----------------------------------------------------------
+class PassageIndex:
+    """Passage BM25 plus the paper store the passage offsets point into."""
+
+    def __init__(self, index: BM25Index, papers: PaperStore):
+        self.index = index
+        self.papers = papers
+        self.by_paper: dict[str, list[int]] = {}
+        for doc, meta in enumerate(index.doc_meta):
+            self.by_paper.setdefault(str(meta["paper"]), []).append(doc)
+
+    @classmethod
+    def open(cls, climate_dir: Path = CLIMATE_DIR, papers: Optional[PaperStore] = None,
+             path: Path = INDEX_FILE, rebuild: bool = False) -> "PassageIndex":
+        """Load the index, (re)building it when missing or older than the JSON files."""
+        climate_dir = Path(climate_dir)
+        idx = None
+        if not rebuild:
+            try:
+                idx = BM25Index.load(path)
+                if idx.sources != _sources(climate_dir):
+                    idx = None
+            except (OSError, ValueError, KeyError):
+                idx = None
+        return cls(idx or build(climate_dir, path), papers or PaperStore.open(climate_dir))
+
+    def select(self, paper_ids: Iterable[int | str], query: str, per_paper_n: int = PER_PAPER_N,
+               token_budget: int = TOKEN_BUDGET) -> dict[str, list[str]]:
+        """
+        Best passages of each paper for `query`, in document order: {str(paper id): [passage, ...]}.
+        Papers take turns (best passage of each first) until `token_budget` is spent; a paper
+        with no matching term falls back to its opening passage.
+        """
+        paper_ids = [str(p) for p in paper_ids]
+        allowed = [d for p in paper_ids for d in self.by_paper.get(p, [])]
+        ranked = {p: [] for p in paper_ids}
+        for hit in self.index.search(query, k=len(allowed), docs=allowed):
+            pid = str(hit["paper"])
+            if len(ranked[pid]) < per_paper_n:
+                ranked[pid].append(hit)
+        for pid in paper_ids:
+            if not ranked[pid] and self.by_paper.get(pid):
+                ranked[pid].append(self.index.doc_meta[self.by_paper[pid][0]])
+
+        texts = {pid: self.papers.record(pid).get("fullText", "") for pid in paper_ids if ranked[pid]}
+        chosen = {pid: [] for pid in paper_ids}
+        used = 0
+        for rank in range(per_paper_n):
+            for pid in paper_ids:
+                if rank >= len(ranked[pid]):
+                    continue
+                hit = ranked[pid][rank]
+                cost = estimate_tokens(texts[pid][hit["start"]:hit["end"]])
+                if used + cost <= token_budget:
+                    chosen[pid].append((hit["start"], hit["end"]))
+                    used += cost
+        return {pid: [texts[pid][s:e] for s, e in sorted(spans)] for pid, spans in chosen.items()}
+
+
+if __name__ == "__main__":
+    import time
+    t0 = time.perf_counter()
+    idx = build()
+    print(f"✔ {len(idx.doc_len)} passages, {len(idx.vocab)} terms → {INDEX_FILE} "
+          f"in {1000 * (time.perf_counter() - t0):.0f} ms")
@@ -0,0 +1,169 @@
+"""
+query_cache.py
+==============
+Two‑level cache for the classify → rewrite → retrieve pipeline.
+
+* Level 1: in‑process LRU (OrderedDict), QUERY_CACHE_SIZE entries.
+* Level 2: optional SQLite file (QUERY_CACHE_DB), shared by workers and
+  surviving restarts.
+* Keys are the query normalised with transformer_rewriter._tokens (plus codes
+  such as CO2 or CH4 that it drops), so case, punctuation and short filler
+  words do not cause misses.
+* Every entry has a TTL (QUERY_CACHE_TTL seconds) and the version it was
+  computed under: retrieval results are tied to the graph‑load version
+  (climate_outputs/.neo4j_manifest.json), pipeline results to the classifier
+  / rewriter settings. A version change turns old entries into misses.
+
+Cached rewrites also make answers reproducible: the paraphraser samples.
+
+Usage:
+    PIPELINE_CACHE = QueryCache("pipeline", version=pipeline_version)
+    doPipeline = cache_pipeline(doPipeline, PIPELINE_CACHE)
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from transformer_rewriter import _tokens
+
+CLIMATE_DIR   = Path(__file__).resolve().parent.parent / "climate_outputs"
+MANIFEST      = CLIMATE_DIR / ".neo4j_manifest.json"
+CACHE_SIZE    = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+CACHE_TTL     = float(os.getenv("QUERY_CACHE_TTL", str(24 * 3600)))
+CACHE_DB      = os.getenv("QUERY_CACHE_DB", "")          # e.g. climate_outputs/.query_cache.sqlite; "" = memory only
+
+_CODES = re.compile(r"\b[a-z]*\d[a-z\d]*\b")     # co2, ch4, n2o, 2050 – dropped by _tokens
+
+def normalize(query: str) -> str:
+    q = query.lower()
+    return " ".join(_tokens(q) + _CODES.findall(q))
+
+# --- versions ---------------------------------------------------------
+_graph = {"stamp": None, "version": ""}
+
+def graph_version(manifest: Path = MANIFEST, climate_dir: Path = CLIMATE_DIR) -> str:
+    """Version of the last graph load; falls back to a fingerprint of the category files."""
+    try:
+        stamp = manifest.stat().st_mtime_ns
+        if stamp != _graph["stamp"]:
+            _graph.update(stamp=stamp, version=json.loads(manifest.read_text(encoding="utf-8"))["version"])
+        return _graph["version"]
+    except (OSError, ValueError, KeyError):
+        files = [(fp.name, fp.stat().st_size, fp.stat().st_mtime_ns) for fp in sorted(climate_dir.glob("*.json"))]
+        return hashlib.sha256(repr(files).encode("utf-8")).hexdigest()[:16]
+
+def pipeline_version() -> str:
+    """Settings that change what classify + rewrite return."""
+    from ngram_classifier import MODEL_FILE
+    try:
+        model = MODEL_FILE.stat().st_mtime_ns
+    except OSError:
+        model = 0
+    knobs = [os.getenv(k, "") for k in ("CLASSIFIER_MODE", "PARAPHRASE_MODE", "INFERENCE_BACKEND", "RETRIEVAL_CATEGORIES")]
+    return "|".join(knobs + [str(model)])
+
+# --- cache ------------------------------------------------------------
+class QueryCache:
+    """LRU + optional SQLite, with TTL and version checks; values must be JSON‑serialisable."""
+
+    def __init__(self, name: str, maxsize: int = CACHE_SIZE, ttl: float = CACHE_TTL,
+                 db_path: Optional[str] = CACHE_DB or None, version: Callable[[], str] = lambda: ""):
+        self.name, self.maxsize, self.ttl, self.version = name, maxsize, ttl, version
+        self._mem: OrderedDict[str, tuple[str, float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "stale": 0, "evictions": 0}
+        self._db_path, self._db_pid, self._conn = db_path, None, None
+        if db_path:
+            self._db.execute("CREATE TABLE IF NOT EXISTS cache (name TEXT, key TEXT, version TEXT, "
+                             "expires REAL, value TEXT, PRIMARY KEY (name, key))")
+            self._db.execute("DELETE FROM cache WHERE expires < ?", (time.time(),))
+            self._db.commit()
+
+    @property
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """One connection per process: a connection must not cross a fork (gunicorn preload_app)."""
+        if self._db_path and self._db_pid != os.getpid():
+            self._conn, self._db_pid = sqlite3.connect(self._db_path, check_same_thread=False), os.getpid()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        version, now = self.version(), time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute("SELECT version, expires, value FROM cache WHERE name=? AND key=?",
+                                       (self.name, key)).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1], json.loads(row[2]))
+                    if entry[0] == version and entry[1] >= now:
+                        self._stats["disk_hits"] += 1
+                        self._remember(key, entry)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if entry[0] != version or entry[1] < now:
+                self._stats["stale" if entry[0] != version else "expired"] += 1
+                self._stats["misses"] += 1
+                self._mem.pop(key, None)
+                return None
+            self._mem.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[2]
+
+    def put(self, key: str, value: Any) -> Any:
+        entry = (self.version(), time.time() + self.ttl, value)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)",
+                                 (self.name, key, entry[0], entry[1], json.dumps(value)))
+                self._db.commit()
+        return value
+
+    def _remember(self, key: str, entry: tuple):
+        self._mem[key] = entry
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.maxsize:
+            self._mem.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return dict(self._stats, size=len(self._mem), maxsize=self.maxsize,
+                        hit_rate=self._stats["hits"] / lookups if lookups else 0.0,
+                        disk=self._db is not None, version=self.version())
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache WHERE name=?", (self.name,))
+                self._db.commit()
+
+# --- wrappers ---------------------------------------------------------
+def cache_pipeline(fn: Callable, cache: QueryCache) -> Callable:
+    """Wrap doPipeline(query) -> (cat_print, rewritten, query); the raw query is never cached."""
+    def cached(query: str):
+        key = normalize(query)
+        hit = cache.get(key)
+        if hit is None:
+            cat_print, rewritten, _ = fn(query)
+            hit = cache.put(key, [cat_print, rewritten])
+        return hit[0], hit[1], query
+    return cached
+
+def cache_retrieval(fn: Callable, cache: QueryCache) -> Callable:
+    """Wrap top_three(category, query) -> [hits]."""
+    def cached(category: str, query: str = ""):
+        key = f"{category}|{normalize(query)}"
+        hit = cache.get(key)
+        return hit if hit is not None else cache.put(key, fn(category, query))
+    return cached
@@ -3,10 +3,16 @@
 
 Example:
     python rewrite_pipeline.py "impact of rising sea levels on coastal farming"
+
+With INFERENCE_URL set, the models run in inference_server.py instead of
+this process.
 """
-import argparse, textwrap
-from zero_shot_classifier import predict_category
-from transformer_rewriter import rewrite_query
+import argparse, os, textwrap
+if os.getenv("INFERENCE_URL"):
+    from inference_client import predict_categories, predict_category, rank_categories, rewrite_queries, rewrite_query
+else:
+    from zero_shot_classifier import predict_categories, predict_category, rank_categories
+    from transformer_rewriter import rewrite_queries, rewrite_query
 
 def main():
     p = argparse.ArgumentParser(
@@ -34,5 +40,11 @@ def doPipeline(query):
     cat_print = cat.replace(" ", "_")
     return cat_print, rewritten, query
 
+def doPipelines(queries, budget_ms=None):
+    """doPipeline over a list: one batched classify and one batched rewrite (paraphrase budget `budget_ms`)."""
+    cats = predict_categories(queries)
+    rewritten = rewrite_queries(queries, cats, budget_ms=budget_ms)
+    return [(cat.replace(" ", "_"), rw, q) for cat, rw, q in zip(cats, rewritten, queries)]
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,6 +3,7 @@ function Chat() {
   const [conversations, setConversations] = React.useState([]);
   const [input, setInput] = React.useState("");
   const [waiting, setWaiting] = React.useState(false);
+  const [streaming, setStreaming] = React.useState(false);
   const [activeChatIndex, setActiveChatIndex] = React.useState(null);
   const scrollRef = React.useRef(null);
 
@@ -28,6 +29,80 @@ function Chat() {
     return firstUserMsg ? firstUserMsg.text.slice(0, 30) + "…" : "New Chat";
   }
 
+  // Progressive bot message: category line, then sources, then the answer as it streams in
+  function renderStreamed(parts) {
+    const lines = [];
+    if (parts.category) {
+      lines.push(`We've sorted your query into the '${parts.category}' category. The fully modified query is: '${parts.rewritten}'.`);
+    }
+    if (parts.sources.length) {
+      lines.push("Sources:\n" + parts.sources.map((s, i) => `${i + 1}. ${s.title} (score ${Number(s.score).toFixed(3)})`).join("\n"));
+    }
+    if (parts.answer) lines.push(parts.answer);
+    if (parts.error) lines.push("⚠️ " + parts.error);
+    return lines.join("\n\n") || "…";
+  }
+
+  async function sendBlocking(finalInput) {
+    const res = await fetch("/api/chat", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ message: finalInput }),
+    });
+    const data = await res.json();
+    const reply = data.reply || data.error || "⚠️ No response";
+
+    setMessages((prev) => [...prev, { from: "bot", text: reply }]);
+  }
+
+  // Reads the server-sent events of /api/chat/stream (see app.py) and updates the last message per event
+  async function sendStreaming(finalInput) {
+    const res = await fetch("/api/chat/stream", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ message: finalInput }),
+    });
+    if (!res.ok || !res.body) return sendBlocking(finalInput);
+
+    const parts = { category: null, rewritten: "", sources: [], answer: "", error: null };
+    const update = () =>
+      setMessages((prev) => [...prev.slice(0, -1), { from: "bot", text: renderStreamed(parts) }]);
+    setMessages((prev) => [...prev, { from: "bot", text: "…" }]);
+    setStreaming(true);
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const frames = buffer.split("\n\n");
+      buffer = frames.pop();
+      for (const frame of frames) {
+        let event = "message";
+        let data = "";
+        for (const line of frame.split("\n")) {
+          if (line.startsWith("event: ")) event = line.slice(7);
+          else if (line.startsWith("data: ")) data += line.slice(6);
+        }
+        if (!data) continue; // ": comment" keep-alive frames
+        const payload = JSON.parse(data);
+        if (event === "category") {
+          parts.category = payload.category;
+          parts.rewritten = payload.rewritten;
+        } else if (event === "sources") {
+          parts.sources = payload.slice(0, 3);
+        } else if (event === "token") {
+          parts.answer += payload.text;
+        } else if (event === "error") {
+          parts.error = payload.error;
+        }
+        update();
+      }
+    }
+  }
+
   async function send(messageOverride = null) {
     const finalInput = messageOverride || input.trim();
     if (!finalInput || waiting) return;
@@ -37,15 +112,7 @@ function Chat() {
     setWaiting(true);
 
     try {
-      const res = await fetch("/api/chat", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ message: finalInput }),
-      });
-      const data = await res.json();
-      const reply = data.reply || "⚠️ No response";
-
-      setMessages((prev) => [...prev, { from: "bot", text: reply }]);
+      await sendStreaming(finalInput);
     } catch (err) {
       setMessages((prev) => [
         ...prev,
@@ -53,6 +120,7 @@ function Chat() {
       ]);
     } finally {
       setWaiting(false);
+      setStreaming(false);
     }
   }
 
@@ -156,13 +224,13 @@ function Chat() {
                 justifyContent: m.from === "user" ? "flex-end" : "flex-start",
               }}
             >
-              <div className={m.from === "user" ? "bubble-user" : "bubble-bot"}>
+              <div className={m.from === "user" ? "bubble-user" : "bubble-bot"} style={{ whiteSpace: "pre-wrap" }}>
                 {m.text}
               </div>
             </div>
           ))}
 
-          {waiting && (
+          {waiting && !streaming && (
             <div style={{ display: "flex", justifyContent: "flex-start" }}>
               <div style={{ padding: "0.4rem" }}>
                 <img
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""Train the hashed n‑gram category classifier on make_sample_queries.py output.
+
+Usage:
+    python train_ngram_classifier.py [--questions ../questions.json] [--holdout 0.2]
+Writes .models/ngram_classifier-<version>.json and makes it the current model.
+"""
+import argparse
+import time
+
+from ngram_classifier import MODELS_DIR, QUESTIONS_FILE, NgramClassifier, load_samples, split, version_for
+
+def main():
+    ap = argparse.ArgumentParser(description="Train the n‑gram category classifier")
+    ap.add_argument("--questions", default=QUESTIONS_FILE)
+    ap.add_argument("--holdout", type=float, default=0.2, help="share of each category kept for evaluation")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--epochs", type=int, default=30)
+    ap.add_argument("--lr", type=float, default=0.5)
+    args = ap.parse_args()
+
+    samples = load_samples(args.questions)
+    train, test = split(samples, args.holdout, args.seed)
+    print(f"Loaded {sum(map(len, samples.values()))} questions in {len(samples)} categories "
+          f"({len(train)} train / {len(test)} held out)")
+
+    start = time.perf_counter()
+    model = NgramClassifier.train(train, epochs=args.epochs, lr=args.lr, seed=args.seed)
+    train_s = time.perf_counter() - start
+
+    version, digest = version_for(args.questions)
+    model.meta = {"version": version, "questions": str(args.questions), "questions_sha256": digest,
+                  "holdout": args.holdout, "seed": args.seed, "epochs": args.epochs, "lr": args.lr,
+                  "train_size": len(train)}
+    path = model.save(MODELS_DIR)
+
+    if test:
+        start = time.perf_counter()
+        correct = sum(model.predict(q)[0] == cat for cat, q in test)
+        per_query = (time.perf_counter() - start) / len(test) * 1e6
+        print(f"Held‑out accuracy {correct / len(test):.1%}, {per_query:.0f} µs/query")
+    print(f"✔ Model {version} ({len(model.weights)} active buckets) trained in {train_s:.1f}s → {path}")
+
+if __name__ == "__main__":
+    main()
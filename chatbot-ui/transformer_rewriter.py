@@ -1,19 +1,32 @@
 """
-transformer_rewriter.py  (v12 – better climate queries)
+transformer_rewriter.py  (v14 – batched, tiered paraphrasing)
 
 BART paraphraser for climate‑rich inputs; template for others.
+Paraphrasing escalates greedy → small beam → sampled 5‑beam only while the
+candidates stay too close to the input, within PARAPHRASE_BUDGET_MS; when
+the budget runs out the template is used instead. rewrite_queries() does a
+batch with one pipeline call per tier (inference_server.py).
 """
 
-import re, collections, random
+import os, re, collections, random, time
 from functools import lru_cache
-from typing import List
+from typing import List, Optional
 
 import torch
-from transformers import pipeline
 from categories import CATEGORIES
+from inference_backend import load_pipeline
 
 # ------------------- CONFIG ---------------------------------------
 PARA_MODEL = "eugenesiow/bart-paraphrase"
+PARAPHRASE_MODE      = os.getenv("PARAPHRASE_MODE", "tiered").lower()      # "tiered" or "sampled" (one 5‑beam call)
+PARAPHRASE_BUDGET_MS = float(os.getenv("PARAPHRASE_BUDGET_MS", "2000"))   # 0 = no limit
+MAX_OVERLAP = 0.6           # a paraphrase must share less than this with the input
+TIERS = [                   # (name, generate kwargs), cheapest first
+    ("greedy",  dict(num_beams=1, do_sample=False, num_return_sequences=1)),
+    ("beam",    dict(num_beams=3, do_sample=False, num_return_sequences=3)),
+    ("sampled", dict(do_sample=True, num_return_sequences=5, num_beams=5, temperature=0.9, top_p=0.9)),
+]
+TIER_STATS = collections.Counter()      # which tier answered: greedy / beam / sampled / unchanged / budget
 DEVICE     = (
     "cuda" if torch.cuda.is_available()
     else "mps" if torch.backends.mps.is_available()
@@ -50,13 +63,7 @@ TEMPLATES = {
 # ------------------- helper pipelines ------------------------------
 @lru_cache(maxsize=1)
 def _paraphraser():
-    return pipeline(
-        "text2text-generation",
-        model=PARA_MODEL,
-        tokenizer=PARA_MODEL,
-        device_map="auto",
-        max_length=48,
-    )
+    return load_pipeline("text2text-generation", PARA_MODEL, max_length=48)
 
 # ------------------- utilities ------------------------------------
 def _tokens(text: str) -> List[str]:
@@ -70,36 +77,96 @@ def _noun_phrase(text: str, k: int = 3) -> str:
     freq = collections.Counter(toks)
     return " ".join([w for w, _ in freq.most_common(k)]) or "human activities"
 
-def _paraphrase(text: str) -> str:
-    outs = _paraphraser()(
-        text,
-        do_sample=True,
-        num_return_sequences=5,
-        num_beams=5,
-        temperature=0.9,
-        top_p=0.9,
-    )
+def _first_novel(text: str, outs) -> Optional[str]:
     orig = _tokens(text)
     for o in outs:
         cand = o["generated_text"].strip().strip('"')
-        if _token_overlap(orig, _tokens(cand)) < 0.6:
+        if _token_overlap(orig, _tokens(cand)) < MAX_OVERLAP:
             return cand
-    return text  # fallback
+    return None
+
+def _paraphrase_many(texts: List[str], budget_ms: Optional[float] = None,
+                     deadlines: Optional[List[float]] = None) -> List[Optional[str]]:
+    """
+    Paraphrase a batch, escalating through TIERS until a candidate differs
+    enough; each tier is one batched call over the texts still unresolved.
+    Per text: the paraphrase, the input unchanged if no tier gets far enough
+    from it, or None once its latency budget is spent (rewrite_query then
+    uses the template). `deadlines` are per‑text time.perf_counter() values
+    (inference_server.py passes each request's arrival + budget); otherwise
+    the whole batch gets one budget from now. A tier stops at the earliest
+    deadline still pending.
+    """
+    tiers   = TIERS if PARAPHRASE_MODE == "tiered" else TIERS[-1:]
+    if deadlines is None:
+        budget = (PARAPHRASE_BUDGET_MS if budget_ms is None else budget_ms) / 1000 or float("inf")
+        deadlines = [time.perf_counter() + budget] * len(texts)
+    results: List[Optional[str]] = list(texts)          # unchanged unless a tier finds a novel one
+    pending = list(range(len(texts)))
+
+    def expire(now: float) -> List[int]:
+        late = [i for i in pending if deadlines[i] <= now]
+        TIER_STATS["budget"] += len(late)
+        for i in late:
+            results[i] = None
+        return [i for i in pending if deadlines[i] > now]
+
+    for name, kwargs in tiers:
+        pending = expire(time.perf_counter())
+        if not pending:
+            break
+        left = min(deadlines[i] for i in pending) - time.perf_counter()
+        if left != float("inf"):
+            kwargs = dict(kwargs, max_time=max(left, 0.0))  # generate() stops itself at the deadline
+        outs = _paraphraser()([texts[i] for i in pending], batch_size=len(pending), **kwargs)
+        now, still = time.perf_counter(), []
+        for i, out in zip(pending, outs):
+            cand = _first_novel(texts[i], out if isinstance(out, list) else [out]) if deadlines[i] > now else None
+            if cand:
+                TIER_STATS[name] += 1
+                results[i] = cand
+            else:
+                still.append(i)                 # next tier, or expired if its deadline has passed
+        pending = still
+    pending = expire(time.perf_counter())
+    TIER_STATS["unchanged"] += len(pending)
+    return results
+
+def _paraphrase(text: str, budget_ms: Optional[float] = None) -> Optional[str]:
+    return _paraphrase_many([text], budget_ms)[0]
 
 # ------------------- main API --------------------------------------
-def rewrite_query(query: str, category: str) -> str:
+def _tag(category: str) -> str:
     if category not in CATEGORIES:
         raise ValueError(f"{category=} not recognised")
+    return f"<{category.replace(' ', '_')}>"
 
-    tag   = f"<{category.replace(' ', '_')}>"
-    toks  = _tokens(query)
-    clim_ratio = sum(w in CLIMATE_WORDS for w in toks) / max(len(toks), 1)
-
-    # 1. climate‑rich → paraphrase & tag
-    if clim_ratio >= 0.25:
-        return f"{tag} {_paraphrase(query)}"
+def _climate_rich(query: str) -> bool:
+    toks = _tokens(query)
+    return sum(w in CLIMATE_WORDS for w in toks) / max(len(toks), 1) >= 0.25
 
-    # 2. otherwise → template using extracted noun phrase
+def _template(query: str, category: str) -> str:
     phrase    = _noun_phrase(query)
     template  = TEMPLATES.get(category, "climate dimension of {phrase}")
-    return f"{tag} {template.format(phrase=phrase)}"
+    return template.format(phrase=phrase)
+
+def rewrite_queries(queries: List[str], categories: List[str], budget_ms: Optional[float] = None,
+                    deadlines: Optional[List[float]] = None) -> List[str]:
+    """
+    rewrite_query over a batch: the climate‑rich queries are paraphrased
+    together, within `budget_ms` for the batch (default PARAPHRASE_BUDGET_MS)
+    or by per‑query `deadlines`.
+    """
+    tags = [_tag(c) for c in categories]
+
+    # 1. climate‑rich → paraphrase & tag
+    rich  = [i for i, q in enumerate(queries) if _climate_rich(q)]
+    paras = dict(zip(rich, _paraphrase_many([queries[i] for i in rich], budget_ms,
+                                            [deadlines[i] for i in rich] if deadlines else None))) if rich else {}
+
+    # 2. otherwise (or paraphrasing ran out of time) → template using extracted noun phrase
+    return [f"{tag} {paras[i]}" if paras.get(i) is not None else f"{tag} {_template(q, c)}"
+            for i, (q, c, tag) in enumerate(zip(queries, categories, tags))]
+
+def rewrite_query(query: str, category: str) -> str:
+    return rewrite_queries([query], [category])[0]
@@ -0,0 +1,254 @@
+"""
+vector_index.py
+===============
+Dense‑embedding retrieval over climate_outputs/ with a precomputed, memory‑mapped index.
+
+Offline (slow, run after each crawl):
+    python vector_index.py                 # papers + fullText passages
+    python vector_index.py --ivf-lists 64  # also partition the vectors (IVF)
+
+writes <climate_outputs>/.vectors/:
+* vectors.npy  – float16 (rows × dim), L2‑normalised, opened with mmap_mode="r"
+* cats.npy     – uint64 category bitmask per row
+* ids.json     – sidecar: model, row → (paper id, chunk; -1 = title+abstract, else the
+                 passage_index.chunk_text passage number),
+                 category bits, paper doi/title, source file sizes/mtimes
+* ivf_*.npy    – optional: centroids, rows ordered by list, list offsets
+
+Query time: one vectorised dot product over the (masked) rows, or over the
+`nprobe` closest IVF lists only, then argpartition for the top k.
+"""
+import json
+import logging
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+from passage_index import chunk_text
+
+CLIMATE_DIR   = Path(__file__).resolve().parent.parent / "climate_outputs"
+VECTOR_DIR    = CLIMATE_DIR / ".vectors"
+EMBED_MODEL   = os.getenv("EMBED_MODEL", "climatebert/distilroberta-base-climate-f")   # same as prune_climate_kws.py
+IVF_MIN_ROWS  = 20_000      # auto‑partition above this many rows
+NPROBE        = 8           # IVF lists scanned per query
+PAPER_ROW     = -1          # chunk number of a title+abstract row
+
+log = logging.getLogger("vector_index")
+
+# --- build ------------------------------------------------------------
+def _sources(climate_dir: Path) -> dict:
+    return {fp.name: [fp.stat().st_size, fp.stat().st_mtime_ns] for fp in sorted(climate_dir.glob("*.json"))}
+
+def _corpus(climate_dir: Path, passages: bool):
+    """Unique papers with their categories, then one row per text to embed."""
+    papers, cats = {}, {}
+    for fp in sorted(climate_dir.glob("*.json")):
+        with fp.open("r", encoding="utf-8") as f:
+            for item in json.load(f):
+                pid = str(item.get("id"))
+                papers.setdefault(pid, item)
+                cats.setdefault(pid, []).append(fp.stem)
+    rows, texts = [], []
+    for pid, item in papers.items():
+        rows.append([item.get("id"), PAPER_ROW])
+        texts.append(f"{item.get('title') or ''}. {item.get('abstract') or ''}")
+        if passages:
+            for n, chunk in enumerate(chunk_text(item.get("fullText", ""))):
+                rows.append([item.get("id"), n])
+                texts.append(chunk)
+    return papers, cats, rows, texts
+
+def kmeans(x: np.ndarray, k: int, iters: int = 20, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Spherical k‑means (cosine) in numpy; returns (centroids, assignment)."""
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(len(x), size=k, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(x @ centroids.T, axis=1)
+        for j in range(k):
+            members = x[assign == j]
+            if len(members):
+                c = members.sum(axis=0)
+                centroids[j] = c / (np.linalg.norm(c) or 1.0)
+    return centroids, np.argmax(x @ centroids.T, axis=1)
+
+def build(climate_dir: Path = CLIMATE_DIR, out_dir: Path = VECTOR_DIR, model_name: str = EMBED_MODEL,
+          passages: bool = True, ivf_lists: Optional[int] = None, batch_size: int = 64) -> dict:
+    """Embed every paper (and its passages) and write the index; returns a small summary."""
+    from sentence_transformers import SentenceTransformer
+
+    papers, cats, rows, texts = _corpus(climate_dir, passages)
+    model = SentenceTransformer(model_name)
+    dim = model.get_sentence_embedding_dimension()
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    vecs = np.lib.format.open_memmap(out_dir / "vectors.npy", mode="w+", dtype=np.float16, shape=(len(rows), dim))
+    for start in range(0, len(texts), batch_size):
+        emb = model.encode(texts[start:start + batch_size], normalize_embeddings=True, batch_size=batch_size)
+        vecs[start:start + len(emb)] = emb.astype(np.float16)
+    vecs.flush()
+
+    bits = {c: i for i, c in enumerate(sorted({c for cs in cats.values() for c in cs}))}
+    if len(bits) > 64:
+        raise ValueError("vector index supports at most 64 categories")
+    masks = np.zeros(len(rows), dtype=np.uint64)
+    for i, (paper_id, _) in enumerate(rows):
+        for c in cats[str(paper_id)]:
+            masks[i] |= np.uint64(1 << bits[c])
+    np.save(out_dir / "cats.npy", masks)
+
+    if ivf_lists is None:
+        ivf_lists = int(np.sqrt(len(rows))) if len(rows) >= IVF_MIN_ROWS else 0
+    for stale in out_dir.glob("ivf_*.npy"):
+        stale.unlink()
+    if ivf_lists:
+        centroids, assign = kmeans(np.asarray(vecs, dtype=np.float32), ivf_lists)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.searchsorted(assign[order], np.arange(ivf_lists + 1))
+        np.save(out_dir / "ivf_centroids.npy", centroids.astype(np.float32))
+        np.save(out_dir / "ivf_order.npy", order.astype(np.int64))
+        np.save(out_dir / "ivf_offsets.npy", offsets.astype(np.int64))
+
+    sidecar = {
+        "model": model_name,
+        "dim": dim,
+        "rows": rows,
+        "categories": bits,
+        "papers": {pid: {"doi": p.get("doi"), "title": p.get("title")} for pid, p in papers.items()},
+        "sources": _sources(climate_dir),
+    }
+    (out_dir / "ids.json").write_text(json.dumps(sidecar), encoding="utf-8")
+    return {"rows": len(rows), "papers": len(papers), "dim": dim, "ivf_lists": ivf_lists}
+
+# --- query ------------------------------------------------------------
+@lru_cache(maxsize=1)
+def _encoder(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+class VectorIndex:
+    """Memory‑mapped k‑NN over the vectors written by build()."""
+
+    def __init__(self, index_dir: Path = VECTOR_DIR, climate_dir: Path = CLIMATE_DIR):
+        meta = json.loads((index_dir / "ids.json").read_text(encoding="utf-8"))
+        self.model      = meta["model"]
+        self.categories = meta["categories"]
+        self.papers     = meta["papers"]
+        self.row_paper  = np.array([r[0] for r in meta["rows"]], dtype=object)
+        slots: dict[str, int] = {}                  # paper id → dense number, for per‑paper maxima
+        self.row_slot   = np.array([slots.setdefault(str(r[0]), len(slots)) for r in meta["rows"]], dtype=np.int64)
+        self.slot_paper = [None] * len(slots)
+        for r in meta["rows"]:
+            self.slot_paper[slots[str(r[0])]] = r[0]
+        self.row_chunk  = np.array([r[1] for r in meta["rows"]], dtype=np.int32)
+        self.vectors    = np.load(index_dir / "vectors.npy", mmap_mode="r")
+        self.cats       = np.load(index_dir / "cats.npy")
+        self.stale      = meta["sources"] != _sources(climate_dir)
+        if self.stale:              # re‑embedding takes a long time, so it stays an offline job
+            log.warning("%s is older than the JSON files in %s – new papers are missing until "
+                        "`python vector_index.py` is rerun", index_dir, climate_dir)
+        self.ivf = None
+        if (index_dir / "ivf_centroids.npy").exists():
+            self.ivf = tuple(np.load(index_dir / f"ivf_{name}.npy") for name in ("centroids", "order", "offsets"))
+
+    def encode(self, query: str) -> np.ndarray:
+        return _encoder(self.model).encode([query], normalize_embeddings=True)[0].astype(np.float32)
+
+    def _candidates(self, q: np.ndarray, nprobe: int) -> Optional[np.ndarray]:
+        if self.ivf is None or nprobe <= 0:
+            return None
+        centroids, order, offsets = self.ivf
+        lists = np.argsort(-(centroids @ q))[:nprobe]
+        return np.sort(np.concatenate([order[offsets[j]:offsets[j + 1]] for j in lists]))
+
+    def _scored(self, q: np.ndarray, categories: Optional[Iterable[str]], kind: Optional[str],
+                nprobe: int) -> tuple[np.ndarray, np.ndarray]:
+        """(row numbers, cosine scores) of every row that passes the filters."""
+        rows = self._candidates(q, nprobe)
+        keep = np.ones(len(self.cats) if rows is None else len(rows), dtype=bool)
+        chunks = self.row_chunk if rows is None else self.row_chunk[rows]
+        if categories is not None:
+            mask = np.uint64(0)
+            for c in categories:
+                if c in self.categories:
+                    mask |= np.uint64(1 << self.categories[c])
+            keep &= ((self.cats if rows is None else self.cats[rows]) & mask) != 0
+        if kind == "paper":
+            keep &= chunks == PAPER_ROW
+        elif kind == "passage":
+            keep &= chunks != PAPER_ROW
+
+        rows = np.flatnonzero(keep) if rows is None else rows[keep]
+        if not len(rows):
+            return rows, np.empty(0, dtype=np.float32)
+        return rows, self.vectors[rows].astype(np.float32) @ q
+
+    def search(self, query: str | np.ndarray, k: int = 3, categories: Optional[Iterable[str]] = None,
+               kind: Optional[str] = None, nprobe: int = NPROBE) -> list[dict]:
+        """
+        Top‑k rows by cosine similarity.
+        kind: "paper" (title+abstract rows), "passage" (fullText chunks) or None (both).
+        """
+        q = self.encode(query) if isinstance(query, str) else np.asarray(query, dtype=np.float32)
+        rows, scores = self._scored(q, categories, kind, nprobe)
+        if not len(rows):
+            return []
+        top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        out = []
+        for i in top:
+            r = rows[i]
+            pid = self.row_paper[r]
+            out.append({"id": pid, **self.papers[str(pid)], "chunk": int(self.row_chunk[r]), "score": float(scores[i])})
+        return out
+
+    def top_k_papers(self, query: str | np.ndarray, k: int = 3, categories: Optional[Iterable[str]] = None,
+                     nprobe: int = NPROBE) -> list[dict]:
+        """Best k distinct papers, each scored by its best row (abstract or passage) among all scored rows."""
+        q = self.encode(query) if isinstance(query, str) else np.asarray(query, dtype=np.float32)
+        rows, scores = self._scored(q, categories, None, nprobe)
+        if not len(rows):
+            return []
+        best = np.full(len(self.slot_paper), -np.inf, dtype=np.float32)
+        np.maximum.at(best, self.row_slot[rows], scores)
+        found = np.flatnonzero(best > -np.inf)
+        top = found[np.argsort(-best[found])[:k]]
+        return [{"id": self.slot_paper[p], **self.papers[str(self.slot_paper[p])], "score": float(best[p])}
+                for p in top]
+
+@lru_cache(maxsize=1)       # one shared mmap per process
+def _index() -> VectorIndex:
+    return VectorIndex()
+
+# --- kg_client compatible API ------------------------------------------
+def top_three(category: str, query: str = "") -> list[dict]:
+    """Same shape as kg_client.top_three: [{id, doi, title, score}] best first."""
+    return _index().top_k_papers(query, k=3, categories=[category]) if query.strip() else []
+
+
+if __name__ == "__main__":
+    import argparse, time
+    ap = argparse.ArgumentParser(description="Build the dense vector index over climate_outputs")
+    ap.add_argument("--no-passages", action="store_true", help="embed title+abstract only")
+    ap.add_argument("--ivf-lists", type=int, help="IVF partitions (0 = off; default auto above %d rows)" % IVF_MIN_ROWS)
+    ap.add_argument("--query", help="run one query against the existing index instead of building")
+    ap.add_argument("--category")
+    args = ap.parse_args()
+
+    if args.query:
+        idx = VectorIndex()
+        t0 = time.perf_counter()
+        idx.encode(args.query)
+        t1 = time.perf_counter()
+        hits = idx.top_k_papers(args.query, 3, [args.category] if args.category else None)
+        t2 = time.perf_counter()
+        for h in hits:
+            print(f"{h['score']:.3f}  {h['title']}")
+        print(f"✔ encode {1000 * (t1 - t0):.1f} ms (incl. model load), search {1000 * (t2 - t1):.2f} ms")
+    else:
+        t0 = time.perf_counter()
+        s = build(passages=not args.no_passages, ivf_lists=args.ivf_lists)
+        print(f"✔ {s['rows']} vectors ({s['papers']} papers, dim {s['dim']}, IVF lists {s['ivf_lists']}) "
+              f"→ {VECTOR_DIR} in {time.perf_counter() - t0:.1f}s")
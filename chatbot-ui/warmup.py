@@ -0,0 +1,105 @@
+"""
+warmup.py
+=========
+Load (and warm) the models before the server takes traffic, instead of on
+the first request, and report per‑process memory.
+
+Stages (WARMUP env var, read by app.py):
+* load – build the n‑gram model, keyword automaton, NLI and paraphrase
+  pipelines (and the embedding prototypes with CLASSIFIER_MODE=embedding).
+  Safe before fork: no threads, sockets or inference state are created, so
+  gunicorn's master can do it with preload_app and every worker shares the
+  read‑only weights copy‑on‑write (gunicorn.conf.py).
+* full – load, then one inference through each pipeline and a Neo4j
+  connectivity check; run once per serving process.
+
+Usage:
+    WARMUP=full python app.py          # dev server, warm before serving
+    gunicorn -c gunicorn.conf.py app:app
+    curl localhost:5050/healthz/ready
+"""
+import logging
+import os
+import time
+from typing import Callable
+
+log = logging.getLogger("warmup")
+
+WARMUP      = os.getenv("WARMUP", "0").lower()      # "0" (lazy, first request), "load" or "full"
+WARMUP_TEXT = "How much methane do cattle emit and how does it warm the climate?"
+
+STATE = {"stage": "none", "ready": WARMUP in ("0", ""), "pid": os.getpid(), "timings_ms": {}, "error": None}
+
+def _timed(name: str, fn: Callable, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    STATE["timings_ms"][name] = round((time.perf_counter() - start) * 1000, 1)
+    return out
+
+# --- stages -----------------------------------------------------------
+def load_models():
+    """Every lazily loaded model, without running it."""
+    import transformer_rewriter as tr
+    import zero_shot_classifier as zs
+    from ngram_classifier import load_model
+
+    _timed("ngram model", load_model)
+    if zs.KEYWORDS is not None:
+        _timed("keyword automaton", zs._automaton)
+    if zs.CLASSIFIER_MODE == "embedding":
+        from embedding_classifier import _prototypes
+        _timed("embedding prototypes", _prototypes)
+    _timed("nli load", zs._nli)
+    _timed("paraphraser load", tr._paraphraser)
+
+def warm_models():
+    """One pass through each pipeline, so the first request does not pay for allocations."""
+    import transformer_rewriter as tr
+    import zero_shot_classifier as zs
+
+    category = _timed("nli first call", zs._nli_guess, WARMUP_TEXT)
+    _timed("paraphraser first call", tr._paraphraser(), WARMUP_TEXT)
+    _timed("rewrite_query", tr.rewrite_query, WARMUP_TEXT, category)
+
+def connect_neo4j():
+    from kg_client import _driver
+    _timed("neo4j connect", lambda: _driver().verify_connectivity())
+
+def warm_up(stage: str = "full", neo4j: bool = False) -> dict:
+    """Run `stage` ("load" or "full") and mark the process ready; errors leave it not ready."""
+    STATE.update(ready=False, pid=os.getpid(), error=None)
+    start = time.perf_counter()
+    try:
+        load_models()
+        if stage == "full":
+            warm_models()
+            if neo4j:
+                connect_neo4j()
+    except Exception as e:          # keep serving (lazily); /healthz/ready reports it
+        log.exception("warm-up (%s) failed", stage)
+        STATE.update(error=f"{type(e).__name__}: {e}")
+        return STATE
+    STATE.update(stage=stage, ready=True)
+    log.info("warm-up (%s) done in %.0f ms, pid %d: %s", stage, (time.perf_counter() - start) * 1000,
+             os.getpid(), STATE["timings_ms"])
+    return STATE
+
+# --- memory -----------------------------------------------------------
+def memory(pid: int | str = "self") -> dict:
+    """Resident memory of a process in MB: rss, pss (shared pages split between sharers), shared, private."""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if rest.strip().endswith("kB"):
+                    fields[key] = int(rest.split()[0]) / 1024
+    except OSError:                 # not Linux: peak RSS of this process only
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"rss_mb": round(peak / (1 << 20 if sys.platform == "darwin" else 1024), 1)}
+    shared = fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+    private = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {"rss_mb": round(fields.get("Rss", 0), 1), "pss_mb": round(fields.get("Pss", 0), 1),
+            "shared_mb": round(shared, 1), "private_mb": round(private, 1)}
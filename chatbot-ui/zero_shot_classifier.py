@@ -3,54 +3,142 @@ zero_shot_classifier.py
 =======================
 Zero‑shot category detector with optional keyword map.
 
+* If a trained n‑gram model exists (train_ngram_classifier.py) it is
+  tried first; a prediction below NGRAM_MIN_PROB falls through.
 * If keyword_map.py exists (generated by categorize_keywords.py)
-  it will do a fast substring vote first.
+  it will do a fast keyword vote next (one Aho–Corasick pass,
+  see keyword_automaton.py).
 * Otherwise, it falls back directly to the transformer NLI model.
+* CLASSIFIER_MODE=embedding puts embedding_classifier.py in front of
+  NLI: NLI only runs when its margin is below EMBED_MARGIN.
 
 Usage:
     from zero_shot_classifier import predict_category
+    predict_categories(queries)     # batch; NLI runs once for all that need it
+    rank_categories(query, k=3)     # [(category, weight)] for multi‑category retrieval
 """
+import math
+import os
 from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 from categories import CATEGORIES
+from keyword_automaton import KeywordAutomaton
 from keyword_map import KEYWORDS
+from ngram_classifier import MIN_PROB as NGRAM_MIN_PROB, load_model
+
+CLASSIFIER_MODE = os.getenv("CLASSIFIER_MODE", "nli").lower()     # "nli" or "embedding"
 
 # --- optional keyword map -------------------------------------------
 # KEYWORDS = None
 if Path(__file__).with_name("keyword_map.py").exists():
     from keyword_map import KEYWORDS  # type: ignore
 
+@lru_cache(maxsize=1)       # compiled once per process
+def _automaton() -> KeywordAutomaton:
+    return KeywordAutomaton(KEYWORDS)
+
 def _keyword_vote(q: str) -> Optional[str]:
     if KEYWORDS is None:
         return None
-    q_lower = q.lower()
-    for cat, kws in KEYWORDS.items():
-        if any(k in q_lower for k in kws):
-            return cat
-    return None
+    return _automaton().best(q)
 
 # --- zero‑shot classifier -------------------------------------------
-from transformers import pipeline
+from inference_backend import load_pipeline
+
+NLI_MODEL = "facebook/bart-large-mnli"
 
 @lru_cache(maxsize=1)
 def _nli():
-    return pipeline(
-        "zero-shot-classification",
-        model="facebook/bart-large-mnli",
-        device_map="auto",          # GPU if available
-    )
+    # torch (GPU if available), int8 or onnx – see INFERENCE_BACKEND in inference_backend.py
+    return load_pipeline("zero-shot-classification", NLI_MODEL)
 
-def _nli_guess(query: str) -> str:
+def _nli_scores(queries: list[str]) -> list[dict[str, float]]:
+    """{category: entailment share} per query: one pipeline call, padded together."""
     res = _nli()(
-        query,
+        queries,
         candidate_labels=CATEGORIES,
-        hypothesis_template="This query is about {}."
+        hypothesis_template="This query is about {}.",
+        batch_size=len(queries),
     )
-    return res["labels"][0]
+    return [dict(zip(r["labels"], r["scores"])) for r in (res if isinstance(res, list) else [res])]
+
+def _nli_guesses(queries: list[str]) -> list[str]:
+    """_nli_guess over a batch."""
+    return [max(scores, key=scores.get) for scores in _nli_scores(queries)]
+
+def _nli_guess(query: str) -> str:
+    return _nli_guesses([query])[0]
+
+def _cheap_guess(query: str) -> Optional[str]:
+    """n‑gram model, keyword vote, embeddings – None when only NLI can decide."""
+    model = load_model()
+    if model is not None:
+        cat, prob = model.predict(query)
+        if prob >= NGRAM_MIN_PROB:
+            return cat
+    kw = _keyword_vote(query)
+    if kw:
+        return kw
+    if CLASSIFIER_MODE == "embedding":
+        from embedding_classifier import MARGIN, classify
+        cat, margin = classify(query)
+        if margin >= MARGIN:
+            return cat
+    return None
+
+def predict_categories(queries: list[str]) -> list[str]:
+    """predict_category over a batch: the queries that reach NLI share one batched call."""
+    cats = [_cheap_guess(q) for q in queries]
+    hard = [i for i, c in enumerate(cats) if c is None]
+    if hard:
+        for i, cat in zip(hard, _nli_guesses([queries[i] for i in hard])):
+            cats[i] = cat
+    return cats
 
 def predict_category(query: str) -> str:
     """Return best‑guess category string."""
-    kw = _keyword_vote(query)
-    return kw if kw else _nli_guess(query)
+    return predict_categories([query])[0]
+
+# --- ranked categories (multi‑category retrieval) -------------------
+TOP_CATEGORIES = int(os.getenv("RETRIEVAL_CATEGORIES", "1"))      # >1: app.py retrieves across the top ones
+MIN_SHARE      = float(os.getenv("CATEGORY_MIN_SHARE", "0.1"))    # drop runners‑up below this weight
+EMBED_TEMP     = 0.05       # softmax temperature for cosine similarities (their gaps are small)
+
+def _cheap_scores(query: str) -> Optional[dict[str, float]]:
+    """Category scores from the same cheap steps as _cheap_guess – None when only NLI can rank."""
+    model = load_model()
+    if model is not None:
+        probs = model.probabilities(query)
+        if max(probs) >= NGRAM_MIN_PROB:
+            return dict(zip(model.categories, probs))
+    if KEYWORDS is not None:
+        votes = _automaton().votes(query)
+        if votes:           # a tie is fine here: both categories get searched
+            return votes
+    if CLASSIFIER_MODE == "embedding":
+        from embedding_classifier import MARGIN, similarities
+        sims = [float(x) for x in similarities(query)]
+        first, second = sorted(sims, reverse=True)[:2]
+        if first - second >= MARGIN:
+            return {c: math.exp((x - first) / EMBED_TEMP) for c, x in zip(CATEGORIES, sims)}
+    return None
+
+def _top(scores: dict[str, float], k: int) -> list[tuple[str, float]]:
+    ranked = sorted(((c, s) for c, s in scores.items() if s > 0), key=lambda kv: kv[1], reverse=True)[:k]
+    total = sum(s for _, s in ranked) or 1.0
+    return [(c, round(s / total, 4)) for i, (c, s) in enumerate(ranked) if i == 0 or s / total >= MIN_SHARE]
+
+def rank_categories_many(queries: list[str], k: int = TOP_CATEGORIES) -> list[list[tuple[str, float]]]:
+    """Per query, up to k (category, weight) pairs, best first; weights are shares of the top k."""
+    scores = [_cheap_scores(q) for q in queries]
+    hard = [i for i, s in enumerate(scores) if s is None]
+    if hard:
+        for i, nli in zip(hard, _nli_scores([queries[i] for i in hard])):
+            scores[i] = nli
+    return [_top(s, k) for s in scores]
+
+def rank_categories(query: str, k: int = TOP_CATEGORIES) -> list[tuple[str, float]]:
+    """[(category, weight)] best first, e.g. [("greenhouse gases", 0.71), ("climate nature", 0.29)]."""
+    return rank_categories_many([query], k)[0]
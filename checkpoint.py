@@ -0,0 +1,121 @@
+import json
+import os
+
+
+####################################################################################################
+# GLOBALS
+####################################################################################################
+
+FSYNC_EVERY = 16            # records written between two fsyncs
+
+
+class CheckpointLog:
+    """
+    Append-only JSONL checkpoint for one category crawl. Each line is one record:
+        {"paper": {...}}          a paper with full text was collected
+        {"seen": <work id>}       a search result was handled (kept or not)
+        {"cursor": [page, offset]} position of the next search result to handle
+    Appending costs O(1) per paper, and replaying the log restores the exact crawl position.
+    """
+
+    def __init__(self, path, fsync_every=FSYNC_EVERY):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.papers = []
+        self.seen = set()
+        self.cursor = (1, 0)
+        self._file = None
+        self._pending = 0
+
+    def load(self):
+        """
+        Replays the log. A torn last line from a crash is cut off, so the next append starts
+        on a line of its own; any other unreadable line is skipped.
+        Returns:
+            tuple: (papers, seen IDs, (page, offset) cursor).
+        """
+        if os.path.exists(self.path):
+            with open(self.path, 'rb+') as f:
+                end = 0                 # byte offset just past the last complete line
+                replayed = {paper.get('id') for paper in self.papers}
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        f.truncate(end)
+                        break
+                    end += len(line)
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if "paper" in record:
+                        if record["paper"].get('id') in replayed:      # e.g. migrated twice
+                            continue
+                        replayed.add(record["paper"].get('id'))
+                        self.papers.append(record["paper"])
+                        self.seen.add(record["paper"].get('id'))
+                    elif "seen" in record:
+                        self.seen.add(record["seen"])
+                    elif "cursor" in record:
+                        self.cursor = tuple(record["cursor"])
+        return self.papers, self.seen, self.cursor
+
+    def migrate_legacy(self, legacy_file, page_size):
+        """
+        Imports a `<query>_temp.json` file written by older versions, whose only cursor was
+        the number of papers collected. Only the log is written; call load() afterwards.
+        Args:
+            legacy_file (str): Path to the old temp file.
+            page_size (int): Search page size used by the crawler.
+        """
+        if os.path.exists(self.path) or not os.path.exists(legacy_file):
+            return
+        with open(legacy_file, 'r', encoding='utf-8') as f:
+            papers = json.load(f)
+        for paper in papers:
+            self._append({"paper": paper})
+        self._append({"cursor": [(len(papers) // page_size) + 1, 0]})
+        self.close()
+        os.remove(legacy_file)
+
+    def _append(self, record):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(record) + "\n")
+        self._pending += 1
+        if self._pending >= self.fsync_every:
+            self.flush(force=True)
+
+    def add_paper(self, paper):
+        self.papers.append(paper)
+        self.seen.add(paper.get('id'))
+        self._append({"paper": paper})
+
+    def mark_seen(self, work_id):
+        if work_id not in self.seen:
+            self.seen.add(work_id)
+            self._append({"seen": work_id})
+
+    def advance(self, page, offset):
+        self.cursor = (page, offset)
+        self._append({"cursor": [page, offset]})
+
+    def flush(self, force=False):
+        """Flushes buffered records; fsyncs when `force` is set or the batch is full."""
+        if self._file is None:
+            return
+        self._file.flush()
+        if force or self._pending >= self.fsync_every:
+            os.fsync(self._file.fileno())
+            self._pending = 0
+
+    def close(self):
+        self.flush(force=True)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        """Deletes the log once the category is complete."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
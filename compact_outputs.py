@@ -0,0 +1,220 @@
+import argparse
+import glob
+import gzip
+import json
+import os
+import pathlib
+import time
+import zlib
+
+try:                        # optional: better ratio and much faster decompression than zlib
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+####################################################################################################
+# GLOBALS
+####################################################################################################
+
+INPUT_DIR = "climate_outputs"
+COMPACT_DIR = "climate_compact"
+META_FILE = "meta.json.gz"          # metadata columns, one entry per paper
+TEXT_FILE = "fulltext.bin"          # independently compressed fullText blocks
+META_COLUMNS = ("id", "doi", "title", "abstract", "source")
+FORMAT_VERSION = 1
+
+
+def _compressor(codec, level):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress
+    return lambda data: zlib.compress(data, level)
+
+
+def _decompressor(codec):
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress
+    return zlib.decompress
+
+
+def convert(input_dir=INPUT_DIR, output_dir=COMPACT_DIR, codec=None, level=None):
+    """
+    Converts the category JSON files into the compact format.
+    Papers that appear in several categories are stored once, with all their categories.
+    Args:
+        input_dir (str): Directory holding the <category>.json files.
+        output_dir (str): Directory to write meta.json.gz and fulltext.bin to.
+        codec (str): "zstd" or "zlib"; defaults to zstd when the zstandard package is installed.
+        level (int): Compression level (default 10 for zstd, 6 for zlib).
+    Returns:
+        dict: Summary with the number of papers and bytes written.
+    """
+    codec = codec or ("zstd" if zstandard else "zlib")
+    if codec == "zstd" and zstandard is None:
+        raise RuntimeError("codec 'zstd' needs the zstandard package (pip install zstandard)")
+    compress = _compressor(codec, level if level is not None else (10 if codec == "zstd" else 6))
+    os.makedirs(output_dir, exist_ok=True)
+
+    columns = {name: [] for name in META_COLUMNS + ("categories", "text_offset", "text_length")}
+    row_of = {}
+    with open(os.path.join(output_dir, TEXT_FILE), "wb") as out:
+        for path in sorted(glob.glob(os.path.join(input_dir, "*.json"))):
+            category = pathlib.Path(path).stem
+            with open(path, "r", encoding="utf-8") as f:
+                papers = json.load(f)
+            for paper in papers:
+                key = str(paper.get("id"))
+                if key in row_of:       # already stored under another category
+                    columns["categories"][row_of[key]].append(category)
+                    continue
+                row_of[key] = len(columns["id"])
+                for name in META_COLUMNS:
+                    columns[name].append(paper.get(name))
+                columns["categories"].append([category])
+                block = compress((paper.get("fullText") or "").encode("utf-8"))
+                columns["text_offset"].append(out.tell())
+                columns["text_length"].append(len(block))
+                out.write(block)
+
+    meta = {"version": FORMAT_VERSION, "codec": codec, "columns": columns}
+    with gzip.open(os.path.join(output_dir, META_FILE), "wt", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    size = sum(os.path.getsize(os.path.join(output_dir, name)) for name in (META_FILE, TEXT_FILE))
+    return {"papers": len(row_of), "bytes": size, "codec": codec}
+
+
+class CompactCorpus:
+    """
+    Reader for the compact format. Only the metadata columns are loaded up front; each paper's
+    fullText is read and decompressed on demand, by ID, with one seek.
+    """
+
+    def __init__(self, directory=COMPACT_DIR):
+        self.directory = directory
+        with gzip.open(os.path.join(directory, META_FILE), "rt", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compact format version {meta.get('version')}")
+        self.codec = meta["codec"]
+        self.columns = meta["columns"]
+        self._decompress = _decompressor(self.codec)
+        self._row = {str(paper_id): i for i, paper_id in enumerate(self.columns["id"])}
+        self._text = open(os.path.join(directory, TEXT_FILE), "rb")
+
+    def __len__(self):
+        return len(self._row)
+
+    def __contains__(self, paper_id):
+        return str(paper_id) in self._row
+
+    def categories(self):
+        """
+        Returns:
+            list: Every category name, sorted.
+        """
+        return sorted({c for cats in self.columns["categories"] for c in cats})
+
+    def metadata(self, paper_id):
+        """
+        Returns the metadata of one paper (no fullText).
+        Args:
+            paper_id (int | str): The paper ID.
+        Returns:
+            dict: id, doi, title, abstract, source and categories.
+        """
+        i = self._row[str(paper_id)]
+        row = {name: self.columns[name][i] for name in META_COLUMNS}
+        row["categories"] = self.columns["categories"][i]
+        return row
+
+    def full_text(self, paper_id):
+        """
+        Reads and decompresses one paper's fullText.
+        Args:
+            paper_id (int | str): The paper ID.
+        Returns:
+            str: The full text.
+        """
+        i = self._row[str(paper_id)]
+        self._text.seek(self.columns["text_offset"][i])
+        return self._decompress(self._text.read(self.columns["text_length"][i])).decode("utf-8")
+
+    def papers(self, category=None, with_text=False):
+        """
+        Iterates papers as dicts shaped like the climate_outputs records.
+        Args:
+            category (str): Only papers of this category (file stem, e.g. "greenhouse_gases").
+            with_text (bool): Also decompress fullText (skipped by default).
+        Yields:
+            dict: One paper.
+        """
+        for i, paper_id in enumerate(self.columns["id"]):
+            if category is not None and category not in self.columns["categories"][i]:
+                continue
+            row = self.metadata(paper_id)
+            if with_text:
+                row["fullText"] = self.full_text(paper_id)
+            yield row
+
+    def close(self):
+        self._text.close()
+
+
+def benchmark(input_dir=INPUT_DIR, output_dir=COMPACT_DIR):
+    """Prints sizes and load times of the JSON files against the compact format."""
+    json_files = sorted(glob.glob(os.path.join(input_dir, "*.json")))
+    json_bytes = sum(os.path.getsize(p) for p in json_files)
+
+    start = time.perf_counter()
+    summary = convert(input_dir, output_dir)
+    convert_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    all_papers = [p for path in json_files for p in json.load(open(path, "r", encoding="utf-8"))]
+    json_load_s = time.perf_counter() - start
+    sample_id = max(all_papers, key=lambda p: len(p.get("fullText") or ""))["id"]
+
+    start = time.perf_counter()
+    corpus = CompactCorpus(output_dir)
+    meta_load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    text = corpus.full_text(sample_id)
+    one_text_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for paper in corpus.papers(with_text=True):
+        pass
+    all_text_s = time.perf_counter() - start
+    corpus.close()
+
+    meta_bytes = os.path.getsize(os.path.join(output_dir, META_FILE))
+    print(f"JSON       : {len(json_files)} files, {json_bytes / 1e6:.2f} MB, "
+          f"json.load all {json_load_s * 1000:.1f} ms")
+    print(f"Compact    : {summary['papers']} papers ({summary['codec']}), {summary['bytes'] / 1e6:.2f} MB "
+          f"({meta_bytes / 1e3:.1f} KB metadata), converted in {convert_s * 1000:.1f} ms")
+    print(f"Ratio      : {json_bytes / summary['bytes']:.1f}x smaller")
+    print(f"Metadata   : loaded in {meta_load_s * 1000:.1f} ms (no fullText touched)")
+    print(f"One paper  : {len(text)} chars of fullText by ID in {one_text_s * 1000:.2f} ms")
+    print(f"All papers : metadata + every fullText in {all_text_s * 1000:.1f} ms")
+
+
+def main():
+    """Converts climate_outputs to the compact format, or benchmarks it with --bench."""
+    parser = argparse.ArgumentParser(description="Compact columnar/compressed copy of climate_outputs")
+    parser.add_argument("--input-dir", default=INPUT_DIR)
+    parser.add_argument("--output-dir", default=COMPACT_DIR)
+    parser.add_argument("--codec", choices=("zstd", "zlib"))
+    parser.add_argument("--bench", action="store_true", help="compare sizes and load times with the JSON files")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.input_dir, args.output_dir)
+        return
+    summary = convert(args.input_dir, args.output_dir, args.codec)
+    print(f"Wrote {summary['papers']} papers ({summary['bytes'] / 1e6:.2f} MB, {summary['codec']}) to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from collections import OrderedDict
+
+import requests
+
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from text_validator import TextValidator, validate_stream
+
+
+####################################################################################################
+# GLOBALS
+####################################################################################################
+
+CACHE_DIR = os.getenv("CORE_CACHE_DIR", ".core_cache")                     # on-disk response cache
+CACHE_MAX_BYTES = int(os.getenv("CORE_CACHE_MAX_BYTES", 2 * 1024**3))       # LRU eviction above this size
+CACHE_FRESH_SECONDS = int(os.getenv("CORE_CACHE_FRESH_SECONDS", 7 * 86400)) # served without revalidation
+POOL_SIZE = 32              # keep-alive connections per host
+KEY_HEADERS = ("Accept",)   # request headers that change the response body (Authorization is never stored)
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "X-RateLimit-Remaining")
+STREAM_CHUNK = 64 * 1024    # bytes read at a time from streamed downloads
+
+
+class CacheEntry:
+    """A cached response: its metadata (url, headers, stored_at, size) and raw body."""
+
+    def __init__(self, key, meta, body):
+        self.key = key
+        self.meta = meta
+        self.body = body
+
+    @property
+    def headers(self):
+        return self.meta.get("headers", {})
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of CORE responses. Each request (URL + params + body-relevant
+    headers) hashes to one key, stored as <key>.body next to <key>.meta. The total size is bounded
+    by evicting the least recently used entries; stale entries are revalidated with
+    If-None-Match / If-Modified-Since instead of downloaded again.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, fresh_seconds=CACHE_FRESH_SECONDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.fresh_seconds = fresh_seconds
+        self.hits = self.revalidated = self.misses = self.evictions = 0
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()       # key -> size, least recently used first
+        self._total = 0
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        """Rebuilds the LRU order from the access times of the meta files."""
+        found = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".meta"):
+                key = name[:-5]
+                body_path = self._path(key, "body")
+                if os.path.exists(body_path):
+                    found.append((os.path.getmtime(self._path(key, "meta")), key, os.path.getsize(body_path)))
+        for _, key, size in sorted(found):
+            self._lru[key] = size
+            self._total += size
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, f"{key}.{suffix}")
+
+    @staticmethod
+    def key_for(url, params=None, headers=None):
+        """
+        Hashes a request into its cache key.
+        Args:
+            url (str): Request URL.
+            params (dict): Query parameters.
+            headers (dict): Request headers; only KEY_HEADERS are part of the key.
+        Returns:
+            str: Hex digest identifying the request.
+        """
+        headers = CaseInsensitiveDict(headers or {})
+        canonical = json.dumps([
+            url,
+            sorted((str(k), str(v)) for k, v in (params or {}).items()),
+            [headers.get(h) for h in KEY_HEADERS],
+        ])
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def load(self, key):
+        """
+        Returns the cached entry for `key` and marks it as recently used, or None.
+        """
+        try:
+            with open(self._path(key, "meta"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(self._path(key, "body"), "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        self._touch(key)
+        return CacheEntry(key, meta, body)
+
+    def is_fresh(self, entry):
+        return time.time() - entry.meta.get("stored_at", 0) < self.fresh_seconds
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Validators to send when revalidating a stale entry."""
+        headers = {}
+        if entry.headers.get("ETag"):
+            headers["If-None-Match"] = entry.headers["ETag"]
+        if entry.headers.get("Last-Modified"):
+            headers["If-Modified-Since"] = entry.headers["Last-Modified"]
+        return headers
+
+    def store(self, key, url, headers, body):
+        """
+        Writes a 200 response to the cache, evicting old entries if the size bound is exceeded.
+        Args:
+            key (str): Cache key from key_for.
+            url (str): Request URL (kept for debugging).
+            headers (Mapping): Response headers.
+            body (bytes): Raw response body.
+        """
+        meta = {
+            "url": url,
+            "stored_at": time.time(),
+            "size": len(body),
+            "headers": {h: headers[h] for h in STORED_HEADERS if h in headers},
+        }
+        tmp = self._path(key, "body.tmp")
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, self._path(key, "body"))
+        with open(self._path(key, "meta"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+        with self._lock:
+            self._total += len(body) - self._lru.pop(key, 0)
+            self._lru[key] = len(body)
+        self._evict()
+
+    def refresh(self, entry):
+        """Marks a revalidated (304) entry as fresh again."""
+        entry.meta["stored_at"] = time.time()
+        with open(self._path(entry.key, "meta"), "w", encoding="utf-8") as f:
+            json.dump(entry.meta, f)
+        self._touch(entry.key)
+
+    def _touch(self, key):
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+        try:
+            os.utime(self._path(key, "meta"))
+        except OSError:
+            pass
+
+    def _evict(self):
+        while True:
+            with self._lock:
+                if self._total <= self.max_bytes or len(self._lru) <= 1:
+                    return
+                key, size = self._lru.popitem(last=False)
+                self._total -= size
+                self.evictions += 1
+            for suffix in ("body", "meta"):
+                try:
+                    os.remove(self._path(key, suffix))
+                except OSError:
+                    pass
+
+    def stats(self):
+        return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses,
+                "evictions": self.evictions, "entries": len(self._lru), "bytes": self._total}
+
+
+def _cached_response(url, entry):
+    """Builds a requests.Response from a cache entry so callers can't tell the difference."""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = entry.body
+    response.headers = CaseInsensitiveDict(entry.headers)
+    response.encoding = "utf-8"
+    response.from_cache = True
+    return response
+
+
+class CoreClient:
+    """
+    One pooled HTTP client for every CORE API call, backed by a ResponseCache.
+    Fresh cache hits cost no network I/O; stale ones are revalidated with a conditional GET.
+    """
+
+    def __init__(self, api_key=None, cache=None, pool_size=POOL_SIZE):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+        self.cache = cache
+
+    def get(self, url, params=None, headers=None, timeout=60):
+        """
+        Drop-in replacement for requests.get on CORE endpoints.
+        Args:
+            url (str): Request URL.
+            params (dict): Query parameters.
+            headers (dict): Extra request headers.
+            timeout (int): Timeout in seconds.
+        Returns:
+            requests.Response: The live or cached response; cached ones have `from_cache = True`.
+        """
+        if self.cache is None:
+            return self.session.get(url, params=params, headers=headers, timeout=timeout)
+
+        key = self.cache.key_for(url, params, headers)
+        entry = self.cache.load(key)
+        if entry and self.cache.is_fresh(entry):
+            self.cache.hits += 1
+            return _cached_response(url, entry)
+
+        request_headers = dict(headers or {})
+        if entry:
+            request_headers.update(self.cache.conditional_headers(entry))
+        try:
+            response = self.session.get(url, params=params, headers=request_headers, timeout=timeout)
+        except requests.exceptions.RequestException:
+            if entry:       # CORE unreachable: a stale answer beats none
+                self.cache.hits += 1
+                return _cached_response(url, entry)
+            raise
+
+        if response.status_code == 304 and entry:
+            self.cache.revalidated += 1
+            self.cache.refresh(entry)
+            return _cached_response(url, entry)
+        self.cache.misses += 1
+        if response.status_code == 200:
+            self.cache.store(key, url, response.headers, response.content)
+        return response
+
+    def get_text(self, url, headers=None, timeout=90, validator=None):
+        """
+        Streams a text download through `validator` (see text_validator.TextValidator), aborting
+        the transfer as soon as the validator rejects it. Accepted bodies are cached like get().
+        Args:
+            url (str): Request URL.
+            headers (dict): Extra request headers.
+            timeout (int): Timeout in seconds.
+            validator (TextValidator): Validator fed with every decoded chunk.
+        Returns:
+            tuple: (text or None if rejected, validator).
+        """
+        validator = validator or TextValidator()
+        key = entry = None
+        if self.cache is not None:
+            key = self.cache.key_for(url, None, headers)
+            entry = self.cache.load(key)
+            if entry and self.cache.is_fresh(entry):
+                self.cache.hits += 1
+                return validate_stream([entry.body], validator)
+
+        request_headers = dict(headers or {})
+        if entry:
+            request_headers.update(self.cache.conditional_headers(entry))
+        with self.session.get(url, headers=request_headers, timeout=timeout, stream=True) as response:
+            if response.status_code == 304 and entry:
+                self.cache.revalidated += 1
+                self.cache.refresh(entry)
+                return validate_stream([entry.body], validator)
+            response.raise_for_status()
+            text, validator = validate_stream(
+                response.iter_content(STREAM_CHUNK), validator, response.encoding or "utf-8")
+
+            if self.cache is not None:
+                self.cache.misses += 1
+                if text is not None:     # stored as UTF-8 so cache hits decode the same way
+                    self.cache.store(key, url, response.headers, text.encode("utf-8"))
+        return text, validator
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,131 @@
+import glob
+import hashlib
+import json
+import os
+import re
+
+from checkpoint import CheckpointLog
+
+
+def content_hash(text):
+    """
+    Hashes full text after normalising case and whitespace, so the same paper served under
+    two CORE IDs (or with different line wrapping) collides.
+    Args:
+        text (str): Full text of a paper.
+    Returns:
+        str: Hex digest of the normalised text.
+    """
+    normalised = re.sub(r"\s+", " ", text).strip().lower()
+    return hashlib.sha1(normalised.encode("utf-8")).hexdigest()
+
+
+class DedupIndex:
+    """
+    Global seen-ID and content-hash index shared by every category crawl. A paper that matches a
+    second category is not downloaded again: the known record is reused and the new category is
+    recorded as an extra membership.
+    """
+
+    def __init__(self):
+        self.by_id = {}         # work id -> paper record (with fullText); duplicate IDs map to the known record
+        self.by_hash = {}       # content hash -> work id
+        self.categories = {}    # work id -> set of categories the paper belongs to
+        self.aliases = 0        # work ids registered as content duplicates of another paper
+        self.id_hits = 0
+        self.content_hits = 0
+        self.downloads_avoided = 0
+
+    def load_outputs(self, output_dir):
+        """
+        Registers every paper already on disk: finished category files and checkpoint logs.
+        Args:
+            output_dir (str): Directory holding <category>.json and <category>_temp.jsonl files.
+        """
+        for path in glob.glob(os.path.join(output_dir, "*.json")):
+            if path.endswith("_temp.json"):
+                continue
+            category = os.path.basename(path)[:-len(".json")].replace('_', ' ')
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    papers = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"  Could not index {path}: {e}")
+                continue
+            for paper in papers:
+                self.add(paper, category)
+
+        for path in glob.glob(os.path.join(output_dir, "*_temp.jsonl")):
+            category = os.path.basename(path)[:-len("_temp.jsonl")].replace('_', ' ')
+            papers, _, _ = CheckpointLog(path).load()
+            for paper in papers:
+                self.add(paper, category)
+        print(f"Dedup index: {len(self.by_id) - self.aliases} known papers")
+
+    def _alias(self, work_id, paper):
+        """Maps `work_id` to the known record `paper`, so the next lookup(work_id) is an ID hit."""
+        if work_id is not None and work_id not in self.by_id:
+            self.by_id[work_id] = paper
+            self.aliases += 1
+
+    def add(self, paper, category):
+        """
+        Registers a collected paper under `category`. A paper whose text is already known under
+        another work ID becomes an alias of that record.
+        Returns:
+            dict: The record the paper is known by (`paper` itself unless it is a duplicate).
+        """
+        work_id = paper.get('id')
+        known = self.by_id.get(work_id)
+        if known is None and paper.get('fullText'):
+            digest = content_hash(paper['fullText'])
+            if digest in self.by_hash:
+                known = self.by_id[self.by_hash[digest]]
+                self._alias(work_id, known)
+            else:
+                self.by_hash[digest] = work_id
+        if known is None:
+            known = self.by_id[work_id] = paper
+        self.categories.setdefault(known.get('id'), set()).add(category)
+        return known
+
+    def lookup(self, work_id):
+        """
+        Returns the known record for `work_id`, counting an ID hit, or None.
+        """
+        paper = self.by_id.get(work_id)
+        if paper is not None:
+            self.id_hits += 1
+        return paper
+
+    def lookup_text(self, text, work_id=None):
+        """
+        Returns the known record whose full text matches `text`, counting a content hit, or None.
+        `work_id`, the ID the text was fetched under, is registered as an alias of that record.
+        """
+        known_id = self.by_hash.get(content_hash(text))
+        if known_id is None or known_id == work_id:
+            return None
+        self.content_hits += 1
+        self._alias(work_id, self.by_id[known_id])
+        return self.by_id[known_id]
+
+    def in_category(self, work_id, category):
+        return category in self.categories.get(work_id, ())
+
+    def record_membership(self, paper, category, download_avoided=True):
+        """
+        Records a known paper as also belonging to `category`.
+        Args:
+            paper (dict): The known paper record.
+            category (str): The extra category.
+            download_avoided (bool): Whether a full-text download was skipped because of the hit.
+        """
+        self.categories.setdefault(paper.get('id'), set()).add(category)
+        if download_avoided:
+            self.downloads_avoided += 1
+
+    def stats(self):
+        multi = sum(1 for cats in self.categories.values() if len(cats) > 1)
+        return {"papers": len(self.by_id) - self.aliases, "aliases": self.aliases, "id_hits": self.id_hits, "content_hits": self.content_hits,
+                "downloads_avoided": self.downloads_avoided, "multi_category_papers": multi}
@@ -3,12 +3,15 @@ import io
 import json
 import os
 import random
-import re
 import requests
 import time
 
+from checkpoint import CheckpointLog
 from contextlib import suppress
+from core_client import CACHE_DIR, CoreClient, ResponseCache
+from dedup_index import DedupIndex
 from dotenv import load_dotenv
+from text_validator import REJECT, TextValidator, validate_text
 
 
 ####################################################################################################
@@ -17,6 +20,7 @@ from dotenv import load_dotenv
 
 load_dotenv()
 API_KEY = os.getenv("CORE_API_KEY")     # from .env to make API calls to CORE
+API_BASE = os.getenv("CORE_API_BASE", "https://api.core.ac.uk/v3")  # override to point at a mirror or mock server
 OUTPUT_DIR = "climate_outputs"
 os.makedirs(OUTPUT_DIR, exist_ok=True)  # output directory containing 13 JSON files, 1 for each category
 
@@ -25,6 +29,20 @@ BATCH_SIZE = 25             # number of papers searched per batch
 MAX_RETRIES = 5             # max number of retries for API requests on error
 RETRY_DELAY_BASE = 3.0      # base delay for exponential backoff when encountering errors
 
+# one pooled client for every CORE call; responses are cached on disk (set CORE_CACHE_DIR= to disable)
+CLIENT = CoreClient(API_KEY, ResponseCache(CACHE_DIR) if CACHE_DIR else None)
+
+# seen-ID / content-hash index shared by all categories, filled from OUTPUT_DIR in main()
+DEDUP = DedupIndex()
+
+# same as anchors in prune_climate_kws.py, obtained from Climate-Change-NER predefined categories
+CATEGORIES = [
+    "climate assets", "climate datasets", "greenhouse gases", "climate hazards",
+    "climate impacts", "climate mitigation", "climate models", "climate nature",
+    "climate observations", "climate organisms", "climate organizations",
+    "origins of climate problems", "climate properties",
+]
+
 
 def is_valid_text(text):
     """
@@ -35,29 +53,13 @@ def is_valid_text(text):
         bool: True if the text is valid, False otherwise."""
     if not text:
         return False
-        
-    # check if it is a PDF file
-    if text.startswith("%PDF-"):
-        print("  ✗ Received PDF data instead of text")
-        return False
-        
-    # check if it is binary data
-    if "\0" in text or text.count('\ufffd') > 5:
-        print("  ✗ Received binary data")
-        return False
-        
-    # check for sufficient alphanumeric content
-    alphanumeric_count = sum(c.isalnum() for c in text)
-    if alphanumeric_count < 200:
-        print(f"  ✗ Insufficient content: only {alphanumeric_count} alphanumeric chars")
-        return False
-        
-    # check for a reasonable word count
-    words = re.findall(r'\b\w+\b', text)
-    if len(words) < 100:
-        print(f"  ✗ Insufficient content: only {len(words)} words")
+    
+    # single pass with early exit: stops reading as soon as the text is accepted or rejected
+    validator = validate_text(text)
+    if validator.state == REJECT:
+        print(f"  ✗ {validator.reason}")
         return False
-        
+    
     return True
 
 
@@ -108,7 +110,7 @@ def search_papers(query, page=1, page_size=BATCH_SIZE):
     Returns:
         list: A list of papers matching the query.
     """
-    url = "https://api.core.ac.uk/v3/search/works"  # search through works as opposed to authors or just abstracts
+    url = f"{API_BASE}/search/works"  # search through works as opposed to authors or just abstracts
     headers = {
         "Authorization": f"Bearer {API_KEY}",
         "Content-Type": "application/json"
@@ -126,7 +128,7 @@ def search_papers(query, page=1, page_size=BATCH_SIZE):
     # make the API request with proper authentication and parameters to extract files while minimizing errors
     print(f"  Searching page {page} for '{query}'")
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=60)
+        response = CLIENT.get(url, headers=headers, params=params, timeout=60)
         
         if 'X-RateLimit-Remaining' in response.headers:
             print(f"  Rate limit remaining: {response.headers.get('X-RateLimit-Remaining')}")
@@ -148,13 +150,13 @@ def get_detailed_metadata(work_id):
     Returns:
         dict: The detailed metadata of the work.
     """
-    url = f"https://api.core.ac.uk/v3/works/{work_id}"
+    url = f"{API_BASE}/works/{work_id}"
     headers = {"Authorization": f"Bearer {API_KEY}"}
     
     # use the work ID to get detailed metadata
     print(f"  Getting detailed metadata for work ID {work_id}")
     try:
-        response = requests.get(url, headers=headers, timeout=60)
+        response = CLIENT.get(url, headers=headers, timeout=60)
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -173,20 +175,19 @@ def try_different_download_methods(work_id):
     
     # Method 1: try direct full text download
     try:
-        url = f"https://api.core.ac.uk/v3/works/{work_id}/download"
+        url = f"{API_BASE}/works/{work_id}/download"
         headers = {
             "Authorization": f"Bearer {API_KEY}",
             "Accept": "text/plain"
         }
         
         print(f"  Trying direct text download for work ID {work_id}")
-        response = requests.get(url, headers=headers, timeout=90)
-        response.raise_for_status()
-        
-        text = response.text
-        if is_valid_text(text):
+        # validated while streaming, so PDFs, binaries and oversized files are aborted early
+        text, validator = CLIENT.get_text(url, headers=headers, timeout=90, validator=TextValidator())
+        if text:
             print(f"  ✓ Method 1 success: {len(text)} chars of text")
             return text
+        print(f"  ✗ {validator.reason}")
     except Exception as e:
         print(f"  Method 1 failed: {e}")
     
@@ -203,20 +204,19 @@ def try_different_download_methods(work_id):
     
     # Method 3: try different download URL format
     try:
-        url = f"https://api.core.ac.uk/v3/download/{work_id}"
+        url = f"{API_BASE}/download/{work_id}"
         headers = {
             "Authorization": f"Bearer {API_KEY}",
             "Accept": "text/plain"
         }
         
         print(f"  Trying alternate download URL format")
-        response = requests.get(url, headers=headers, timeout=90)
-        response.raise_for_status()
-        
-        text = response.text
-        if is_valid_text(text):
+        # validated while streaming, so PDFs, binaries and oversized files are aborted early
+        text, validator = CLIENT.get_text(url, headers=headers, timeout=90, validator=TextValidator())
+        if text:
             print(f"  ✓ Method 3 success: {len(text)} chars of text")
             return text
+        print(f"  ✗ {validator.reason}")
     except Exception as e:
         print(f"  Method 3 failed: {e}")
     
@@ -224,33 +224,35 @@ def try_different_download_methods(work_id):
     return None
 
 
-def collect_papers_with_text(query, target_count=TARGET_PAPERS):
+def collect_papers_with_text(query, target_count=TARGET_PAPERS, dedup=None):
     """
     Collects papers with verified text content.
     Args:
         query (str): The search query.
         target_count (int): The target number of papers to collect.
+        dedup (DedupIndex): Index shared across categories (defaults to DEDUP).
     Returns:
         list: A list of papers with text content.
     """
-    papers_with_text = []
-    page = 1
+    dedup = DEDUP if dedup is None else dedup
     max_pages = 100
     
-    # load previous progress if exists
-    temp_file = os.path.join(OUTPUT_DIR, f"{query.replace(' ', '_')}_temp.json")
-    if os.path.exists(temp_file):
-        try:
-            with open(temp_file, 'r', encoding='utf-8') as f:
-                papers_with_text = json.load(f)
-                print(f"  Loaded {len(papers_with_text)} papers from previous run")
-        except Exception as e:
-            print(f"Error loading previous progress: {e}")
+    # load previous progress if exists (append-only log holding papers, seen IDs and the exact cursor)
+    temp_file = os.path.join(OUTPUT_DIR, f"{query.replace(' ', '_')}_temp.jsonl")
+    legacy_file = os.path.join(OUTPUT_DIR, f"{query.replace(' ', '_')}_temp.json")
+    log = CheckpointLog(temp_file)
+    try:
+        log.migrate_legacy(legacy_file, BATCH_SIZE)
+        log.load()
+    except Exception as e:
+        print(f"Error loading previous progress: {e}")
+    papers_with_text = log.papers
+    page, offset = log.cursor
     
-    # resume where we left off
-    if papers_with_text:
-        page = (len(papers_with_text) // BATCH_SIZE) + 1
-        print(f"Resuming from page {page}")
+    # resume exactly where we left off
+    if papers_with_text or (page, offset) != (1, 0):
+        print(f"  Loaded {len(papers_with_text)} papers from previous run")
+        print(f"Resuming from page {page}, result {offset}")
     
     # keep searching until we have enough papers with text in them
     while len(papers_with_text) < target_count and page <= max_pages:
@@ -259,72 +261,98 @@ def collect_papers_with_text(query, target_count=TARGET_PAPERS):
             
             if not batch:
                 print(f"No results on page {page} or search error")
-                page += 1
+                page, offset = page + 1, 0
+                log.advance(page, offset)
                 time.sleep(5)
                 continue
             
-            # process each paper in batch
-            for paper in batch:
+            # process each paper in batch, starting at the saved offset
+            for index in range(offset, len(batch)):
+                paper = batch[index]
                 work_id = paper.get('id')
                 if not work_id:
                     continue
                 
                 # skip papers we alr have
-                if any(p.get('id') == work_id for p in papers_with_text):
+                if work_id in log.seen:
                     print(f"Already have paper ID {work_id}, skipping")
                     continue
                 
                 print(f"Processing: {paper.get('title', 'Untitled')[:50]}... (ID: {work_id})")
                 
-                # check if paper already has fullText in the search results
-                if 'fullText' in paper and paper['fullText'] and is_valid_text(paper['fullText']):
-                    full_text = paper['fullText']
-                    print(f"Paper already has full text: {len(full_text)} chars")
+                # paper already collected for another category: reuse it instead of downloading again
+                known = dedup.lookup(work_id)
+                if known is not None:
+                    print(f"Paper ID {work_id} already downloaded for another category, reusing it")
+                    dedup.record_membership(known, query)
+                    paper_with_text = known
                 else:
-                    # try different methods to get text
-                    full_text = try_different_download_methods(work_id)
-                
-                if full_text:
-                    # create paper record with text
-                    paper_with_text = {
-                        'id': work_id,
-                        'doi': paper.get('doi'),
-                        'title': paper.get('title'),
-                        'abstract': paper.get('abstract'),
-                        'fullText': full_text,
-                        'source': paper.get('publisher', 'Unknown')
-                    }
+                    # check if paper already has fullText in the search results
+                    if 'fullText' in paper and paper['fullText'] and is_valid_text(paper['fullText']):
+                        full_text = paper['fullText']
+                        print(f"Paper already has full text: {len(full_text)} chars")
+                    else:
+                        # try different methods to get text
+                        full_text = try_different_download_methods(work_id)
                     
-                    papers_with_text.append(paper_with_text)
+                    paper_with_text = None
+                    duplicate = dedup.lookup_text(full_text, work_id) if full_text else None
+                    if duplicate is not None:
+                        # same text under another CORE ID: count it as a membership of the known paper
+                        print(f"Same text as paper ID {duplicate.get('id')}, recording membership")
+                        dedup.record_membership(duplicate, query, download_avoided=False)
+                        if duplicate.get('id') not in log.seen:
+                            paper_with_text = duplicate
+                    elif full_text:
+                        # create paper record with text
+                        paper_with_text = {
+                            'id': work_id,
+                            'doi': paper.get('doi'),
+                            'title': paper.get('title'),
+                            'abstract': paper.get('abstract'),
+                            'fullText': full_text,
+                            'source': paper.get('publisher', 'Unknown')
+                        }
+                        dedup.add(paper_with_text, query)
+                
+                if paper_with_text:
+                    # save progress after each successful paper (one appended line)
+                    log.add_paper(paper_with_text)
                     print(f"Success! Papers with text: {len(papers_with_text)}/{target_count}")
-                    
-                    # save progress after each successful paper
-                    with open(temp_file, 'w', encoding='utf-8') as f:
-                        json.dump(papers_with_text, f)
-                    
-                    # check if we reached our target
-                    if len(papers_with_text) >= target_count:
-                        print(f"Target reached: {target_count} papers with text")
-                        break
+                log.mark_seen(work_id)
+                log.advance(page, index + 1)
+                log.flush()
+                
+                # check if we reached our target
+                if len(papers_with_text) >= target_count:
+                    print(f"Target reached: {target_count} papers with text")
+                    break
                 
-                time.sleep(3)   # give the API a break
+                if known is None:
+                    time.sleep(3)   # give the API a break
             
-            page += 1
+            if len(papers_with_text) >= target_count:
+                break
+            page, offset = page + 1, 0
+            log.advance(page, offset)
             print(f"Moving to page {page}...")
             time.sleep(5)   # give the API another break
             
         except Exception as e:
             print(f"Error on page {page}: {e}")
             time.sleep(15)
-            page += 1
+            page, offset = page + 1, 0
+            log.advance(page, offset)
     
     # clean up temp file when done
-    if os.path.exists(temp_file) and len(papers_with_text) >= target_count:
+    if len(papers_with_text) >= target_count:
         try:
-            os.remove(temp_file)
+            log.remove()
             print("Cleaned up temporary file")
-        except:
+        except OSError:
             pass
+    else:
+        log.close()
     
     return papers_with_text[:target_count]
 
@@ -333,19 +361,12 @@ def main():
     """
     Main function which extracts keywords from Climate-Change-NER, and downloads research papers from CORE API.
     """
-    # same as anchors in prune_climate_kws.py, obtained from Climate-Change-NER predefined categories
-    categories = [
-        "climate assets", "climate datasets", "greenhouse gases", "climate hazards",
-        "climate impacts", "climate mitigation", "climate models", "climate nature",
-        "climate observations", "climate organisms", "climate organizations",
-        "origins of climate problems", "climate properties",
-    ]
-
     print("Downloading research papers from CORE API")
+    DEDUP.load_outputs(OUTPUT_DIR)
 
     # Loop through each category and download papers
     # from the CORE API, saving them to separate JSON files in output dir
-    for category in categories:
+    for category in CATEGORIES:
         output_file = os.path.join(OUTPUT_DIR, f"{category.lower().replace(' ', '_')}.json")
         
         if os.path.exists(output_file):
@@ -370,6 +391,7 @@ def main():
         print(f"Waiting before next category...")
         time.sleep(20)  # sleep to avoid hitting API rate limits or timeout
 
+    print(f"\nDedup: {DEDUP.stats()}")
     print("\nAll done!")
 
 
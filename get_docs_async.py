@@ -0,0 +1,443 @@
+import aiohttp
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+from checkpoint import CheckpointLog
+from core_client import STREAM_CHUNK
+from get_docs import (
+    API_BASE, API_KEY, BATCH_SIZE, CATEGORIES, CLIENT, DEDUP, MAX_RETRIES, OUTPUT_DIR, RETRY_DELAY_BASE,
+    TARGET_PAPERS, is_valid_text,
+)
+from text_validator import REJECT, ValidatingReader, validate_stream
+
+
+####################################################################################################
+# GLOBALS
+####################################################################################################
+
+MAX_PAGES = 100             # same page cap as the sequential crawler
+PAPER_CONCURRENCY = 8       # papers of one page processed at the same time (per category)
+MAX_CONNECTIONS = 32        # open connections shared by every category
+START_RATE = 2.0            # requests per second before CORE has told us anything
+MIN_RATE = 0.2              # never throttle below this many requests per second
+MAX_RATE = 10.0             # never go above this many requests per second
+BURST = 10                  # token bucket capacity
+
+_inflight = {}              # work id -> [download task, number of categories waiting on it]
+
+
+class TokenBucket:
+    """
+    Token bucket shared by every in-flight CORE request. The refill rate adapts to the
+    X-RateLimit-* headers: it grows while CORE reports plenty of budget, shrinks as the
+    remaining budget runs low, and halts all callers when a 429 arrives.
+    """
+
+    def __init__(self, rate=START_RATE, capacity=BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Waits until a request may be sent."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def update(self, headers):
+        """
+        Adjusts the refill rate from the rate limit headers of a response.
+        Args:
+            headers (Mapping): Response headers.
+        """
+        try:
+            remaining = int(headers["X-RateLimit-Remaining"])
+            limit = int(headers.get("X-RateLimit-Limit", 0)) or max(remaining, 1)
+        except (KeyError, ValueError):
+            self.rate = min(MAX_RATE, self.rate + 0.1)     # no information, probe upwards slowly
+            return
+        share = remaining / limit
+        if share > 0.5:         # plenty of budget: additive increase
+            self.rate = min(MAX_RATE, self.rate + 0.5)
+        else:                   # running low: scale down with what is left
+            self.rate = max(MIN_RATE, MAX_RATE * share)
+
+    def penalize(self, wait):
+        """
+        Blocks every caller for `wait` seconds and halves the rate (a 429 was received).
+        Args:
+            wait (float): Seconds to wait before the next request.
+        """
+        self.blocked_until = max(self.blocked_until, time.monotonic() + wait)
+        self.rate = max(MIN_RATE, self.rate / 2)
+        self.tokens = 0.0
+
+
+async def fetch_with_retry(session, bucket, url, headers=None, params=None, timeout=60, as_json=True,
+                           validate=False):
+    """
+    Async counterpart of get_docs.fetch_with_retry for a single GET request.
+    Args:
+        session (aiohttp.ClientSession): Shared HTTP session.
+        bucket (TokenBucket): Shared rate limiter.
+        url (str): The URL to fetch.
+        headers (dict): Request headers.
+        params (dict): Query parameters.
+        timeout (int): Timeout in seconds.
+        as_json (bool): Decode the body as JSON instead of text.
+        validate (bool): Run a TextValidator over the text body while it streams in; rejected
+            bodies are aborted mid-download and returned as None.
+    Returns:
+        The decoded body, or None on 404, rejection or when all retries fail.
+    """
+    def decode(body):
+        if validate:
+            return validate_stream([body])[0]
+        text = body.decode("utf-8", errors="replace")
+        return json.loads(text) if as_json else text
+
+    # the on-disk cache of get_docs.CLIENT is shared, so fresh hits cost neither a token nor a request
+    cache = CLIENT.cache
+    key = cache.key_for(url, params, headers) if cache else None
+    entry = cache.load(key) if cache else None
+    if entry and cache.is_fresh(entry):
+        cache.hits += 1
+        return decode(entry.body)
+    request_headers = dict(headers or {}, **(cache.conditional_headers(entry) if entry else {}))
+
+    for attempt in range(1, MAX_RETRIES + 1):
+        await bucket.acquire()
+        try:
+            async with session.get(url, headers=request_headers, params=params,
+                                   timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                bucket.update(response.headers)
+                if response.status == 304 and entry:
+                    cache.revalidated += 1
+                    cache.refresh(entry)
+                    return decode(entry.body)
+                if response.status == 404:
+                    print(f"  ✗ Resource not found: {url}")
+                    return None
+                if response.status == 429:
+                    wait = float(response.headers.get('X-RateLimit-Retry-After', RETRY_DELAY_BASE * 2**attempt))
+                    print(f"  Rate limit hit. Pausing all requests for {wait}s.")
+                    bucket.penalize(wait)
+                    continue
+                response.raise_for_status()
+                if validate:
+                    reader = ValidatingReader(encoding=response.charset or "utf-8")
+                    async for chunk in response.content.iter_chunked(STREAM_CHUNK):
+                        if reader.feed(chunk) == REJECT:
+                            print(f"  ✗ {reader.validator.reason} ({url}), download aborted")
+                            return None
+                    text = reader.finish()
+                    body = text.encode("utf-8") if text is not None else None
+                else:
+                    body = await response.read()
+                if cache:
+                    cache.misses += 1
+                    if body is not None:
+                        cache.store(key, url, response.headers, body)
+                return text if validate else decode(body)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            wait = RETRY_DELAY_BASE * (2 ** (attempt - 1)) + random.random()
+            print(f"  Retry {attempt}/{MAX_RETRIES} in {wait:.1f}s -> {e}")
+            await asyncio.sleep(wait)
+
+    if entry:       # CORE unreachable: a stale answer beats none
+        return decode(entry.body)
+    print(f"  Giving up after {MAX_RETRIES} retries")
+    return None
+
+
+async def search_papers(session, bucket, query, page=1, page_size=BATCH_SIZE):
+    """
+    Searches for papers, see get_docs.search_papers.
+    Returns:
+        list: A list of papers matching the query, or None on error.
+    """
+    params = {
+        "q": f"{query}",
+        "offset": (page - 1) * page_size,
+        "limit": page_size,
+        "fields": "id,doi,title,abstract,fullText,downloadUrl,publisher,language"
+    }
+    headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"}
+    print(f"  Searching page {page} for '{query}'")
+    data = await fetch_with_retry(session, bucket, f"{API_BASE}/search/works", headers, params)
+    if data is None:
+        return None
+    results = data.get("results", [])
+    print(f"  Found {len(results)} results on page {page} for '{query}'")
+    return results
+
+
+async def _download_text(session, bucket, url):
+    """Method 1 / 3: plain text download endpoints, validated while streaming."""
+    headers = {"Authorization": f"Bearer {API_KEY}", "Accept": "text/plain"}
+    return await fetch_with_retry(session, bucket, url, headers, timeout=90, as_json=False, validate=True)
+
+
+async def _metadata_text(session, bucket, work_id):
+    """Method 2: fullText field of the detailed metadata."""
+    headers = {"Authorization": f"Bearer {API_KEY}"}
+    metadata = await fetch_with_retry(session, bucket, f"{API_BASE}/works/{work_id}", headers)
+    text = metadata.get('fullText') if metadata else None
+    return text if text and is_valid_text(text) else None
+
+
+async def try_different_download_methods(session, bucket, work_id):
+    """
+    Runs the three download methods of get_docs.try_different_download_methods concurrently
+    and returns the first valid text; the slower methods are cancelled.
+    Args:
+        work_id (str): The ID of the work.
+    Returns:
+        str: The text content if successful, None otherwise.
+    """
+    tasks = [
+        asyncio.create_task(_download_text(session, bucket, f"{API_BASE}/works/{work_id}/download")),
+        asyncio.create_task(_metadata_text(session, bucket, work_id)),
+        asyncio.create_task(_download_text(session, bucket, f"{API_BASE}/download/{work_id}")),
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            text = await next_done
+            if text:
+                print(f"  ✓ Downloaded {len(text)} chars of text for work ID {work_id}")
+                return text
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"All text download methods failed for work ID {work_id}.")
+    return None
+
+
+async def _fetch_paper(session, bucket, paper):
+    """Returns the paper record with full text, or None if no text could be found."""
+    work_id = paper.get('id')
+    if paper.get('fullText') and is_valid_text(paper['fullText']):
+        full_text = paper['fullText']
+    else:
+        full_text = await try_different_download_methods(session, bucket, work_id)
+    if not full_text:
+        return None
+    return {
+        'id': work_id,
+        'doi': paper.get('doi'),
+        'title': paper.get('title'),
+        'abstract': paper.get('abstract'),
+        'fullText': full_text,
+        'source': paper.get('publisher', 'Unknown')
+    }
+
+
+async def _shared_fetch(session, bucket, paper):
+    """
+    Fetches a paper once even when several categories ask for it at the same time.
+    Returns:
+        tuple: (record or None, True if another category's download was joined).
+    """
+    work_id = paper['id']
+    entry = _inflight.get(work_id)
+    joined = entry is not None
+    if entry is None:
+        entry = _inflight[work_id] = [asyncio.create_task(_fetch_paper(session, bucket, paper)), 0]
+        entry[0].add_done_callback(lambda _: _inflight.pop(work_id, None))
+    entry[1] += 1
+    try:
+        return await asyncio.shield(entry[0]), joined
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0 and not entry[0].done():     # nobody is waiting any more
+            entry[0].cancel()
+
+
+async def _process_paper(session, bucket, paper, query, dedup):
+    """
+    Returns the record to add to `query`'s category, reusing papers already collected (or being
+    downloaded) for other categories, or None.
+    """
+    work_id = paper.get('id')
+    known = dedup.lookup(work_id)
+    if known is not None:
+        dedup.record_membership(known, query)
+        return known
+
+    record, joined = await _shared_fetch(session, bucket, paper)
+    if record is None:
+        return None
+    if joined:
+        # the category that started the download may have been cancelled before registering it
+        dedup.id_hits += 1
+        known = dedup.add(record, query)
+        dedup.record_membership(known, query)
+        return known
+
+    duplicate = dedup.lookup_text(record['fullText'], work_id)
+    if duplicate is not None:       # same text under another CORE ID
+        dedup.record_membership(duplicate, query, download_avoided=False)
+        return duplicate
+    return dedup.add(record, query)
+
+
+async def collect_papers_with_text(session, bucket, query, target_count=TARGET_PAPERS, output_dir=OUTPUT_DIR,
+                                   dedup=DEDUP):
+    """
+    Async counterpart of get_docs.collect_papers_with_text. Uses the same checkpoint log, so a crawl
+    can be resumed by either implementation.
+    Args:
+        query (str): The search query.
+        target_count (int): The target number of papers to collect.
+        dedup (DedupIndex): Index shared across categories.
+    Returns:
+        list: A list of papers with text content.
+    """
+    temp_file = os.path.join(output_dir, f"{query.replace(' ', '_')}_temp.jsonl")
+    legacy_file = os.path.join(output_dir, f"{query.replace(' ', '_')}_temp.json")
+    log = CheckpointLog(temp_file)
+    try:
+        log.migrate_legacy(legacy_file, BATCH_SIZE)
+        log.load()
+    except Exception as e:
+        print(f"Error loading previous progress: {e}")
+    papers_with_text = log.papers
+    page, offset = log.cursor
+
+    if papers_with_text or (page, offset) != (1, 0):
+        print(f"  Loaded {len(papers_with_text)} papers for '{query}' from previous run")
+        print(f"Resuming '{query}' from page {page}, result {offset}")
+
+    limit = asyncio.Semaphore(PAPER_CONCURRENCY)
+
+    async def bounded(paper):
+        async with limit:
+            return paper, await _process_paper(session, bucket, paper, query, dedup)
+
+    while len(papers_with_text) < target_count and page <= MAX_PAGES:
+        batch = await search_papers(session, bucket, query, page, BATCH_SIZE)
+        if not batch:
+            print(f"No results on page {page} or search error")
+            page, offset = page + 1, 0
+            log.advance(page, offset)
+            continue
+
+        # papers finish out of order, so within a page the seen IDs (not the offset) mark progress
+        candidates = [p for p in batch[offset:] if p.get('id') and p.get('id') not in log.seen]
+        tasks = [asyncio.create_task(bounded(p)) for p in candidates]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                paper, paper_with_text = await next_done
+                if not paper_with_text or paper_with_text.get('id') in log.seen:
+                    log.mark_seen(paper['id'])
+                    continue
+                log.add_paper(paper_with_text)
+                log.mark_seen(paper['id'])
+                log.flush()
+                print(f"Success! '{query}' papers with text: {len(papers_with_text)}/{target_count}")
+                if len(papers_with_text) >= target_count:
+                    print(f"Target reached for '{query}': {target_count} papers with text")
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        page, offset = page + 1, 0
+        log.advance(page, offset)
+
+    if len(papers_with_text) >= target_count:
+        try:
+            log.remove()
+            print(f"Cleaned up temporary file for '{query}'")
+        except OSError:
+            pass
+    else:
+        log.close()
+
+    return papers_with_text[:target_count]
+
+
+async def crawl_category(session, bucket, category, target_count=TARGET_PAPERS, output_dir=OUTPUT_DIR, dedup=DEDUP):
+    """
+    Crawls one category and writes <category>.json, skipping categories that are already done.
+    Returns:
+        int: Number of papers saved.
+    """
+    output_file = os.path.join(output_dir, f"{category.lower().replace(' ', '_')}.json")
+    if os.path.exists(output_file):
+        print(f"\nSkipping '{category}' (already completed)")
+        return 0
+
+    try:
+        papers = await collect_papers_with_text(session, bucket, category, target_count, output_dir, dedup)
+    except Exception as e:
+        print(f"Error processing '{category}': {e}")
+        return 0
+
+    if not papers:
+        print(f"No papers with text found for '{category}'")
+        return 0
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(papers, f, indent=2)
+    print(f"Saved {len(papers)} papers to {output_file}")
+    return len(papers)
+
+
+async def crawl(categories=CATEGORIES, target_count=TARGET_PAPERS, output_dir=OUTPUT_DIR, bucket=None, dedup=None):
+    """
+    Crawls every category concurrently under one shared token bucket and dedup index.
+    Returns:
+        int: Total number of papers saved.
+    """
+    bucket = bucket or TokenBucket()
+    dedup = DEDUP if dedup is None else dedup
+    dedup.load_outputs(output_dir)
+    connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        counts = await asyncio.gather(*(
+            crawl_category(session, bucket, category, target_count, output_dir, dedup) for category in categories
+        ))
+    print(f"\nDedup: {dedup.stats()}")
+    return sum(counts)
+
+
+def main():
+    """Downloads research papers from CORE API for every category at once."""
+    parser = argparse.ArgumentParser(description="Concurrent CORE crawler (async variant of get_docs.py)")
+    parser.add_argument("--target", type=int, default=TARGET_PAPERS, help="papers with text per category")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    args = parser.parse_args()
+
+    print("Downloading research papers from CORE API (async)")
+    start = time.perf_counter()
+    total = asyncio.run(crawl(CATEGORIES, args.target, args.output_dir))
+    elapsed = time.perf_counter() - start
+    print(f"\nAll done! {total} papers in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
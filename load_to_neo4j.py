@@ -1,45 +1,303 @@
+import argparse
 import glob
+import hashlib
 import json
+import os
 import pathlib
+import time
 
 from neo4j import GraphDatabase
 
 
-def main():
-    """Sets up connection details, cypher template. Loads papers into Neo4j database."""
-  # 1) connection details
-  BOLT_URL  = "bolt://localhost:7687"     
-  USER      = "neo4j"
-  PASSWORD  = "Str0ngPass!"
+####################################################################################################
+# GLOBALS
+####################################################################################################
+
+BOLT_URL = os.getenv("NEO4J_URI", "bolt://localhost:7687")     # same variables as chatbot-ui/kg_client.py
+USER = os.getenv("NEO4J_USER", "neo4j")
+PASSWORD = os.getenv("NEO4J_PWD", "Str0ngPass!")
+
+INPUT_DIR = "climate_outputs"
+MANIFEST = ".neo4j_manifest.json"   # inside INPUT_DIR: what the graph currently holds, for --incremental
+CHUNK_SIZE = 200            # papers per UNWIND transaction
+GRAPH_PROPERTIES = ("id", "doi", "title", "abstract", "source")    # fullText stays on disk
+
+# uniqueness constraints first: they back every MERGE with an index lookup instead of a label scan
+CONSTRAINTS = [
+    "CREATE CONSTRAINT paper_id IF NOT EXISTS FOR (p:Paper) REQUIRE p.id IS UNIQUE",
+    "CREATE CONSTRAINT category_name IF NOT EXISTS FOR (c:Category) REQUIRE c.name IS UNIQUE",
+]
+
+# cypher template (category = file name), run once per chunk
+LOAD_CHUNK = """
+MERGE (c:Category {name:$cat})
+WITH c
+UNWIND $batch AS paper
+  MERGE (p:Paper {id:paper.id})
+    SET p += paper
+  MERGE (c)-[:HAS_PAPER]->(p)
+"""
+
+# graphs loaded by older versions carry the full text on every Paper node
+DROP_FULLTEXT = "MATCH (p:Paper) WHERE p.fullText IS NOT NULL REMOVE p.fullText"
+
+FULLTEXT_INDEX = """
+CREATE FULLTEXT INDEX paperFT IF NOT EXISTS
+FOR (p:Paper) ON EACH [p.title, p.abstract]
+"""
+DROP_FULLTEXT_INDEX = "DROP INDEX paperFT IF EXISTS"
+
+# incremental mode: detach papers that left a category, then delete papers left in no category
+REMOVE_MEMBERSHIPS = """
+MATCH (c:Category {name:$cat})-[r:HAS_PAPER]->(p:Paper)
+WHERE p.id IN $ids
+DELETE r
+WITH DISTINCT p
+WHERE NOT (p)<-[:HAS_PAPER]-()
+DETACH DELETE p
+"""
+DROP_CATEGORY = "MATCH (c:Category {name:$cat}) DETACH DELETE c"
+
+
+class StubDriver:
+    """
+    Stand-in for neo4j.Driver that records every query instead of sending it, so the loader can
+    be exercised (and timed without network) with no database running.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def session(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, **params):
+        self.queries.append((query, params))
+
+    def close(self):
+        pass
+
+
+def slim(paper):
+    """
+    Keeps only the properties we search on or display.
+    Args:
+        paper (dict): A paper record from climate_outputs.
+    Returns:
+        dict: The paper without fullText or any other bulky field.
+    """
+    return {key: paper.get(key) for key in GRAPH_PROPERTIES}
+
+
+def iter_category_papers(input_dir=INPUT_DIR, compact_dir=None):
+    """
+    Yields (category, papers) per category, already slimmed.
+    Args:
+        input_dir (str): Directory with the <category>.json files.
+        compact_dir (str): Read the compact format instead (metadata only, fullText never parsed).
+    """
+    if compact_dir:
+        from compact_outputs import CompactCorpus
+        corpus = CompactCorpus(compact_dir)
+        for category in corpus.categories():
+            yield category, [slim(p) for p in corpus.papers(category)]
+        corpus.close()
+        return
+    for path in sorted(glob.glob(os.path.join(input_dir, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            yield pathlib.Path(path).stem, [slim(p) for p in json.load(f)]
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
 
-  driver = GraphDatabase.driver(BOLT_URL, auth=(USER, PASSWORD))
 
+def load(driver, category_papers, chunk_size=CHUNK_SIZE):
+    """
+    Loads papers into Neo4j: constraints, then chunked UNWIND merges, then the full-text index.
+    Args:
+        driver: A neo4j.Driver (or StubDriver).
+        category_papers (iterable): (category, papers) pairs, e.g. from iter_category_papers.
+        chunk_size (int): Papers per transaction.
+    Returns:
+        dict: Papers merged, chunks sent, elapsed seconds and nodes per second.
+    """
+    papers = chunks = 0
+    start = time.perf_counter()
+    with driver.session() as session:
+        for constraint in CONSTRAINTS:
+            session.run(constraint)
+        session.run(DROP_FULLTEXT)
 
-  # 2) cypher template (category = file name)
-  CYPHER = """
-  MERGE (c:Category {name:$cat})
-  WITH c
-  UNWIND $batch AS paper
-    MERGE (p:Paper {id:paper.id})
-      SET p += paper
-    MERGE (c)-[:HAS_PAPER]->(p);
-  """
+        for cat, batch in category_papers:
+            for chunk in chunked(batch, chunk_size):
+                session.run(LOAD_CHUNK, cat=cat, batch=chunk)
+                papers += len(chunk)
+                chunks += 1
+            print(f"  {cat}: {len(batch)} papers")
 
-  # 3) load papers
-  with driver.session() as session:
-      for path in glob.glob("climate_outputs/*.json"):
-          cat = pathlib.Path(path).stem
-          session.run(CYPHER, cat=cat, batch=json.load(open(path)))
+        # full‑text index (one‑time)
+        session.run(FULLTEXT_INDEX)
+
+    elapsed = time.perf_counter() - start
+    return {"papers": papers, "chunks": chunks, "seconds": elapsed,
+            "nodes_per_sec": papers / elapsed if elapsed else 0.0}
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def paper_hash(paper):
+    """Hash of the properties stored in the graph (a fullText-only change needs no upsert)."""
+    return _digest(json.dumps(slim(paper), sort_keys=True).encode("utf-8"))
+
+
+def read_manifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"files": {}, "papers": {}, "index": None}
+
+
+def write_manifest(path, files, papers):
+    """
+    Records what the graph now holds. `version` changes whenever any category file does, so
+    caches of query results can be invalidated when the graph is reloaded.
+    """
+    manifest = {
+        "version": _digest(json.dumps(files, sort_keys=True).encode("utf-8"))[:16],
+        "index": _digest(FULLTEXT_INDEX.encode("utf-8")),
+        "files": files,
+        "papers": papers,
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, path)
+
+
+def snapshot(input_dir=INPUT_DIR):
+    """
+    Hashes every category file and, per category, every paper.
+    Returns:
+        tuple: ({file name: sha256}, {category: [[id, paper hash], ...]}, {category: [slim papers]}).
+    """
+    files, papers, slimmed = {}, {}, {}
+    for path in sorted(glob.glob(os.path.join(input_dir, "*.json"))):
+        with open(path, "rb") as f:
+            raw = f.read()
+        cat = pathlib.Path(path).stem
+        files[os.path.basename(path)] = _digest(raw)
+        records = json.loads(raw)
+        papers[cat] = [[p.get("id"), paper_hash(p)] for p in records]
+        slimmed[cat] = [slim(p) for p in records]
+    return files, papers, slimmed
+
+
+def load_incremental(driver, input_dir=INPUT_DIR, chunk_size=CHUNK_SIZE, save_manifest=True):
+    """
+    Brings the graph in line with climate_outputs using the manifest of the previous load:
+    unchanged files are skipped, new or changed papers are upserted, removed papers are
+    detached (and deleted once in no category), and paperFT is only rebuilt if its definition
+    changed or it was never created.
+    Args:
+        driver: A neo4j.Driver (or StubDriver).
+        input_dir (str): Directory with the <category>.json files and the manifest.
+        chunk_size (int): Papers per transaction.
+        save_manifest (bool): Record the new state (off for dry runs).
+    Returns:
+        dict: Counts of upserted/removed papers, skipped files, index rebuilds and elapsed seconds.
+    """
+    manifest_path = os.path.join(input_dir, MANIFEST)
+    old = read_manifest(manifest_path)
+    files, papers, slimmed = snapshot(input_dir)
+    stats = {"upserted": 0, "removed": 0, "skipped_files": 0, "index_rebuilt": False}
+    start = time.perf_counter()
+
+    with driver.session() as session:
+        for constraint in CONSTRAINTS:
+            session.run(constraint)
+        if not old["files"]:        # first incremental run: the graph may predate fullText-free nodes
+            session.run(DROP_FULLTEXT)
+
+        for name, digest in files.items():
+            cat = pathlib.Path(name).stem
+            if old["files"].get(name) == digest:
+                stats["skipped_files"] += 1
+                continue
+            before = {json.dumps(pid): h for pid, h in old["papers"].get(cat, [])}
+            now = {json.dumps(pid): h for pid, h in papers[cat]}
+            changed = [p for p in slimmed[cat] if before.get(json.dumps(p["id"])) != now[json.dumps(p["id"])]]
+            removed = [pid for pid, _ in old["papers"].get(cat, []) if json.dumps(pid) not in now]
+
+            for chunk in chunked(changed, chunk_size):
+                session.run(LOAD_CHUNK, cat=cat, batch=chunk)
+            if removed:
+                session.run(REMOVE_MEMBERSHIPS, cat=cat, ids=removed)
+            stats["upserted"] += len(changed)
+            stats["removed"] += len(removed)
+            print(f"  {cat}: {len(changed)} upserted, {len(removed)} removed")
+
+        for name in set(old["files"]) - set(files):      # category file deleted
+            cat = pathlib.Path(name).stem
+            ids = [pid for pid, _ in old["papers"].get(cat, [])]
+            session.run(REMOVE_MEMBERSHIPS, cat=cat, ids=ids)
+            session.run(DROP_CATEGORY, cat=cat)
+            stats["removed"] += len(ids)
+            print(f"  {cat}: category removed ({len(ids)} papers)")
+
+        if old.get("index") != _digest(FULLTEXT_INDEX.encode("utf-8")):
+            if old.get("index") is not None:
+                session.run(DROP_FULLTEXT_INDEX)
+            session.run(FULLTEXT_INDEX)
+            stats["index_rebuilt"] = True
+
+    if save_manifest:
+        write_manifest(manifest_path, files, papers)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def main():
+    """Sets up connection details and loads papers into the Neo4j database."""
+    parser = argparse.ArgumentParser(description="Load climate_outputs into Neo4j")
+    parser.add_argument("--input-dir", default=INPUT_DIR)
+    parser.add_argument("--compact-dir", help="read the compact format written by compact_outputs.py")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="use a stub driver instead of Neo4j")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only apply changes since the last load (uses the manifest in --input-dir)")
+    args = parser.parse_args()
+    if args.incremental and args.compact_dir:
+        parser.error("--incremental works on the JSON files in --input-dir, not --compact-dir")
 
-      # full‑text index (one‑time)
-      session.run("""
-      CREATE FULLTEXT INDEX paperFT IF NOT EXISTS
-      FOR (p:Paper) ON EACH [p.title, p.abstract]
-      """)
+    driver = StubDriver() if args.dry_run else GraphDatabase.driver(BOLT_URL, auth=(USER, PASSWORD))
+    try:
+        if args.incremental:
+            stats = load_incremental(driver, args.input_dir, args.chunk_size, save_manifest=not args.dry_run)
+            print(f"Graph updated! {stats['upserted']} upserted, {stats['removed']} removed, "
+                  f"{stats['skipped_files']} files unchanged, index rebuilt: {stats['index_rebuilt']}, "
+                  f"{stats['seconds']:.2f}s\n")
+            return
+        stats = load(driver, iter_category_papers(args.input_dir, args.compact_dir), args.chunk_size)
+        if not args.compact_dir and not args.dry_run:     # a full load is the baseline for --incremental
+            files, papers, _ = snapshot(args.input_dir)
+            write_manifest(os.path.join(args.input_dir, MANIFEST), files, papers)
+    finally:
+        driver.close()
 
-  print("Papers and index loaded!\n")
-  driver.close()
+    print(f"Papers and index loaded! {stats['papers']} papers in {stats['chunks']} chunks, "
+          f"{stats['seconds']:.2f}s ({stats['nodes_per_sec']:.0f} nodes/sec)\n")
 
 
 if __name__ == "__main__":
-    __main__()
\ No newline at end of file
+    main()
@@ -0,0 +1,158 @@
+import codecs
+import re
+
+
+####################################################################################################
+# GLOBALS
+####################################################################################################
+
+MIN_ALNUM = 200                 # alphanumeric characters needed to accept a document
+MIN_WORDS = 100                 # words needed to accept a document
+MAX_REPLACEMENT_CHARS = 5       # more U+FFFD than this means binary data decoded as text
+MAX_TEXT_CHARS = 20_000_000     # downloads larger than this are aborted
+WINDOW = 8192                   # characters examined per step, bounds the work done after a decision
+
+ACCEPT, REJECT, PENDING = "accept", "reject", "pending"
+WORD_RE = re.compile(r"\w+")
+
+
+class TextValidator:
+    """
+    Single-pass, bounded-memory version of get_docs.is_valid_text that can be fed a download
+    chunk by chunk. It stops examining content as soon as the document is accepted (enough
+    alphanumeric characters and words) or rejected (PDF header, NUL bytes, too many replacement
+    characters, oversized), so the caller can abort the download mid-stream.
+    """
+
+    def __init__(self, max_chars=MAX_TEXT_CHARS):
+        self.max_chars = max_chars
+        self.state = PENDING
+        self.reason = None
+        self.chars = 0
+        self.alnum = 0
+        self.words = 0
+        self.replacement = 0
+        self._head = ""
+        self._in_word = False
+
+    def _reject(self, reason):
+        self.state = REJECT
+        self.reason = reason
+        return self.state
+
+    def feed(self, chunk):
+        """
+        Examines the next piece of text.
+        Args:
+            chunk (str): The next decoded piece of the document.
+        Returns:
+            str: ACCEPT, REJECT or PENDING.
+        """
+        if self.state == REJECT:
+            return self.state
+        self.chars += len(chunk)
+        if self.chars > self.max_chars:
+            return self._reject(f"Text too large: more than {self.max_chars} chars")
+        if self.state == ACCEPT:
+            return self.state
+
+        for start in range(0, len(chunk), WINDOW):
+            window = chunk[start:start + WINDOW]
+            if len(self._head) < 5:
+                self._head += window[:5 - len(self._head)]
+                if self._head.startswith("%PDF-"):
+                    return self._reject("Received PDF data instead of text")
+            if "\0" in window:
+                return self._reject("Received binary data")
+            self.replacement += window.count('\ufffd')
+            if self.replacement > MAX_REPLACEMENT_CHARS:
+                return self._reject("Received binary data")
+
+            for match in WORD_RE.finditer(window):
+                word = match.group()
+                if not (match.start() == 0 and self._in_word):   # a word split across windows counts once
+                    self.words += 1
+                self.alnum += len(word) - word.count('_')
+                if self.alnum >= MIN_ALNUM and self.words >= MIN_WORDS:
+                    self.state = ACCEPT
+                    return self.state
+            self._in_word = bool(window) and (window[-1].isalnum() or window[-1] == '_')
+        return self.state
+
+    def finish(self):
+        """
+        Ends the document: anything still undecided did not have enough content.
+        Returns:
+            str: ACCEPT or REJECT.
+        """
+        if self.state == PENDING:
+            if self.alnum < MIN_ALNUM:
+                self._reject(f"Insufficient content: only {self.alnum} alphanumeric chars")
+            else:
+                self._reject(f"Insufficient content: only {self.words} words")
+        return self.state
+
+
+def validate_text(text):
+    """
+    Validates a complete string with a TextValidator.
+    Args:
+        text (str): The text to check.
+    Returns:
+        TextValidator: The validator, with `state` ACCEPT or REJECT and a `reason` on rejection.
+    """
+    validator = TextValidator()
+    if validator.feed(text or "") == PENDING:
+        validator.finish()
+    return validator
+
+
+class ValidatingReader:
+    """
+    Decodes a download chunk by chunk, validating as it goes and keeping the decoded parts.
+    Works with any chunk source (requests iter_content, aiohttp iter_chunked, cached bodies).
+    """
+
+    def __init__(self, validator=None, encoding="utf-8"):
+        self.validator = validator or TextValidator()
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._parts = []
+
+    def feed(self, chunk):
+        """
+        Args:
+            chunk (bytes): The next raw body chunk.
+        Returns:
+            str: Validator state; stop reading on REJECT.
+        """
+        text = self._decoder.decode(chunk)
+        self._parts.append(text)
+        return self.validator.feed(text)
+
+    def finish(self):
+        """
+        Returns:
+            str: The full text if accepted, None otherwise.
+        """
+        tail = self._decoder.decode(b"", final=True)
+        self._parts.append(tail)
+        if self.validator.feed(tail) == PENDING:
+            self.validator.finish()
+        return "".join(self._parts) if self.validator.state == ACCEPT else None
+
+
+def validate_stream(byte_chunks, validator=None, encoding="utf-8"):
+    """
+    Decodes and validates a download chunk by chunk, stopping at the first rejection.
+    Args:
+        byte_chunks (iterable): Raw body chunks (bytes).
+        validator (TextValidator): Validator to use, a fresh one by default.
+        encoding (str): Body encoding.
+    Returns:
+        tuple: (full text or None if rejected, validator).
+    """
+    reader = ValidatingReader(validator, encoding)
+    for chunk in byte_chunks:
+        if reader.feed(chunk) == REJECT:
+            return None, reader.validator
+    return reader.finish(), reader.validator